@@ -0,0 +1,85 @@
+"""
+Compares `break_into_chunks` with the streaming `sliding_window_chunks` on a large corpus.
+
+    python benchmarks/chunking.py --model BAAI/bge-large-en-v1.5 --mb 32
+    python benchmarks/chunking.py --file corpus.txt --max-tokens 500 --overlap 50
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from tabulate import tabulate
+from transformers import AutoTokenizer
+
+from magnet.utils.globals import _f, break_into_chunks, sliding_window_chunks
+
+
+def corpus(mb: int, seed: int = 2077):
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(
+            rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 12))
+        )
+        for _ in range(20000)
+    ]
+    words, size = [], 0
+    while size < mb * 1024 * 1024:
+        word = rng.choice(vocabulary)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    n = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="BAAI/bge-large-en-v1.5")
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--mb", type=int, default=32)
+    parser.add_argument("--max-tokens", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=0)
+    args = parser.parse_args()
+
+    text = open(args.file).read() if args.file else corpus(args.mb)
+    size = len(text.encode("utf-8")) / 1024 / 1024
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    _f("info", f"chunking {size:.1f} MB with {args.model}")
+
+    rows = []
+    for name, fn in [
+        ("break_into_chunks", lambda: len(break_into_chunks(text, args.max_tokens))),
+        (
+            "sliding_window_chunks",
+            lambda: sum(
+                1
+                for _ in sliding_window_chunks(
+                    text, tokenizer, args.max_tokens, overlap=args.overlap
+                )
+            ),
+        ),
+    ]:
+        n, elapsed, peak = measure(fn)
+        rows.append([name, n, f"{elapsed:.2f}", f"{size / elapsed:.2f}", f"{peak:.1f}"])
+    _f(
+        "success",
+        "\n"
+        + tabulate(
+            rows,
+            headers=["chunker", "chunks", "seconds", "MB/s", "peak MB"],
+            tablefmt="pretty",
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compares the encoder backends of `load_encoder` on the same corpus: throughput per core and recall@k of
+nearest-neighbour search against the full-precision torch backend.
+
+    python benchmarks/encoders.py --model BAAI/bge-large-en-v1.5 --file corpus.txt --passages 2000
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+import torch
+from tabulate import tabulate
+
+from magnet.ize.encoders import BACKENDS, load_encoder
+from magnet.utils.globals import _f
+
+
+def corpus(file: str, passages: int, seed: int = 2077):
+    if file:
+        lines = [line.strip() for line in open(file) if line.strip()]
+        return lines[:passages]
+    rng = random.Random(seed)
+    vocabulary = [
+        "market",
+        "energy",
+        "storage",
+        "turbine",
+        "ticker",
+        "quarter",
+        "revenue",
+        "battery",
+        "grid",
+        "solar",
+        "offshore",
+        "capital",
+        "margin",
+        "forecast",
+        "pressure",
+        "volume",
+        "flow",
+        "tank",
+        "well",
+        "drill",
+    ]
+    return [
+        " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 200)))
+        for _ in range(passages)
+    ]
+
+
+def recall(reference: np.ndarray, candidate: np.ndarray, queries: int, k: int):
+    rng = np.random.default_rng(2077)
+    picks = rng.choice(len(reference), size=min(queries, len(reference)), replace=False)
+    truth = np.argsort(-(reference[picks] @ reference.T), axis=1)[:, 1 : k + 1]
+    found = np.argsort(-(candidate[picks] @ candidate.T), axis=1)[:, 1 : k + 1]
+    return np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="BAAI/bge-large-en-v1.5")
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--passages", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    texts = corpus(args.file, args.passages)
+    _f(
+        "info",
+        f"encoding {len(texts)} passages with {args.model} on {args.threads} threads",
+    )
+
+    rows, reference = [], None
+    for backend in BACKENDS:
+        encoder = load_encoder(
+            args.model, backend=backend, device="cpu", threads=args.threads
+        )
+        encoder.encode(texts[: args.batch_size], batch_size=args.batch_size)
+        start = time.perf_counter()
+        embeddings = np.asarray(
+            encoder.encode(
+                texts, batch_size=args.batch_size, normalize_embeddings=True
+            ),
+            dtype=np.float32,
+        )
+        elapsed = time.perf_counter() - start
+        reference = embeddings if reference is None else reference
+        rows.append(
+            [
+                backend,
+                f"{len(texts) / elapsed:.1f}",
+                f"{len(texts) / elapsed / args.threads:.2f}",
+                f"{recall(reference, embeddings, args.queries, args.k):.3f}",
+            ]
+        )
+        del encoder
+    _f(
+        "success",
+        "\n"
+        + tabulate(
+            rows,
+            headers=["backend", "passages/s", "passages/s/core", f"recall@{args.k}"],
+            tablefmt="pretty",
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
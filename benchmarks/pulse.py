@@ -0,0 +1,123 @@
+"""
+Measures the CPU spent framing a payload for `Charge.pulse` (encoding, `Nats-Msg-Id` derivation and compression,
+without the network) per MB of sequence data, for every wire codec and dedupe strategy, against the previous
+`json.dumps(asdict(payload))` followed by a second xxhash pass.
+
+    python benchmarks/pulse.py --mb 1 --mb 8
+    python benchmarks/pulse.py --mb 4 --features 32 --compression zstd
+"""
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import xxhash
+from tabulate import tabulate
+
+from magnet.ic.field import Charge
+from magnet.utils.data_classes import MagnetConfig, Payload
+from magnet.utils.globals import _f
+
+DEDUPES = ("content", "id", "key")
+
+
+def legacy(payload: Payload):
+    data = payload.content
+    columns = {
+        "content": data.tolist() if isinstance(data, np.ndarray) else data,
+        "_id": payload._id,
+    }
+    bytes_ = json.dumps(columns, separators=(", ", ":")).encode("utf-8")
+    return bytes_, xxhash.xxh64(bytes_).hexdigest()
+
+
+def measure(fn, repeat: int):
+    fn()
+    start = time.process_time()
+    for _ in range(repeat):
+        result = fn()
+    return (time.process_time() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, action="append")
+    parser.add_argument("--features", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compression", default=None)
+    args = parser.parse_args()
+
+    magnet = SimpleNamespace(
+        config=MagnetConfig(
+            host="localhost", category="benchmark", compression=args.compression
+        ),
+        nc=None,
+        status_callback=lambda status: None,
+    )
+    charge = Charge(magnet)
+    loop = asyncio.new_event_loop()
+    rng = np.random.default_rng(2077)
+
+    rows = []
+    for mb in args.mb or [1, 8]:
+        sequence = rng.normal(
+            size=(max(int(mb * 1024 * 1024 / 4 / args.features), 1), args.features)
+        ).astype(np.float32)
+        payload = Payload(content=sequence, _id="0")
+        size = sequence.nbytes / 1024 / 1024
+        seconds, (bytes_, _) = measure(lambda: legacy(payload), args.repeat)
+        baseline = seconds
+        rows.append(
+            [
+                f"{size:.1f}",
+                "asdict + json",
+                "xxh64 pass",
+                f"{len(bytes_) / 1024 / 1024:.1f}",
+                f"{seconds / size * 1000:.1f}",
+                "1.0x",
+            ]
+        )
+        for codec in ("json", "msgpack", "ndarray"):
+            for dedupe in DEDUPES:
+                try:
+                    seconds, (bytes_, _) = measure(
+                        lambda: loop.run_until_complete(
+                            charge._frame(payload, codec, "benchmark", dedupe)
+                        ),
+                        args.repeat,
+                    )
+                except ImportError as e:
+                    _f("warn", str(e))
+                    break
+                rows.append(
+                    [
+                        f"{size:.1f}",
+                        codec,
+                        dedupe,
+                        f"{len(bytes_) / 1024 / 1024:.1f}",
+                        f"{seconds / size * 1000:.1f}",
+                        f"{baseline / seconds:.1f}x",
+                    ]
+                )
+    _f(
+        "success",
+        "\n"
+        + tabulate(
+            rows,
+            headers=[
+                "payload MB",
+                "codec",
+                "dedupe",
+                "wire MB",
+                "CPU ms/MB",
+                "speedup",
+            ],
+            tablefmt="pretty",
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compares the vector storages of the embedded index backend: bytes per vector scanned at search time, search
+throughput, recall@k against exact float32 search and the drift of the top-1 similarity that the dupe check
+thresholds on.
+
+    python benchmarks/vector_storage.py --rows 100000 --dimension 1024
+    python benchmarks/vector_storage.py --embeddings corpus.npy --pq-m 64
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+from magnet.utils.data_classes import IndexConfig, MagnetConfig
+from magnet.utils.globals import _f
+from magnet.utils.index.embedded import EmbeddedDB
+from magnet.utils.index.quantize import STORAGES
+
+
+def embeddings(file: str, rows: int, dimension: int, seed: int = 2077):
+    if file:
+        x = np.load(file, mmap_mode="r")[:rows].astype(np.float32)
+    else:
+        rng = np.random.default_rng(seed)
+        centers = rng.normal(size=(max(rows // 100, 1), dimension)).astype(np.float32)
+        x = centers[rng.integers(len(centers), size=rows)] + 0.5 * rng.normal(
+            size=(rows, dimension)
+        ).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+async def run(storage: str, x: np.ndarray, q: np.ndarray, k: int, pq_m: int):
+    config = MagnetConfig(
+        host="localhost",
+        session="benchmark",
+        index=IndexConfig(
+            dimension=x.shape[1],
+            name=f"storage_{storage}",
+            backend="embedded",
+            path=tempfile.mkdtemp(),
+            exact_limit=0,
+            vector_storage=storage,
+            pq_m=pq_m,
+            options={"metric_type": "COSINE"},
+        ),
+    )
+    db = EmbeddedDB(config)
+    await db.on()
+    await db.create(overwrite=True)
+    await db.load()
+    start = time.perf_counter()
+    for i in range(0, len(x), 10000):
+        db.insert(
+            ["benchmark"] * len(x[i : i + 10000]),
+            [""] * len(x[i : i + 10000]),
+            x[i : i + 10000],
+        )
+    inserted = time.perf_counter() - start
+    start = time.perf_counter()
+    results = db.search(q, limit=k)
+    searched = time.perf_counter() - start
+    info = db.info()
+    await db.delete_index()
+    return info["bytes_per_vector"], len(x) / inserted, len(q) / searched, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embeddings", default=None)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pq-m", type=int, default=64)
+    args = parser.parse_args()
+
+    x = embeddings(args.embeddings, args.rows, args.dimension)
+    rng = np.random.default_rng(2077)
+    q = x[rng.choice(len(x), size=args.queries, replace=False)] + 0.05 * rng.normal(
+        size=(args.queries, x.shape[1])
+    ).astype(np.float32)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    exact = q @ x.T
+    truth = np.argsort(-exact, axis=1)[:, : args.k]
+    _f("info", f"{len(x)} vectors of dimension {x.shape[1]}, {len(q)} queries")
+
+    rows = []
+    for storage in STORAGES:
+        size, inserts, qps, results = asyncio.run(run(storage, x, q, args.k, args.pq_m))
+        recall = np.mean(
+            [len(set(t) & set(f)) / args.k for t, f in zip(truth, results.ids)]
+        )
+        drift = np.abs(
+            results.distances[:, 0] - exact[np.arange(len(q)), truth[:, 0]]
+        ).mean()
+        rows.append(
+            [
+                storage,
+                size,
+                f"{size * len(x) / 1024 / 1024:.1f}",
+                f"{inserts:.0f}",
+                f"{qps:.1f}",
+                f"{recall:.3f}",
+                f"{drift:.4f}",
+            ]
+        )
+    _f(
+        "success",
+        "\n"
+        + tabulate(
+            rows,
+            headers=[
+                "storage",
+                "bytes/vector",
+                "scanned MB",
+                "inserts/s",
+                "queries/s",
+                f"recall@{args.k}",
+                "top-1 drift",
+            ],
+            tablefmt="pretty",
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from magnet.base import Magnet
 from magnet.ic.field import Resonator
 from magnet.ize.memory import Memory
+from magnet.utils.data_classes import Payload
+from magnet.ic.codecs import decode
 import os
 
 config = {
@@ -20,31 +22,43 @@ config = {
         "dimension": int(os.environ.get("DIMENSION")),
         "model": os.environ.get("MODEL"),
         "name": os.environ.get("INDEX_NAME"),
+        "pool_processes": int(os.environ.get("POOL_PROCESSES", 0)),
+        "pool_threads": int(os.environ.get("POOL_THREADS", 1)),
+        "encoder": os.environ.get("ENCODER", "torch"),
         "options": {
-            'metric_type': os.environ.get("METRIC_TYPE"),
-            'index_type': os.environ.get("INDEX_TYPE"),
-            'params': {
+            "metric_type": os.environ.get("METRIC_TYPE"),
+            "index_type": os.environ.get("INDEX_TYPE"),
+            "params": {
                 "efConstruction": int(os.environ.get("EF_CONSTRUCTION")),
-                "M": int(os.environ.get("M"))
-            }
-        }
-    }
+                "M": int(os.environ.get("M")),
+            },
+        },
+    },
 }
 
+BATCH_SIZE = int(os.environ.get("BATCH_SIZE", 64))
+MAX_LATENCY = float(os.environ.get("MAX_LATENCY", 1.0))
+QUEUE_SIZE = int(os.environ.get("QUEUE_SIZE", 1024))
+
 magnet = Magnet(config)
 memory = Memory(magnet)
 reso = Resonator(magnet)
 
+
 async def main():
     await magnet.align()
     await memory.on()
-    await reso.on()
+    await reso.on(role="index", bandwidth=max(1000, QUEUE_SIZE))
+    await memory.start(
+        queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, max_latency=MAX_LATENCY, v=1
+    )
 
-    async def message_handler(payload, msg):
-        await memory.index(payload, msg, v=1)
+    async for msgs in reso.listen_batch(batch_size=BATCH_SIZE, max_latency=MAX_LATENCY):
+        for msg in msgs:
+            await memory.put(decode(msg.data, msg.headers, Payload), msg)
 
-    await reso.listen(cb=message_handler)
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(main())
\ No newline at end of file
+
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+ENCODING_HEADER = "Magnet-Encoding"
+DICTIONARY_HEADER = "Magnet-Dictionary"
+DICTIONARY_ID_HEADER = "Magnet-Dictionary-Id"
+ENCODINGS = ("zstd", "lz4")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires `pip install zstandard`")
+    return zstandard
+
+
+def _lz4():
+    try:
+        import lz4.frame
+    except ImportError:
+        raise ImportError("lz4 compression requires `pip install lz4`")
+    return lz4.frame
+
+
+class Compression:
+    """
+    Compresses message bodies for the wire and decompresses them on receipt, as configured by the `compression*`
+    fields of `MagnetConfig`.
+
+    Bodies smaller than `compression_threshold`, or that do not shrink, are sent as they are. Compressed bodies carry
+    a `Magnet-Encoding` header naming the algorithm and, when a zstd dictionary was used, `Magnet-Dictionary` and
+    `Magnet-Dictionary-Id` headers naming it and its id. Dictionaries are trained on sample payloads with `train` and
+    stored in the Magnet's KV under `dictionaries.<name>` (the latest) and `dictionaries.<name>.<id>`, from which
+    every receiver fetches and caches them by name and id on first use, so retraining a dictionary under the same
+    name does not break consumers holding the previous one.
+
+    Args:
+        magnet (Magnet): The Magnet whose config and KV are used.
+    """
+
+    def __init__(self, magnet):
+        self.magnet = magnet
+        self._dictionaries = {}
+        self._latest = {}
+        self._compressors = {}
+        self._decompressors = {}
+
+    async def dictionary(self, name: str, dict_id: int = None):
+        """
+        Returns the zstd dictionary stored under `name` with id `dict_id`, or the latest one stored under `name`,
+        fetching it from the KV once.
+        """
+        dict_id = self._latest.get(name) if dict_id is None else dict_id
+        if (name, dict_id) not in self._dictionaries:
+            try:
+                entry = await self.magnet.kv.get(
+                    f"dictionaries.{name}"
+                    if dict_id is None
+                    else f"dictionaries.{name}.{dict_id}"
+                )
+            except Exception:
+                if dict_id is None:
+                    raise
+                entry = await self.magnet.kv.get(f"dictionaries.{name}")
+            trained = _zstd().ZstdCompressionDict(entry.value)
+            if dict_id is not None and trained.dict_id() != dict_id:
+                raise ValueError(
+                    f"compression dictionary {name} with id {dict_id} is not in the KV"
+                )
+            if dict_id is None:
+                dict_id = self._latest[name] = trained.dict_id()
+            self._dictionaries[(name, dict_id)] = trained
+        return self._dictionaries[(name, dict_id)]
+
+    async def train(self, samples: list, name: str, size: int = 112640) -> int:
+        """
+        Trains a zstd dictionary of at most `size` bytes on sample message bodies and stores it in the KV.
+
+        Args:
+            samples (list[bytes]): Representative encoded payloads, a few hundred or more.
+            name (str): The name the dictionary is stored and referenced under.
+            size (int, optional): The dictionary size in bytes. Defaults to 112640.
+
+        Returns:
+            int: The dictionary id.
+        """
+        trained = _zstd().train_dictionary(size, list(samples))
+        await self.magnet.kv.put(
+            f"dictionaries.{name}.{trained.dict_id()}", trained.as_bytes()
+        )
+        await self.magnet.kv.put(f"dictionaries.{name}", trained.as_bytes())
+        self._dictionaries[(name, trained.dict_id())] = trained
+        self._latest[name] = trained.dict_id()
+        self._compressors = {k: v for k, v in self._compressors.items() if k[1] != name}
+        return trained.dict_id()
+
+    async def compress(self, data: bytes) -> tuple:
+        """
+        Compresses a message body with the configured algorithm.
+
+        Returns:
+            tuple: The body and the headers to add to the message, empty when the body is sent uncompressed.
+        """
+        config = self.magnet.config
+        if not config.compression or len(data) < config.compression_threshold:
+            return data, {}
+        headers = {ENCODING_HEADER: config.compression}
+        if config.compression == "zstd":
+            name = config.compression_dictionary
+            trained = await self.dictionary(name) if name else None
+            key = (
+                config.compression_level,
+                name,
+                trained.dict_id() if trained else None,
+            )
+            if key not in self._compressors:
+                self._compressors[key] = _zstd().ZstdCompressor(
+                    level=config.compression_level, dict_data=trained
+                )
+            compressed = self._compressors[key].compress(data)
+            if name:
+                headers[DICTIONARY_HEADER] = name
+                headers[DICTIONARY_ID_HEADER] = str(trained.dict_id())
+        elif config.compression == "lz4":
+            compressed = _lz4().compress(data)
+        else:
+            raise ValueError(
+                f"unknown compression {config.compression}, expected one of {ENCODINGS}"
+            )
+        if len(compressed) >= len(data):
+            return data, {}
+        return compressed, headers
+
+    async def decompress(self, data: bytes, headers: dict = None) -> bytes:
+        """
+        Decompresses a message body as described by its headers, returning it unchanged when it was not compressed.
+        """
+        encoding = (headers or {}).get(ENCODING_HEADER)
+        if not encoding:
+            return data
+        if encoding == "zstd":
+            name = headers.get(DICTIONARY_HEADER)
+            dict_id = (
+                int(headers[DICTIONARY_ID_HEADER])
+                if headers.get(DICTIONARY_ID_HEADER)
+                else None
+            )
+            key = (name, dict_id)
+            if key not in self._decompressors:
+                self._decompressors[key] = _zstd().ZstdDecompressor(
+                    dict_data=await self.dictionary(name, dict_id) if name else None
+                )
+            return self._decompressors[key].decompress(data)
+        if encoding == "lz4":
+            return _lz4().decompress(data)
+        raise ValueError(f"unknown encoding {encoding}, expected one of {ENCODINGS}")
+
+    async def inflate(self, msg):
+        """
+        Decompresses a received message in place, dropping its compression headers so that it decodes like any other.
+        """
+        if msg.headers and ENCODING_HEADER in msg.headers:
+            msg.data = await self.decompress(msg.data, msg.headers)
+            msg.headers.pop(ENCODING_HEADER, None)
+            msg.headers.pop(DICTIONARY_HEADER, None)
+            msg.headers.pop(DICTIONARY_ID_HEADER, None)
+        return msg
@@ -7,9 +7,26 @@ import asyncio
 
 from dataclasses import asdict
 
-from magnet.utils.data_classes import Status, Payload, InferenceParams, TrainParams, AcquireParams, FilePayload, GeneratedPayload, EmbeddingPayload, JobParams, Job, ProcessParams
+from magnet.utils.data_classes import (
+    Status,
+    Payload,
+    InferenceParams,
+    TrainParams,
+    AcquireParams,
+    FilePayload,
+    GeneratedPayload,
+    EmbeddingPayload,
+    JobParams,
+    Job,
+    ProcessParams,
+    MigrateParams,
+    PulseResult,
+)
 from magnet.ic.helpers import *
-from nats.errors import TimeoutError
+from magnet.ic.codecs import encode, canonical_key
+from magnet.ic.compression import Compression
+from magnet.ic.transfer import put_file
+from nats.errors import TimeoutError, NoRespondersError
 from nats.js.api import StreamConfig, ConsumerConfig
 from nats.js.errors import ServerError
 from nats.js.api import ObjectMeta
@@ -18,10 +35,12 @@ x = xxhash
 utc_now = datetime.now(timezone.utc)
 utc_timestamp = utc_now.timestamp()
 
+
 class Charge:
     def __init__(self, magnet):
         self.magnet = magnet
         self.help = RunHelpers(magnet)  # Use RunHelpers for run-related operations
+        self.compression = Compression(magnet)
 
     async def on(self, subject=None):
         category = self.magnet.config.category if not subject else subject
@@ -30,211 +49,678 @@ class Charge:
             remote_streams = [x.config.name for x in streams]
             remote_subjects = [x.config.subjects for x in streams]
             if self.magnet.config.stream_name not in remote_streams:
-                self.magnet.status_callback(Status(datetime.now(
-                    timezone.utc), 'fatal', f'{self.magnet.config.stream_name} not found, initialize with `Magnet.align()` first'))
+                self.magnet.status_callback(
+                    Status(
+                        datetime.now(timezone.utc),
+                        "fatal",
+                        f"{self.magnet.config.stream_name} not found, initialize with `Magnet.align()` first",
+                    )
+                )
                 return
             elif category not in sum(remote_subjects, []):
-                if category not in sum([x.config.subjects for x in streams if x.config.name == self.magnet.config.stream_name], []):
+                if category not in sum(
+                    [
+                        x.config.subjects
+                        for x in streams
+                        if x.config.name == self.magnet.config.stream_name
+                    ],
+                    [],
+                ):
                     try:
                         subjects = sum(
-                            [x.config.subjects for x in streams if x.config.name == self.magnet.config.stream_name], [])
+                            [
+                                x.config.subjects
+                                for x in streams
+                                if x.config.name == self.magnet.config.stream_name
+                            ],
+                            [],
+                        )
                         subjects.append(category)
-                        await self.magnet.js.update_stream(StreamConfig(
-                            name=self.magnet.config.stream_name,
-                            subjects=subjects
-                        ))
-                        self.magnet.status_callback(Status(datetime.now(
-                            timezone.utc), "success", f'created [{category}] on 🛰️ stream: {self.magnet.config.stream_name}'))
+                        await self.magnet.js.update_stream(
+                            StreamConfig(
+                                name=self.magnet.config.stream_name, subjects=subjects
+                            )
+                        )
+                        self.magnet.status_callback(
+                            Status(
+                                datetime.now(timezone.utc),
+                                "success",
+                                f"created [{category}] on 🛰️ stream: {self.magnet.config.stream_name}",
+                            )
+                        )
                     except ServerError as e:
                         print(e)
-                        self.magnet.status_callback(Status(datetime.now(
-                            timezone.utc), 'fatal', f"couldn't create {self.magnet.config.stream_name} on {self.magnet.config.host}, ensure your `category` is set"))
+                        self.magnet.status_callback(
+                            Status(
+                                datetime.now(timezone.utc),
+                                "fatal",
+                                f"couldn't create {self.magnet.config.stream_name} on {self.magnet.config.host}, ensure your `category` is set",
+                            )
+                        )
         except TimeoutError:
-            self.magnet.status_callback(Status(
-                datetime.now(timezone.utc), 'fatal', f'could not connect to {self.magnet.config.host}'))
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "fatal",
+                    f"could not connect to {self.magnet.config.host}",
+                )
+            )
 
     async def off(self):
         await self.magnet.nc.drain()
         await self.magnet.nc.close()
         self.magnet.status_callback(
-            Status(datetime.now(timezone.utc), 'warn', f'disconnected from {self.magnet.config.host}'))
+            Status(
+                datetime.now(timezone.utc),
+                "warn",
+                f"disconnected from {self.magnet.config.host}",
+            )
+        )
 
-    async def pulse(self, payload: Payload | FilePayload | GeneratedPayload | EmbeddingPayload | JobParams = None, subject: str = None, stream: str = None, v=False):
+    async def pulse(
+        self,
+        payload: Payload
+        | FilePayload
+        | GeneratedPayload
+        | EmbeddingPayload
+        | JobParams = None,
+        subject: str = None,
+        stream: str = None,
+        codec: str = None,
+        dedupe: str = "",
+        progress=None,
+        v=False,
+    ):
         try:
             if isinstance(payload, FilePayload):
-                payload_data_bytes = payload.data
                 bucket_name = await self.help._get_object_store_name(payload._id)
-                meta = ObjectMeta(name=payload._id, headers={
-                    "ext": payload.original_filename.split('.')[-1]
-                })
                 bucket = await self.magnet.js.object_store(bucket_name)
-                await bucket.put(payload._id, payload_data_bytes, meta=meta)
+                if payload.path:
+                    info = await put_file(
+                        bucket,
+                        payload._id,
+                        payload.path,
+                        headers={"ext": payload.original_filename.split(".")[-1]},
+                        progress=progress,
+                    )
+                elif payload.data is None:
+                    raise ValueError("a FilePayload needs either `data` or a `path`")
+                else:
+                    payload_data_bytes = payload.data
+                    meta = ObjectMeta(
+                        name=payload._id,
+                        headers={"ext": payload.original_filename.split(".")[-1]},
+                    )
+                    info = await bucket.put(payload._id, payload_data_bytes, meta=meta)
                 if v:
-                    self.magnet.status_callback(Status(datetime.now(
-                        timezone.utc), 'success', f'uploaded to object store in bucket {bucket_name} as {payload._id}'))
-            elif isinstance(payload, Payload):
-                bytes_ = json.dumps(asdict(payload), separators=(
-                    ', ', ':')).encode('utf-8')
-                _hash = x.xxh64(bytes_).hexdigest()
+                    self.magnet.status_callback(
+                        Status(
+                            datetime.now(timezone.utc),
+                            "success",
+                            f"uploaded to object store in bucket {bucket_name} as {payload._id}",
+                        )
+                    )
+                return info
+            elif isinstance(payload, (Payload, GeneratedPayload, EmbeddingPayload)):
                 subject_name = subject if subject else self.magnet.config.category
+                bytes_, headers = await self._frame(
+                    payload, codec, subject_name, dedupe
+                )
                 msg = await self.magnet.js.publish(
-                    subject=subject_name, payload=bytes_, stream=stream, headers={
-                        "Nats-Msg-Id": _hash
-                    }
+                    subject=subject_name, payload=bytes_, stream=stream, headers=headers
                 )
                 if v:
-                    self.magnet.status_callback(Status(datetime.now(
-                        timezone.utc), 'success', f'pulsed {payload._id} to {subject_name} on {self.magnet.config.stream_name}'))
+                    self.magnet.status_callback(
+                        Status(
+                            datetime.now(timezone.utc),
+                            "success",
+                            f"pulsed {getattr(payload, '_id', type(payload).__name__)} to {subject_name} on {self.magnet.config.stream_name}",
+                        )
+                    )
                 _ts = datetime.now(timezone.utc)
                 msg.ts = _ts
                 return msg
         except Exception as e:
-            self.magnet.status_callback(Status(datetime.now(
-                timezone.utc), 'fatal', f'could not pulse data to {self.magnet.config.host}\n{e}'))
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "fatal",
+                    f"could not pulse data to {self.magnet.config.host}\n{e}",
+                )
+            )
             return
 
-    async def excite(self, job_type: str, params: ProcessParams | InferenceParams | TrainParams | AcquireParams):
+    async def _frame(
+        self,
+        payload: Payload | GeneratedPayload | EmbeddingPayload,
+        codec: str = None,
+        subject: str = None,
+        dedupe: str = "",
+    ):
+        dedupe = self.magnet.config.dedupe if dedupe == "" else dedupe
+        hasher = x.xxh64() if dedupe == "content" else None
+        bytes_, headers = encode(payload, codec or self.magnet.config.codec, hasher)
+        if dedupe == "content":
+            headers["Nats-Msg-Id"] = hasher.hexdigest()
+        elif dedupe == "id":
+            if getattr(payload, "_id", None) is None:
+                raise ValueError(
+                    f"{type(payload).__name__} has no `_id` to deduplicate by"
+                )
+            headers["Nats-Msg-Id"] = f"{subject}:{payload._id}"
+        elif dedupe == "key":
+            headers["Nats-Msg-Id"] = x.xxh64(
+                canonical_key(payload, subject)
+            ).hexdigest()
+        elif dedupe is not None:
+            raise ValueError(
+                f"unknown dedupe {dedupe}, expected 'content', 'id', 'key' or None"
+            )
+        bytes_, compressed = await self.compression.compress(bytes_)
+        headers.update(compressed)
+        max_payload = getattr(self.magnet.nc, "max_payload", None)
+        if max_payload and len(bytes_) > max_payload:
+            raise ValueError(
+                f"payload is {len(bytes_)} bytes on the wire, over the server max payload of {max_payload}; enable compression or send it as a FilePayload"
+            )
+        return bytes_, headers
+
+    async def train_dictionary(
+        self, payloads, name: str, size: int = 112640, codec: str = None
+    ):
+        """
+        Trains a zstd compression dictionary on sample payloads and stores it in the KV under `name`. Set
+        `MagnetConfig.compression_dictionary` to the name to compress with it; receivers fetch it by the name and id
+        in each message's `Magnet-Dictionary` and `Magnet-Dictionary-Id` headers, so earlier dictionaries trained
+        under the same name stay readable.
+
+        Args:
+            payloads (Iterable[Payload]): Representative payloads, a few hundred or more.
+            name (str): The dictionary name.
+            size (int, optional): The dictionary size in bytes. Defaults to 112640.
+            codec (str, optional): The wire codec the samples are encoded with. Defaults to `MagnetConfig.codec`.
+
+        Returns:
+            int: The dictionary id.
+        """
+        samples = [
+            encode(payload, codec or self.magnet.config.codec)[0]
+            for payload in payloads
+        ]
+        dict_id = await self.compression.train(samples, name, size=size)
+        self.magnet.status_callback(
+            Status(
+                datetime.now(timezone.utc),
+                "success",
+                f"trained compression dictionary {name} ({dict_id}) on {len(samples)} payloads",
+            )
+        )
+        return dict_id
+
+    async def pulse_many(
+        self,
+        payloads,
+        subject: str = None,
+        stream: str = None,
+        window: int = 256,
+        retries: int = 3,
+        timeout: float = 5.0,
+        codec: str = None,
+        dedupe: str = "",
+        v=False,
+    ):
+        """
+        Publishes payloads with up to `window` publishes in flight, gathering their acks concurrently instead of
+        waiting one JetStream round trip per message.
+
+        A publish that times out or finds no responders is retried up to `retries` times with the same bytes and
+        `Nats-Msg-Id`, so a message whose ack was lost is deduplicated by the stream rather than stored twice.
+        The id is derived per `dedupe`: `content` hashes the encoded bytes while they are written, `id` uses the
+        subject and the payload's `_id`, `key` hashes the subject and the payload's scalar fields only, and None
+        sends no id.
+
+        Args:
+            payloads (Iterable[Payload]): The payloads to publish; a generator is consumed as the window allows.
+            subject (str, optional): The subject to publish to. Defaults to the configured category.
+            stream (str, optional): The stream expected to hold the subject.
+            window (int, optional): The most publishes awaiting an ack at once. Defaults to 256.
+            retries (int, optional): The retries per payload after the first attempt. Defaults to 3.
+            timeout (float, optional): The seconds to wait for each ack. Defaults to 5.0.
+            codec (str, optional): The wire codec, one of `json`, `msgpack` or `ndarray`. Defaults to `MagnetConfig.codec`.
+            dedupe (str, optional): How the `Nats-Msg-Id` is derived. Defaults to `MagnetConfig.dedupe`.
+            v (bool, optional): Verbose logging.
+
+        Returns:
+            list[PulseResult]: One result per payload, in the order the payloads were given.
+        """
+        subject_name = subject if subject else self.magnet.config.category
+        gate = asyncio.Semaphore(window)
+        results = []
+
+        async def publish(i, payload):
+            attempt, _id = 0, getattr(payload, "_id", str(i))
+            try:
+                bytes_, headers = await self._frame(
+                    payload, codec, subject_name, dedupe
+                )
+                for attempt in range(1, retries + 2):
+                    try:
+                        msg = await self.magnet.js.publish(
+                            subject=subject_name,
+                            payload=bytes_,
+                            stream=stream,
+                            timeout=timeout,
+                            headers=headers,
+                        )
+                        msg.ts = datetime.now(timezone.utc)
+                        results[i] = PulseResult(_id, ack=msg, attempts=attempt)
+                        return
+                    except (TimeoutError, NoRespondersError) as e:
+                        results[i] = PulseResult(
+                            _id, error=str(e) or type(e).__name__, attempts=attempt
+                        )
+                        if attempt <= retries:
+                            await asyncio.sleep(min(0.1 * 2 ** (attempt - 1), 2.0))
+            except Exception as e:
+                results[i] = PulseResult(
+                    _id, error=str(e) or type(e).__name__, attempts=attempt
+                )
+            finally:
+                gate.release()
+
+        tasks = set()
+        for i, payload in enumerate(payloads):
+            await gate.acquire()
+            results.append(None)
+            task = asyncio.create_task(publish(i, payload))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+        failed = [r for r in results if r.ack is None]
+        for result in failed:
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "fatal",
+                    f"could not pulse {result._id} to {subject_name} after {result.attempts} attempts\n{result.error}",
+                )
+            )
+        if v:
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "success",
+                    f"pulsed {len(results) - len(failed)}/{len(results)} payloads to {subject_name} on {self.magnet.config.stream_name}",
+                )
+            )
+        return results
+
+    async def pulse_files(
+        self, payloads: list, concurrency: int = 4, progress=None, v=False
+    ):
+        """
+        Uploads file payloads to the object store concurrently, at most `concurrency` at a time. Payloads with a
+        `path` are streamed from disk in chunks with their SHA-256 digest verified, so memory stays bounded by one
+        chunk per upload whatever the file sizes.
+
+        Args:
+            payloads (list[FilePayload]): The files to upload.
+            concurrency (int, optional): The most uploads in flight. Defaults to 4.
+            progress (callable, optional): Called with the object name, the bytes sent and the file size after every chunk.
+            v (bool, optional): Verbose logging.
+
+        Returns:
+            list: The ObjectInfo of every upload, None where it failed.
+        """
+        gate = asyncio.Semaphore(concurrency)
+
+        async def upload(payload):
+            async with gate:
+                return await self.pulse(payload, progress=progress, v=v)
+
+        return await asyncio.gather(*[upload(payload) for payload in payloads])
+
+    async def excite(
+        self,
+        job_type: str,
+        params: ProcessParams
+        | InferenceParams
+        | TrainParams
+        | AcquireParams
+        | MigrateParams,
+    ):
         try:
             job_params = params
             job_id = f"{job_type}.{self.magnet.config.session}.{uuid.uuid4().hex[:8]}"
             job = Job(params=job_params, _type=job_type, _id=job_id)
-            await self.magnet.jobs_kv.put(key=job._id, value=json.dumps(asdict(job)).encode('utf-8'))
+            await self.magnet.jobs_kv.put(
+                key=job._id, value=json.dumps(asdict(job)).encode("utf-8")
+            )
             self.magnet.status_callback(
-                Status(datetime.now(timezone.utc), 'info', f'Created {job_type} job {job._id}')
+                Status(
+                    datetime.now(timezone.utc),
+                    "info",
+                    f"Created {job_type} job {job._id}",
+                )
             )
             return job
         except Exception as e:
             self.magnet.status_callback(
-                Status(datetime.now(timezone.utc), 'fatal', f'Failed to create {job_type} job\n{e}')
+                Status(
+                    datetime.now(timezone.utc),
+                    "fatal",
+                    f"Failed to create {job_type} job\n{e}",
+                )
             )
             return None
 
     async def emp(self, name=None):
         if name and name == self.magnet.config.stream_name:
             await self.magnet.js.delete_stream(name=self.magnet.config.stream_name)
-            self.magnet.status_callback(Status(
-                datetime.now(timezone.utc), 'warn', f'{self.magnet.config.stream_name} stream deleted'))
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "warn",
+                    f"{self.magnet.config.stream_name} stream deleted",
+                )
+            )
         else:
-            self.magnet.status_callback(Status(datetime.now(
-                timezone.utc), 'fatal', "name doesn't match the stream or stream doesn't exist"))
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "fatal",
+                    "name doesn't match the stream or stream doesn't exist",
+                )
+            )
 
     async def reset(self, name=None):
         if name and name == self.magnet.config.category:
-            await self.magnet.js.purge_stream(name=self.magnet.config.stream_name, subject=self.magnet.config.category)
-            self.magnet.status_callback(Status(
-                datetime.now(timezone.utc), 'warn', f'{self.magnet.config.category} category deleted'))
+            await self.magnet.js.purge_stream(
+                name=self.magnet.config.stream_name, subject=self.magnet.config.category
+            )
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "warn",
+                    f"{self.magnet.config.category} category deleted",
+                )
+            )
         else:
-            self.magnet.status_callback(Status(datetime.now(
-                timezone.utc), 'fatal', "name doesn't match the stream category or category doesn't exist"))
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "fatal",
+                    "name doesn't match the stream category or category doesn't exist",
+                )
+            )
+
 
 class Resonator:
     def __init__(self, magnet):
         self.magnet = magnet
-        self.run_helpers = RunHelpers(magnet)  # Use RunHelpers for run-related operations
+        self.run_helpers = RunHelpers(
+            magnet
+        )  # Use RunHelpers for run-related operations
+        self.compression = Compression(magnet)
         self.node = None
         self.durable = None
         self.consumer_config = None
         self.sub = None
 
-    async def on(self, role: str, local: bool = False, bandwidth: int = 1000, obj=False, subject=None):
+    async def on(
+        self,
+        role: str,
+        local: bool = False,
+        bandwidth: int = 1000,
+        obj=False,
+        subject=None,
+    ):
         try:
             subject_name = self.magnet.config.category if not subject else subject
             streams = await self.magnet.js.streams_info()
             remote_streams = [x.config.name for x in streams]
             remote_subjects = [x.config.subjects for x in streams]
             if self.magnet.config.stream_name not in remote_streams:
-                self.magnet.status_callback(Status(datetime.now(
-                    timezone.utc), 'fatal', f'{self.magnet.config.stream_name} not found, initialize with `Magnet.align()` first'))
+                self.magnet.status_callback(
+                    Status(
+                        datetime.now(timezone.utc),
+                        "fatal",
+                        f"{self.magnet.config.stream_name} not found, initialize with `Magnet.align()` first",
+                    )
+                )
                 return
             elif subject_name not in sum(remote_subjects, []):
-                if subject_name not in sum([x.config.subjects for x in streams if x.config.name == self.magnet.config.stream_name], []):
+                if subject_name not in sum(
+                    [
+                        x.config.subjects
+                        for x in streams
+                        if x.config.name == self.magnet.config.stream_name
+                    ],
+                    [],
+                ):
                     try:
                         subjects = sum(
-                            [x.config.subjects for x in streams if x.config.name == self.magnet.config.stream_name], [])
+                            [
+                                x.config.subjects
+                                for x in streams
+                                if x.config.name == self.magnet.config.stream_name
+                            ],
+                            [],
+                        )
                         subjects.append(subject_name)
-                        await self.magnet.js.update_stream(StreamConfig(
-                            name=self.magnet.config.stream_name,
-                            subjects=subjects
-                        ))
-                        self.magnet.status_callback(Status(datetime.now(
-                            timezone.utc), "success", f'created [{subject_name}] on\n🛰️ stream: {self.magnet.config.stream_name}'))
+                        await self.magnet.js.update_stream(
+                            StreamConfig(
+                                name=self.magnet.config.stream_name, subjects=subjects
+                            )
+                        )
+                        self.magnet.status_callback(
+                            Status(
+                                datetime.now(timezone.utc),
+                                "success",
+                                f"created [{subject_name}] on\n🛰️ stream: {self.magnet.config.stream_name}",
+                            )
+                        )
                     except ServerError as e:
                         print(e)
-                        self.magnet.status_callback(Status(datetime.now(
-                            timezone.utc), 'fatal', f"couldn't create {self.magnet.config.stream_name} on {self.magnet.config.host}, ensure your `category` is set"))
+                        self.magnet.status_callback(
+                            Status(
+                                datetime.now(timezone.utc),
+                                "fatal",
+                                f"couldn't create {self.magnet.config.stream_name} on {self.magnet.config.host}, ensure your `category` is set",
+                            )
+                        )
         except TimeoutError:
-            self.magnet.status_callback(Status(
-                datetime.now(timezone.utc), 'fatal', f'could not connect to {self.magnet.config.host}'))
-        self.node = f'{platform.node()}_{xxhash.xxh64(platform.node(), seed=int(datetime.now(timezone.utc).timestamp())).hexdigest()}' if local else platform.node()
-        self.durable = f'{self.node}_{role}'  # Include the role in the durable name for clarity
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "fatal",
+                    f"could not connect to {self.magnet.config.host}",
+                )
+            )
+        self.node = (
+            f"{platform.node()}_{xxhash.xxh64(platform.node(), seed=int(datetime.now(timezone.utc).timestamp())).hexdigest()}"
+            if local
+            else platform.node()
+        )
+        self.durable = (
+            f"{self.node}_{role}"  # Include the role in the durable name for clarity
+        )
         self.consumer_config = ConsumerConfig(
-            ack_policy="explicit",
-            max_ack_pending=bandwidth,
-            ack_wait=3600
+            ack_policy="explicit", max_ack_pending=bandwidth, ack_wait=3600
+        )
+        self.magnet.status_callback(
+            Status(
+                datetime.now(timezone.utc),
+                "wait",
+                f'connecting to {self.magnet.config.host.split("@")[1]} for role {role}',
+            )
         )
-        self.magnet.status_callback(Status(datetime.now(
-            timezone.utc), 'wait', f'connecting to {self.magnet.config.host.split("@")[1]} for role {role}'))
         try:
             if obj:
                 self.sub = await self.magnet.os.watch(include_history=False)
-                self.magnet.status_callback(Status(datetime.now(
-                    timezone.utc), 'info', f'subscribed to object store: {self.magnet.config.os_name} as {self.node}')
+                self.magnet.status_callback(
+                    Status(
+                        datetime.now(timezone.utc),
+                        "info",
+                        f"subscribed to object store: {self.magnet.config.os_name} as {self.node}",
+                    )
                 )
             else:
                 self.magnet.js.__dict__
                 self.sub = await self.magnet.js.pull_subscribe(
-                    subject=subject_name,
-                    config=self.consumer_config
+                    subject=subject_name, config=self.consumer_config
+                )
+                self.magnet.status_callback(
+                    Status(
+                        datetime.now(timezone.utc),
+                        "info",
+                        f"joined worker queue: {self.magnet.config.session} as {self.node} for role {role}",
+                    )
                 )
-                self.magnet.status_callback(Status(datetime.now(
-                    timezone.utc), 'info', f'joined worker queue: {self.magnet.config.session} as {self.node} for role {role}'))
         except Exception as e:
             self.magnet.status_callback(
-                Status(datetime.now(timezone.utc), 'fatal', str(e)))
+                Status(datetime.now(timezone.utc), "fatal", str(e))
+            )
             return
 
+    async def _inflate(self, msg) -> bool:
+        """
+        Decompresses a received message in place. A message that cannot be decompressed is logged and, rather than
+        ending the listener, handed back to the server: nak'd for redelivery when fetching its dictionary timed out,
+        terminated otherwise.
+        """
+        try:
+            await self.compression.inflate(msg)
+            return True
+        except Exception as e:
+            self.magnet.status_callback(
+                Status(
+                    datetime.now(timezone.utc),
+                    "fatal",
+                    f"could not decompress {msg.subject}: {e}",
+                )
+            )
+            try:
+                await (msg.nak() if isinstance(e, TimeoutError) else msg.term())
+            except Exception as e:
+                self.magnet.status_callback(
+                    Status(
+                        datetime.now(timezone.utc),
+                        "warn",
+                        f"could not settle {msg.subject}: {e}",
+                    )
+                )
+            return False
+
     async def listen(self, batch_size=None, v=False):
         try:
             # Check if subscription is initialized
             if self.sub is None:
                 self.magnet.status_callback(
-                    Status(datetime.now(timezone.utc), 'fatal', 'No subscriber initialized'))
+                    Status(
+                        datetime.now(timezone.utc), "fatal", "No subscriber initialized"
+                    )
+                )
                 return
-            
+
             while True:
                 try:
                     # Fetch a batch of messages (replace 10 with the desired batch size)
                     if batch_size:
                         msgs = await self.sub.fetch(batch_size)
                     for msg in msgs:
+                        if not await self._inflate(msg):
+                            continue
                         if v:
-                            self.magnet.status_callback(Status(datetime.now(
-                                timezone.utc), 'info', f'received {msg.subject}'))
+                            self.magnet.status_callback(
+                                Status(
+                                    datetime.now(timezone.utc),
+                                    "info",
+                                    f"received {msg.subject}",
+                                )
+                            )
                         yield msg
 
                 except TimeoutError as e:
-                    self.magnet.status_callback(Status(datetime.now(
-                        timezone.utc), 'warn', 'No new messages.'))
+                    self.magnet.status_callback(
+                        Status(datetime.now(timezone.utc), "warn", "No new messages.")
+                    )
 
         except Exception as e:
             self.magnet.status_callback(
-                Status(datetime.now(timezone.utc), 'fatal', f'Error in listen method: {e}'))
+                Status(
+                    datetime.now(timezone.utc), "fatal", f"Error in listen method: {e}"
+                )
+            )
             return
 
+    async def listen_batch(
+        self, batch_size: int = 64, max_latency: float = 1.0, v=False
+    ):
+        """
+        Yields micro-batches of messages, each holding at most `batch_size` messages and waiting at most `max_latency` seconds to fill.
+
+        Args:
+            batch_size (int): The upper bound on messages per batch.
+            max_latency (float): The longest time in seconds a partially filled batch is held before it is yielded.
+            v (bool): Verbose logging.
+        """
+        if self.sub is None:
+            self.magnet.status_callback(
+                Status(datetime.now(timezone.utc), "fatal", "No subscriber initialized")
+            )
+            return
+        while True:
+            try:
+                msgs = await self.sub.fetch(batch_size, timeout=max_latency)
+            except TimeoutError:
+                continue
+            except Exception as e:
+                self.magnet.status_callback(
+                    Status(
+                        datetime.now(timezone.utc),
+                        "fatal",
+                        f"Error in listen_batch method: {e}",
+                    )
+                )
+                return
+            msgs = [msg for msg in msgs if await self._inflate(msg)]
+            if not msgs:
+                continue
+            if v:
+                self.magnet.status_callback(
+                    Status(
+                        datetime.now(timezone.utc),
+                        "info",
+                        f"received batch of {len(msgs)}",
+                    )
+                )
+            yield msgs
 
     async def worker(self, role=None):
         await self.on(role=role)  # Ensure the resonator is set up for the specific role
-        self.magnet.status_callback(Status(datetime.now(
-            timezone.utc), "info", f'processing jobs for role [{role}] from [{self.magnet.config.kv_name}] on\n🛰️ object store: {self.magnet.config.os_name}'))
+        self.magnet.status_callback(
+            Status(
+                datetime.now(timezone.utc),
+                "info",
+                f"processing jobs for role [{role}] from [{self.magnet.config.kv_name}] on\n🛰️ object store: {self.magnet.config.os_name}",
+            )
+        )
         try:
             kv_store = self.magnet.jobs_kv  # Use the jobs KV store for job retrieval
             keys = await kv_store.keys()
             for key in keys:
                 _job = await kv_store.get(key)
-                job_data = json.loads(_job.value.decode('utf-8'))
+                job_data = json.loads(_job.value.decode("utf-8"))
                 job = Job(
                     # make params the dataclass through role/type
-                    job_data['params'], job_data['_type'], job_data['_id'], job_data['_isClaimed'])
+                    job_data["params"],
+                    job_data["_type"],
+                    job_data["_id"],
+                    job_data["_isClaimed"],
+                )
 
                 if not job._isClaimed and job._type == role:
                     # Claim the job first
@@ -244,7 +730,9 @@ class Resonator:
                         _job=job,
                         start_time=datetime.now(timezone.utc).isoformat(),
                     )
-                    run = await self.run_helpers._claimant(run, claim=True, status="in_progress")
+                    run = await self.run_helpers._claimant(
+                        run, claim=True, status="in_progress"
+                    )
 
                     # Process the run
                     await self.handle_run(run)
@@ -252,23 +740,29 @@ class Resonator:
                     pass
         except Exception as e:
             self.magnet.status_callback(
-                Status(datetime.now(timezone.utc), 'fatal', f'invalid JSON\n{e}'))
+                Status(datetime.now(timezone.utc), "fatal", f"invalid JSON\n{e}")
+            )
 
     async def handle_run(self, run: Run):
-        self.magnet.status_callback(Status(datetime.now(
-            timezone.utc), "info", f"Handling run of type: {run._type}"))
+        self.magnet.status_callback(
+            Status(
+                datetime.now(timezone.utc), "info", f"Handling run of type: {run._type}"
+            )
+        )
 
         try:
             # Log the start of the run
-            self.magnet.status_callback(Status(datetime.now(
-                timezone.utc), "info", f"Starting run {run._id}"))
+            self.magnet.status_callback(
+                Status(datetime.now(timezone.utc), "info", f"Starting run {run._id}")
+            )
 
             # Find the appropriate handler for the run type
             run_helpers = {
-                'process': self.run_helpers.process,
-                'inference': self.run_helpers.inference,
-                'train': self.run_helpers.train,
-                'acquire': self.run_helpers.acquire
+                "process": self.run_helpers.process,
+                "inference": self.run_helpers.inference,
+                "train": self.run_helpers.train,
+                "acquire": self.run_helpers.acquire,
+                "migrate": self.run_helpers.migrate,
             }
 
             run_handler = run_helpers.get(run._type)
@@ -277,14 +771,22 @@ class Resonator:
                 await run_handler(run)
             else:
                 self.magnet.status_callback(
-                    Status(datetime.now(timezone.utc), "warn", f"Unknown run type: {run._type}"))
+                    Status(
+                        datetime.now(timezone.utc),
+                        "warn",
+                        f"Unknown run type: {run._type}",
+                    )
+                )
                 run.status = "failed"
 
         except Exception as e:
             run.status = "failed"
             run.end_time = datetime.now(timezone.utc)
             self.magnet.status_callback(
-                Status(datetime.now(timezone.utc), "fatal", f"Run {run._id} failed: {e}"))
+                Status(
+                    datetime.now(timezone.utc), "fatal", f"Run {run._id} failed: {e}"
+                )
+            )
 
         finally:
             # Store or log the run result here if needed
@@ -295,26 +797,55 @@ class Resonator:
         run_dict = asdict(run)
 
         # Ensure datetime objects are converted to ISO format strings
-        run_dict['start_time'] = run_dict.get('start_time')
-        run_dict['end_time'] = run_dict.get('end_time')
+        run_dict["start_time"] = run_dict.get("start_time")
+        run_dict["end_time"] = run_dict.get("end_time")
 
         try:
-            await self.magnet.runs_kv.put(key=run._id, value=json.dumps(run_dict).encode('utf-8'))
+            await self.magnet.runs_kv.put(
+                key=run._id, value=json.dumps(run_dict).encode("utf-8")
+            )
             self.magnet.status_callback(
-                Status(datetime.now(timezone.utc), "info", f"Run {run._id} stored successfully"))
+                Status(
+                    datetime.now(timezone.utc),
+                    "info",
+                    f"Run {run._id} stored successfully",
+                )
+            )
         except Exception as e:
             self.magnet.status_callback(
-                Status(datetime.now(timezone.utc), "warn", f"Failed to store run {run._id}: {e}"))
+                Status(
+                    datetime.now(timezone.utc),
+                    "warn",
+                    f"Failed to store run {run._id}: {e}",
+                )
+            )
 
     async def info(self):
-        jsm = await self.magnet.js.consumer_info(stream=self.magnet.config.stream_name, consumer=self.magnet.session)
-        self.magnet.status_callback(Status(datetime.now(
-            timezone.utc), 'info', json.dumps(jsm.config.__dict__, indent=2)))
+        jsm = await self.magnet.js.consumer_info(
+            stream=self.magnet.config.stream_name, consumer=self.magnet.session
+        )
+        self.magnet.status_callback(
+            Status(
+                datetime.now(timezone.utc),
+                "info",
+                json.dumps(jsm.config.__dict__, indent=2),
+            )
+        )
 
     async def off(self):
         await self.sub.unsubscribe()
-        self.magnet.status_callback(Status(datetime.now(
-            timezone.utc), 'warn', f'unsubscribed from {self.magnet.config.stream_name}'))
+        self.magnet.status_callback(
+            Status(
+                datetime.now(timezone.utc),
+                "warn",
+                f"unsubscribed from {self.magnet.config.stream_name}",
+            )
+        )
         await self.magnet.nc.drain()
-        self.magnet.status_callback(Status(datetime.now(
-            timezone.utc), 'warn', f'safe to disconnect from {self.magnet.config.host.split("@")[1]}'))
+        self.magnet.status_callback(
+            Status(
+                datetime.now(timezone.utc),
+                "warn",
+                f'safe to disconnect from {self.magnet.config.host.split("@")[1]}',
+            )
+        )
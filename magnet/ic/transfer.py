@@ -0,0 +1,139 @@
+import os
+import base64
+import asyncio
+import hashlib
+from nats.js.api import ObjectMeta, ObjectMetaOptions
+
+CHUNK_SIZE = 128 * 1024
+DIGEST_PREFIX = "SHA-256="
+
+
+def _digest(sha) -> str:
+    return DIGEST_PREFIX + base64.urlsafe_b64encode(sha.digest()).decode()
+
+
+class _Progress:
+    """
+    Counts the bytes moved through a file wrapper, hashes them and reports progress on the event loop.
+    """
+
+    def __init__(self, name: str, total: int, progress, loop):
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.sha = hashlib.sha256()
+        self.progress = progress
+        self.loop = loop
+
+    def update(self, chunk):
+        self.sha.update(chunk)
+        self.done += len(chunk)
+        if self.progress:
+            self.loop.call_soon_threadsafe(
+                self.progress, self.name, self.done, self.total
+            )
+
+
+class ChunkReader(_Progress):
+    """
+    A file-like reader the object store pulls chunks from with `readinto`, hashing every chunk as it is read.
+    """
+
+    def __init__(self, file, name: str, total: int, progress=None, loop=None):
+        super().__init__(name, total, progress, loop)
+        self.file = file
+
+    def readinto(self, buffer) -> int:
+        n = self.file.readinto(buffer)
+        if n:
+            self.update(memoryview(buffer)[:n])
+        return n or 0
+
+
+class ChunkWriter(_Progress):
+    """
+    A file-like writer the object store pushes chunks to with `write`, hashing every chunk as it is written.
+    """
+
+    def __init__(self, file, name: str, total: int, progress=None, loop=None):
+        super().__init__(name, total, progress, loop)
+        self.file = file
+
+    def write(self, chunk) -> int:
+        self.update(chunk)
+        return self.file.write(chunk)
+
+
+async def put_file(
+    store,
+    name: str,
+    path: str,
+    headers: dict = None,
+    chunk_size: int = CHUNK_SIZE,
+    progress=None,
+):
+    """
+    Streams a local file into an object store `chunk_size` bytes at a time, so memory stays bounded by one chunk
+    whatever the file size, and checks that the SHA-256 digest the store recorded matches the bytes read.
+
+    Args:
+        store (ObjectStore): The object store bucket.
+        name (str): The object name.
+        path (str): The local file.
+        headers (dict, optional): Object headers, e.g. `{"ext": "csv"}`.
+        chunk_size (int, optional): The bytes per chunk. Defaults to 128 KiB.
+        progress (callable, optional): Called on the event loop with the object name, the bytes sent and the file size after every chunk.
+
+    Returns:
+        ObjectInfo: The stored object's info.
+    """
+    loop = asyncio.get_running_loop()
+    meta = ObjectMeta(
+        name=name, headers=headers, options=ObjectMetaOptions(max_chunk_size=chunk_size)
+    )
+    with open(os.path.expanduser(path), "rb") as file:
+        reader = ChunkReader(
+            file, name, os.fstat(file.fileno()).st_size, progress, loop
+        )
+        info = await store.put(name, reader, meta=meta)
+    if info.digest and info.digest != _digest(reader.sha):
+        raise ValueError(
+            f"digest mismatch uploading {name}: stored {info.digest}, read {_digest(reader.sha)}"
+        )
+    return info
+
+
+async def get_file(store, name: str, path: str, progress=None):
+    """
+    Streams an object from an object store into a local file chunk by chunk and verifies its SHA-256 digest. The
+    object is written to `<path>.part` and only renamed to `path` once its digest matched.
+
+    Args:
+        store (ObjectStore): The object store bucket.
+        name (str): The object name.
+        path (str): The local file.
+        progress (callable, optional): Called on the event loop with the object name, the bytes received and the object size after every chunk.
+
+    Returns:
+        ObjectInfo: The downloaded object's info.
+    """
+    loop = asyncio.get_running_loop()
+    path = os.path.expanduser(path)
+    partial = f"{path}.part"
+    info = await store.get_info(name)
+    try:
+        with open(partial, "wb") as file:
+            writer = ChunkWriter(file, name, info.size, progress, loop)
+            result = await store.get(name, writeinto=writer)
+        info = result.info
+        if writer.done != info.size or (
+            info.digest and info.digest != _digest(writer.sha)
+        ):
+            raise ValueError(
+                f"digest mismatch downloading {name}: expected {info.digest} over {info.size} bytes, got {_digest(writer.sha)} over {writer.done}"
+            )
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return info
@@ -0,0 +1,166 @@
+import os
+import re
+import threading
+import numpy as np
+import xxhash
+from collections import OrderedDict
+
+
+class EmbeddingCache:
+    """
+    A two-tier cache of passage embeddings for a single model.
+
+    Entries are keyed by the xxhash of the instruction prefix and of the whitespace-normalized passage, so the
+    same passage encoded under a different instruction is a different entry. The first tier is an in-memory LRU;
+    the optional second tier lives under `path/<model>/<backend>/` as an append-only float32 matrix
+    (`embeddings.f32`), read back through a memory map, plus an index file (`index.tsv`) mapping keys to rows. The
+    disk tier survives restarts, so a warm worker only encodes passages it has never seen, and is kept per encoder
+    backend because `torch`, `int8` and `onnx` encodings of a passage differ slightly.
+
+    Args:
+        model (str): The name of the model the embeddings come from.
+        dimension (int): The embedding dimension.
+        capacity (int, optional): The number of embeddings held by the in-memory tier, 0 disables it. Defaults to 1024.
+        path (str, optional): The root directory of the on-disk tier. Defaults to None, which disables it.
+        backend (str, optional): The encoder backend the embeddings come from. Defaults to 'torch'.
+
+    Attributes:
+        hits (int): Lookups served from either tier.
+        misses (int): Lookups that had to be encoded.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        dimension: int,
+        capacity: int = 1024,
+        path: str = None,
+        backend: str = "torch",
+    ):
+        self.model = model
+        self.backend = backend
+        self.dimension = dimension
+        self.capacity = capacity
+        self._memory = OrderedDict()
+        self._rows = {}
+        self._mmap = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.path = (
+            os.path.join(path, re.sub(r"[^A-Za-z0-9_.-]", "_", model), backend)
+            if path
+            else None
+        )
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            self._matrix_path = os.path.join(self.path, "embeddings.f32")
+            self._index_path = os.path.join(self.path, "index.tsv")
+            if os.path.exists(self._index_path):
+                with open(self._index_path) as index:
+                    for line in index:
+                        instruction, text, row = line.split()
+                        self._rows[(int(instruction), int(text))] = int(row)
+
+    @property
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory": len(self._memory),
+            "disk": len(self._rows),
+        }
+
+    def _key(self, instruction: str, text: str):
+        return xxhash.xxh64_intdigest(
+            instruction.encode("utf-8")
+        ), xxhash.xxh64_intdigest(" ".join(text.split()).encode("utf-8"))
+
+    def _row(self, row: int):
+        if self._mmap is None or row >= len(self._mmap):
+            self._mmap = np.memmap(
+                self._matrix_path, dtype=np.float32, mode="r"
+            ).reshape(-1, self.dimension)
+        return np.array(self._mmap[row])
+
+    def _remember(self, key, embedding):
+        if not self.capacity:
+            return
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def get_many(self, instruction: str, texts: list):
+        """
+        Returns one cached embedding per passage, or None for passages that are not cached.
+        """
+        with self._lock:
+            return self._get_many(instruction, texts)
+
+    def _get_many(self, instruction, texts):
+        results = []
+        for text in texts:
+            key = self._key(instruction, text)
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+            elif key in self._rows:
+                embedding = self._row(self._rows[key])
+                self._remember(key, embedding)
+            results.append(embedding)
+        return results
+
+    def put_many(self, instruction: str, texts: list, embeddings):
+        """
+        Stores freshly encoded embeddings in memory and, when enabled, appends them to the disk tier.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            self._put_many(instruction, texts, embeddings)
+
+    def _put_many(self, instruction, texts, embeddings):
+        keys = [self._key(instruction, text) for text in texts]
+        for key, embedding in zip(keys, embeddings):
+            self._remember(key, embedding)
+        if self.path:
+            fresh = [i for i, key in enumerate(keys) if key not in self._rows]
+            if not fresh:
+                return
+            start = (
+                os.path.getsize(self._matrix_path) // (4 * self.dimension)
+                if os.path.exists(self._matrix_path)
+                else 0
+            )
+            with open(self._matrix_path, "ab") as matrix:
+                matrix.write(np.ascontiguousarray(embeddings[fresh]).tobytes())
+            with open(self._index_path, "a") as index:
+                for row, i in enumerate(fresh, start):
+                    self._rows[keys[i]] = row
+                    index.write(f"{keys[i][0]} {keys[i][1]} {row}\n")
+
+    def encode(self, encoder, instruction: str, texts: list):
+        """
+        Returns embeddings for `texts`, calling `encoder` once with only the passages that miss the cache.
+
+        Args:
+            encoder (callable): Maps a list of passages to a 2D array of embeddings.
+            instruction (str): The instruction prefix the encoder applies.
+            texts (list): The passages to embed.
+        """
+        cached = self.get_many(instruction, texts)
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            encoded = np.asarray(encoder([texts[i] for i in missing]), dtype=np.float32)
+            self.put_many(instruction, [texts[i] for i in missing], encoded)
+            for i, embedding in zip(missing, encoded):
+                cached[i] = embedding
+        return (
+            np.stack(cached)
+            if cached
+            else np.zeros((0, self.dimension), dtype=np.float32)
+        )
@@ -0,0 +1,156 @@
+import threading
+import numpy as np
+import xxhash
+from collections import OrderedDict
+
+
+class DedupeFilter:
+    """
+    An in-process near-duplicate filter consulted before any remote dupe search.
+
+    Candidates go through two local stages: an exact xxhash set over the normalized passage text, then a
+    bounded matrix of recently seen normalized embeddings scored with a single matrix product per batch.
+    Both stages evict their least recently used entries once `capacity` is reached. Anything the filter
+    cannot resolve locally is reported as ambiguous and should fall through to the index. When candidates are
+    checked with their partitions, both stages only match passages remembered under the same partition, so a
+    passage indexed for one tenant is not reported as a duplicate of the same passage sent by another.
+
+    Args:
+        dimension (int): The embedding dimension.
+        capacity (int, optional): The maximum number of hashes and of embeddings kept in memory. Defaults to 10000.
+        threshold (float, optional): The cosine similarity at or above which two passages are duplicates. Defaults to 0.98.
+
+    Attributes:
+        exact_hits (int): Candidates resolved by the content hash stage.
+        vector_hits (int): Candidates resolved by the embedding stage.
+        misses (int): Candidates that fell through to the index.
+    """
+
+    def __init__(self, dimension: int, capacity: int = 10000, threshold: float = 0.98):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._hashes = OrderedDict()
+        self._matrix = np.zeros((capacity, dimension), dtype=np.float32)
+        self._used = np.zeros(capacity, dtype=np.int64)
+        self._owners = np.zeros(capacity, dtype=np.uint64)
+        self._size = 0
+        self._tick = 0
+        self.exact_hits = 0
+        self.vector_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        hits = self.exact_hits + self.vector_hits
+        total = hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "vector_hits": self.vector_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    def _owner(self, partition):
+        return (
+            0
+            if partition is None
+            else xxhash.xxh64_intdigest(str(partition).encode("utf-8"))
+        )
+
+    def _owners_of(self, partitions, n):
+        return np.array(
+            [self._owner(partition) for partition in partitions or [None] * n],
+            dtype=np.uint64,
+        )
+
+    def _key(self, text, owner):
+        return xxhash.xxh64_intdigest(text.encode("utf-8"), seed=int(owner))
+
+    def check(self, texts: list = None, embeddings=None, partitions: list = None):
+        """
+        Resolves a batch of candidates locally, within the partition of each candidate when `partitions` is given.
+
+        Returns:
+            list: One verdict per candidate, True for a duplicate and None when the filter cannot tell.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            return self._check(texts, embeddings, partitions)
+
+    def _check(self, texts, embeddings, partitions):
+        self._tick += 1
+        verdicts = [None] * len(embeddings)
+        owners = self._owners_of(partitions, len(embeddings))
+        if texts:
+            for i, text in enumerate(texts):
+                key = self._key(text, owners[i])
+                if key in self._hashes:
+                    self._hashes.move_to_end(key)
+                    verdicts[i] = True
+                    self.exact_hits += 1
+        pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        if pending and self._size:
+            scores = embeddings[pending] @ self._matrix[: self._size].T
+            scores[owners[pending][:, None] != self._owners[: self._size]] = -np.inf
+            best = scores.argmax(axis=1)
+            top = scores[np.arange(len(pending)), best]
+            for i, row, score in zip(pending, best, top):
+                if score >= self.threshold:
+                    verdicts[i] = True
+                    self._used[row] = self._tick
+                    self.vector_hits += 1
+        pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        if len(pending) > 1:
+            scores = embeddings[pending] @ embeddings[pending].T
+            scores[owners[pending][:, None] != owners[pending]] = -np.inf
+            kept = []
+            for j, i in enumerate(pending):
+                if kept and scores[kept, j].max() >= self.threshold:
+                    verdicts[i] = True
+                    self.vector_hits += 1
+                else:
+                    kept.append(j)
+        self.misses += sum(1 for verdict in verdicts if verdict is None)
+        return verdicts
+
+    def remember(self, texts: list = None, embeddings=None, partitions: list = None):
+        """
+        Records passages known to be in the index, under their partitions when given, so later candidates can be resolved locally.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not len(embeddings):
+            return
+        with self._lock:
+            self._remember(texts, embeddings, partitions)
+
+    def _remember(self, texts, embeddings, partitions):
+        self._tick += 1
+        owners = self._owners_of(partitions, len(embeddings))
+        for text, owner in zip(texts or [], owners):
+            key = self._key(text, owner)
+            self._hashes[key] = None
+            self._hashes.move_to_end(key)
+        while len(self._hashes) > self.capacity:
+            self._hashes.popitem(last=False)
+        embeddings, owners = embeddings[-self.capacity :], owners[-self.capacity :]
+        free = min(self.capacity - self._size, len(embeddings))
+        rows = np.arange(self._size, self._size + free)
+        if free < len(embeddings):
+            evicted = np.argpartition(
+                self._used[: self._size], len(embeddings) - free - 1
+            )[: len(embeddings) - free]
+            rows = np.concatenate([rows, evicted])
+        self._size += free
+        self._matrix[rows] = embeddings
+        self._owners[rows] = owners
+        self._used[rows] = self._tick
+
+    def clear(self):
+        """
+        Forgets every remembered passage, for when the index behind the filter is dropped or recreated. The hit counters are kept.
+        """
+        with self._lock:
+            self._hashes.clear()
+            self._used[:] = 0
+            self._size = 0
@@ -0,0 +1,299 @@
+import os
+import re
+import time
+import tempfile
+import numpy as np
+from magnet.utils.globals import _f
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def _last_hidden_state(model, names: list):
+    """
+    Wraps a Hugging Face transformer so that it can be traced with positional inputs and returns only its last hidden state.
+    """
+    import torch
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(names, inputs))).last_hidden_state
+
+    return LastHiddenState()
+
+
+def export_onnx(model: str, path: str = None, st=None) -> str:
+    """
+    Exports a sentence-transformers model's transformer to `path/model.onnx` unless it is already there.
+
+    The export is written to a temporary file in the same directory and renamed into place, so a crashed or
+    concurrent export never leaves a truncated `model.onnx` for later starts to load.
+
+    Args:
+        model (str): The sentence-transformers model name.
+        path (str, optional): The export directory. Defaults to `~/.cache/magnet/onnx/<model>`.
+        st (SentenceTransformer, optional): The model, when it is already loaded.
+
+    Returns:
+        str: The path of the exported model.
+    """
+    path = (
+        path
+        if path
+        else os.path.join(
+            os.path.expanduser("~/.cache/magnet/onnx"),
+            re.sub(r"[^A-Za-z0-9_.-]", "_", model),
+        )
+    )
+    file = os.path.join(path, "model.onnx")
+    if os.path.exists(file):
+        return file
+    import torch
+
+    if st is None:
+        from sentence_transformers import SentenceTransformer
+
+        st = SentenceTransformer(model, device="cpu")
+    os.makedirs(path, exist_ok=True)
+    sample = st.tokenizer(["magnet"], return_tensors="pt")
+    names = list(sample.keys())
+    fd, partial = tempfile.mkstemp(prefix="model-", suffix=".onnx.part", dir=path)
+    os.close(fd)
+    _f("wait", f"exporting {model} to {file}")
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                _last_hidden_state(st[0].auto_model.eval(), names),
+                tuple(sample[name] for name in names),
+                partial,
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    name: {0: "batch", 1: "sequence"}
+                    for name in names + ["last_hidden_state"]
+                },
+                opset_version=14,
+            )
+        os.replace(partial, file)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return file
+
+
+class OnnxEncoder:
+    """
+    Runs a sentence-transformers model through an ONNX Runtime CPU session.
+
+    The model's transformer is exported once to `path/model.onnx` by `export_onnx` and reused on later starts;
+    pooling (CLS or mean, as configured by the model) and normalization are applied with NumPy. The encoder mirrors
+    the parts of `SentenceTransformer` that `Memory` uses (`encode`, `tokenizer`, `max_seq_length`, `device`).
+
+    Args:
+        model (str): The sentence-transformers model name.
+        path (str, optional): The directory holding the exported model. Defaults to `~/.cache/magnet/onnx/<model>`.
+        threads (int, optional): The intra-op threads of the session. Defaults to ONNX Runtime's choice.
+    """
+
+    def __init__(self, model: str, path: str = None, threads: int = None):
+        import onnxruntime as ort
+        from sentence_transformers import SentenceTransformer
+
+        st = SentenceTransformer(model, device="cpu")
+        self.device = "cpu"
+        self.tokenizer = st.tokenizer
+        self.max_seq_length = st.max_seq_length
+        self.dimension = st.get_sentence_embedding_dimension()
+        self._cls = (
+            bool(getattr(st[1], "pooling_mode_cls_token", False))
+            if len(st) > 1
+            else False
+        )
+        file = export_onnx(model, path, st)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self._session = ort.InferenceSession(
+            file, options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = [i.name for i in self._session.get_inputs()]
+        del st
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = 32,
+        normalize_embeddings: bool = True,
+        **kwargs,
+    ):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            batch = self.tokenizer(
+                sentences[start : start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            hidden = self._session.run(
+                None, {name: batch[name].astype(np.int64) for name in self._inputs}
+            )[0]
+            if self._cls:
+                pooled = hidden[:, 0]
+            else:
+                mask = batch["attention_mask"][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(
+                    mask.sum(axis=1), 1e-9, None
+                )
+            embeddings[start : start + len(pooled)] = pooled
+        if normalize_embeddings:
+            embeddings /= np.clip(
+                np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None
+            )
+        return embeddings[0] if single else embeddings
+
+
+class BucketedEncoder:
+    """
+    Wraps an encoder so that every batch is grouped by token length before it is encoded.
+
+    Inputs are tokenized once, assigned to the bucket whose upper `boundaries` value covers their length (longer
+    inputs go to the last bucket), sorted by length within the bucket and encoded bucket by bucket, so short
+    snippets are never padded to the length of a long passage. Results are returned in the original order.
+    Every other attribute is read through to the wrapped encoder.
+
+    Args:
+        encoder: An object exposing `encode` and `tokenizer`, as returned by `load_encoder` or `EncoderPool`.
+        boundaries (list, optional): The upper token length of each bucket. Defaults to [64, 128, 256].
+        batch_size (int, optional): The batch size used within a bucket. Defaults to 32.
+
+    Attributes:
+        stats (dict): Per bucket, the passages, batches, real and padded tokens and seconds spent encoding.
+    """
+
+    def __init__(self, encoder, boundaries: list = None, batch_size: int = 32):
+        self.encoder = encoder
+        self.boundaries = sorted(boundaries) if boundaries else [64, 128, 256]
+        self.batch_size = batch_size
+        self.stats = {
+            bound: {
+                "passages": 0,
+                "batches": 0,
+                "tokens": 0,
+                "padded": 0,
+                "seconds": 0.0,
+            }
+            for bound in self._labels()
+        }
+
+    def __getattr__(self, name):
+        return getattr(self.encoder, name)
+
+    def _labels(self):
+        return self.boundaries + ["max"]
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = None,
+        normalize_embeddings: bool = True,
+        **kwargs,
+    ):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        if not sentences:
+            return self.encoder.encode(
+                sentences, normalize_embeddings=normalize_embeddings
+            )
+        batch_size = batch_size or self.batch_size
+        lengths = np.array(
+            [
+                len(ids)
+                for ids in self.encoder.tokenizer(
+                    sentences,
+                    truncation=True,
+                    max_length=self.encoder.max_seq_length,
+                    return_attention_mask=False,
+                    return_token_type_ids=False,
+                )["input_ids"]
+            ]
+        )
+        buckets = np.searchsorted(self.boundaries, lengths)
+        embeddings = None
+        for bucket, label in enumerate(self._labels()):
+            rows = np.flatnonzero(buckets == bucket)
+            if not len(rows):
+                continue
+            rows = rows[np.argsort(lengths[rows], kind="stable")]
+            start = time.perf_counter()
+            encoded = np.asarray(
+                self.encoder.encode(
+                    [sentences[i] for i in rows],
+                    batch_size=batch_size,
+                    normalize_embeddings=normalize_embeddings,
+                ),
+                dtype=np.float32,
+            )
+            elapsed = time.perf_counter() - start
+            if embeddings is None:
+                embeddings = np.zeros(
+                    (len(sentences), encoded.shape[1]), dtype=np.float32
+                )
+            embeddings[rows] = encoded
+            batches = [
+                lengths[rows[i : i + batch_size]]
+                for i in range(0, len(rows), batch_size)
+            ]
+            stats = self.stats[label]
+            stats["passages"] += len(rows)
+            stats["batches"] += len(batches)
+            stats["tokens"] += int(lengths[rows].sum())
+            stats["padded"] += int(sum(batch.max() * len(batch) for batch in batches))
+            stats["seconds"] += elapsed
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(
+    model: str,
+    backend: str = "torch",
+    device: str = "cpu",
+    path: str = None,
+    threads: int = None,
+):
+    """
+    Loads an encoder for `Memory`.
+
+    Args:
+        model (str): The sentence-transformers model name.
+        backend (str, optional): `torch` for full precision, `int8` for dynamically quantized torch on CPU, or `onnx` for an ONNX Runtime CPU session. Defaults to 'torch'.
+        device (str, optional): The device of the `torch` backend; the other backends always run on CPU. Defaults to 'cpu'.
+        path (str, optional): The export directory of the `onnx` backend.
+        threads (int, optional): The intra-op threads of the `onnx` backend.
+
+    Returns:
+        An object exposing `encode`, `tokenizer`, `max_seq_length` and `device`.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"unknown encoder backend `{backend}`, expected one of {BACKENDS}"
+        )
+    if backend == "onnx":
+        return OnnxEncoder(model, path=path, threads=threads)
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "int8":
+        import torch
+
+        encoder = SentenceTransformer(model, device="cpu")
+        return torch.quantization.quantize_dynamic(
+            encoder, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return SentenceTransformer(model, device=device)
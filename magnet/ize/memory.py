@@ -1,11 +1,35 @@
-from sentence_transformers import SentenceTransformer
-from magnet.utils.globals import _f, Utils, break_into_chunks
-from magnet.utils.index.milvus import *
-from magnet.utils.data_classes import EmbeddingPayload
+from magnet.utils.globals import _f, Utils, sliding_window_chunks
+from magnet.utils.index.base import load_index
+from magnet.utils.index.bm25 import BM25Index, bm25_path
+from magnet.utils.data_classes import EmbeddingPayload, Payload
+from magnet.ize.dedupe import DedupeFilter
+from magnet.ize.cache import EmbeddingCache
+from magnet.ize.pool import EncoderPool
+from magnet.ize.encoders import load_encoder, BucketedEncoder
+from magnet.ize.rerank import mmr, Reranker
 import re
-from magnet.ic.field import Charge, Magnet
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from magnet.ic.field import Charge
+
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from magnet.base import Magnet
+
+RRF_K = 60
+OVERFETCH = 4
+
+
+def _unpack(payload):
+    """
+    Returns the (document, text) pair carried by an index payload, accepting both `Payload` (`_id`, `content`) and objects exposing `document` and `text`.
+    """
+    if isinstance(payload, Payload):
+        return payload._id, payload.content
+    return payload.document, payload.text
 
-from typing import Optional
 
 class Memory:
     """
@@ -18,130 +42,659 @@ class Memory:
     Attributes:
         config (Config): A Config instance containing the configuration parameters for the Embedder class.
         model (SentenceTransformer): An instance of the SentenceTransformer class from the sentence_transformers library, used for text embedding.
-        db (MilvusDB): An instance of the MilvusDB class from the magnet.utils.milvus module, used for connecting to the Milvus database.
+        db (IndexBackend): The index backend selected by `config.index.backend`, either `MilvusDB` or the local `EmbeddedDB`.
     """
 
-    def __init__(self, magnet: Magnet = None):
+    def __init__(self, magnet: "Magnet" = None):
         self.config = magnet.config
         self._model = None
-        
+        self.dedupe = DedupeFilter(
+            self.config.index.dimension,
+            capacity=self.config.index.dedupe_capacity,
+            threshold=self.config.index.dedupe_threshold,
+        )
+        self.cache = (
+            EmbeddingCache(
+                self.config.index.model,
+                self.config.index.dimension,
+                capacity=self.config.index.cache_capacity,
+                path=self.config.index.cache_path,
+                backend=self.config.index.encoder,
+            )
+            if self.config.index.cache_capacity or self.config.index.cache_path
+            else None
+        )
+        self._encoder = None
+        self._reranker = None
+        self._io = None
+        self._queue = None
+        self._workers = []
+        self._settling = set()
+        self.lexical = (
+            BM25Index(bm25_path(self.config.index))
+            if self.config.index.hybrid
+            else None
+        )
+
     async def on(self, create: bool = False, initialize: bool = False):
-        self._model = SentenceTransformer(self.config.index.model, device=Utils().check_cuda())
-        _f('info', f'loading into {self._model.device}')
-        self.db = MilvusDB(self.config)
+        if self.config.index.pool_processes:
+            self._model = EncoderPool(
+                self.config.index.model,
+                processes=self.config.index.pool_processes,
+                threads=self.config.index.pool_threads,
+                backend=self.config.index.encoder,
+                path=self.config.index.onnx_path,
+            )
+        else:
+            self._model = load_encoder(
+                self.config.index.model,
+                backend=self.config.index.encoder,
+                device=Utils().check_cuda(),
+                path=self.config.index.onnx_path,
+            )
+        if self.config.index.buckets:
+            self._model = BucketedEncoder(
+                self._model, boundaries=self.config.index.buckets
+            )
+        _f("info", f"loading into {self._model.device}")
+        if self.config.index.reranker:
+            self._reranker = Reranker(
+                self.config.index.reranker,
+                device=self._model.device,
+                batch_size=self.config.index.rerank_batch_size,
+            )
+        self._encoder = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="magnet-encoder"
+        )
+        self._io = ThreadPoolExecutor(
+            max_workers=self.config.index.io_workers, thread_name_prefix="magnet-io"
+        )
+        self.db = load_index(self.config)
         await self.db.on()
         if create:
             await self.db.create(overwrite=True)
         await self.db.load()
+        if create:
+            self.dedupe.clear()
+        if self.lexical is not None and create:
+            self.lexical.clear()
+        elif self.lexical is not None:
+            await self._run(self._io, self.lexical.load)
+        if self.db.buffer is not None:
+            await self._run(self._io, self.db.buffer.replay, self._replayed)
         if initialize:
             self.db.initialize()
 
-    async def index(self, payload=None, msg=None, field=None, v=False, instruction="Represent this information for searching relevant passages: "):
+    async def index(
+        self,
+        payload=None,
+        msg=None,
+        field=None,
+        v=False,
+        instruction="Represent this information for searching relevant passages: ",
+    ):
         if not msg or not payload:
-            return _f('fatal', 'no field message and/or payload to ack!')
+            return _f("fatal", "no field message and/or payload to ack!")
+        _f("info", f"encoding payload\n{payload}") if v else None
+        await self.index_many(
+            [(payload, msg)], field=field, v=v, instruction=instruction
+        )
+
+    @property
+    def bucket_stats(self):
+        """
+        Per-bucket encoding stats of the length-bucketed encoder, keyed by each bucket's upper token length.
+        """
+        return self._model.stats if isinstance(self._model, BucketedEncoder) else {}
+
+    async def _run(self, executor, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    async def _heartbeat(self, msgs: list, interval: float):
+        while True:
+            await asyncio.gather(*[msg.in_progress() for msg in msgs])
+            await asyncio.sleep(interval)
+
+    async def _nak(self, batch: list):
+        """
+        Hands a failed batch's messages back for immediate redelivery instead of leaving them to the ack wait.
+        """
+        for result in await asyncio.gather(
+            *[msg.nak() for _, msg in batch], return_exceptions=True
+        ):
+            if isinstance(result, Exception):
+                _f("warn", f"could not nak a message: {result}")
+
+    async def start(
+        self,
+        workers: int = 1,
+        queue_size: int = 1024,
+        batch_size: int = 64,
+        max_latency: float = 0.5,
+        field=None,
+        v=False,
+        instruction="Represent this information for searching relevant passages: ",
+    ):
+        """
+        Starts background indexing workers fed by a bounded queue. `put` blocks once `queue_size` messages are pending, which throttles the NATS consumer instead of letting it run ahead of the encoder.
+
+        Args:
+            workers (int, optional): The number of concurrent batch workers. Defaults to 1.
+            queue_size (int, optional): The number of pending messages before `put` blocks. Defaults to 1024.
+            batch_size (int, optional): The largest batch handed to `index_many`. Defaults to 64.
+            max_latency (float, optional): The longest time in seconds a worker waits to fill a batch. Defaults to 0.5.
+        """
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._workers = [
+            asyncio.create_task(
+                self._drain(batch_size, max_latency, field, v, instruction)
+            )
+            for _ in range(workers)
+        ]
+
+    async def put(self, payload=None, msg=None):
+        """
+        Queues a message for the background workers started with `start`, waiting while the queue is full.
+        """
+        await self._queue.put((payload, msg))
+
+    async def stop(self):
+        """
+        Waits for every queued message to be indexed, then stops the background workers.
+        """
+        if self._queue:
+            await self._queue.join()
+        if self.db.buffer is not None:
+            await self.db.buffer.flush()
+        await asyncio.gather(*self._settling, return_exceptions=True)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _drain(self, batch_size, max_latency, field, v, instruction):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + max_latency
+            while len(batch) < batch_size and loop.time() < deadline:
+                if self._queue.empty():
+                    await asyncio.sleep(min(0.01, max(0, deadline - loop.time())))
+                else:
+                    batch.append(self._queue.get_nowait())
+            try:
+                await self.index_many(batch, field=field, v=v, instruction=instruction)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _replayed(self, keys, documents, texts, embeddings, partitions):
+        """
+        Adds rows replayed from a dead process's insert buffer to the BM25 index and the dupe filter, as `_settle` would have.
+        """
+        if self.lexical is not None:
+            self.lexical.add(keys, texts)
+        self.dedupe.remember(texts, embeddings, self._scopes(documents, partitions))
+
+    def _partition(self, payload):
+        """
+        Returns the value of the `session` or tenant partition field for a payload, falling back to the session.
+        """
+        if self.config.index.partition_key != "session" and getattr(
+            payload, "tenant", None
+        ):
+            return payload.tenant
+        return self.config.session
+
+    def _embed(self, batch: list, instruction: str):
+        """
+        Chunks and encodes a batch of payloads, returning the flattened documents, passages, embeddings and partitions.
+        """
+        documents, texts, partitions = [], [], []
+        for payload, _ in batch:
+            _document, _text = _unpack(payload)
+            _text = re.sub(r"\s+", " ", _text).replace("\n", "")
+            _chunks = self._chunk(_text, instruction)
+            documents.extend([_document] * len(_chunks))
+            texts.extend(_chunks)
+            partitions.extend([self._partition(payload)] * len(_chunks))
+        return documents, texts, self._encode(texts, instruction), partitions
+
+    def _encode(self, texts: list, instruction: str):
+        """
+        Encodes instruction-prefixed passages in one batched call, skipping any the embedding cache already holds.
+        """
+        encoder = lambda batch: self._model.encode(
+            [f"{instruction} {_text}" for _text in batch], normalize_embeddings=True
+        )
+        if self.cache:
+            return self.cache.encode(encoder, instruction, texts)
+        return encoder(texts)
+
+    def _chunk(self, text: str, instruction: str):
+        """
+        Splits a passage into overlapping windows so that every instruction-prefixed chunk fits the encoder's maximum sequence length, as measured by the model's own tokenizer.
+
+        Returns:
+            list: The passage itself when it fits, otherwise its chunks.
+        """
+        tokenizer = self._model.tokenizer
+        budget = self._model.max_seq_length - len(tokenizer.tokenize(instruction)) - 2
+        return [
+            text[start:end]
+            for start, end in sliding_window_chunks(
+                text, tokenizer, budget, overlap=self.config.index.chunk_overlap
+            )
+        ] or [text]
+
+    async def index_many(
+        self,
+        batch: list = None,
+        field=None,
+        v=False,
+        instruction="Represent this information for searching relevant passages: ",
+    ):
+        """
+        Indexes a micro-batch of messages in one pass: every chunk of every payload is encoded in a single `encode` call, checked against the index with a single batched dupe search and written with a single bulk insert, after which all messages in the batch are acked together.
+        Encoding runs on the encoder thread and index calls on the I/O pool, so the event loop keeps fetching and heartbeating while a batch is in flight.
+        With the backend's insert buffer enabled, the rows are handed to the buffer and the messages are acked in the background once the flush holding them succeeded, so the next batch can start meanwhile.
+
+        Args:
+            batch (list): A list of `(payload, msg)` tuples, e.g. built from the messages yielded by `Resonator.listen_batch`.
+            field (Charge, optional): A field to pulse each indexed `EmbeddingPayload` to.
+            v (bool, optional): Verbose logging.
+            instruction (str, optional): The instruction prefixed to every passage before encoding.
+        """
+        if not batch:
+            return _f("fatal", "no batch of field messages and payloads to ack!")
         if field:
             self.field = field
+        heartbeat = asyncio.create_task(
+            self._heartbeat([msg for _, msg in batch], self.config.index.heartbeat)
+        )
         try:
-            await msg.in_progress()
-            _f('info', f'encoding payload\n{payload}') if v else None
-            _text = re.sub(r'\s+', ' ', payload.text)
-            _text = _text.replace('\n', '')
-            text_to_encode = f"{instruction} {_text}"
-            num_tokens = len(text_to_encode.split())
-            if num_tokens > self.config.index.dimension:
-                chunks = break_into_chunks(_text, self.config.index.dimension)
-                for _chunk in chunks:
-                    embedding = self._model.encode(text_to_encode, normalize_embeddings=True)
-                    if not self.is_dupe(q=embedding):
-                        self.db.collection.insert([
-                            [payload.document], [_chunk], [embedding.tolist()]
-                        ])
-                        _f('success', f'embedding indexed\n{_chunk}') if v else None
-                        if field:
-                            payload = EmbeddingPayload(
-                                model=self.config.index.model,
-                                embedding=embedding.tolist(),
-                                text=_chunk,
-                                document=payload.document
-                            )
-                            _f('info', f'sending payload\n{_chunk}')
-                            await self.field.pulse(payload)
-                    else:
-                        _f('warn', f'embedding exists') if v else None
-            else:
-                embedding = self._model.encode(text_to_encode, normalize_embeddings=True)
-                if not self.is_dupe(q=embedding):
-                    self.db.collection.insert([
-                        [payload.document], [_text], [embedding.tolist()]
-                    ])
-                    _f('success', f'embedding indexed\n{payload}') if v else None
-                    await msg.ack_sync()
-                    if field:
-                        payload = EmbeddingPayload(
+            _f("info", f"encoding {len(batch)} messages") if v else None
+            documents, texts, embeddings, partitions = await self._run(
+                self._encoder, self._embed, batch, instruction
+            )
+            scopes = self._scopes(documents, partitions)
+            dupes = await self._run(
+                self._io, self.is_dupe_many, embeddings, texts, scopes
+            )
+            rows = [i for i, dupe in enumerate(dupes) if not dupe]
+            columns = (
+                [documents[i] for i in rows],
+                [texts[i] for i in rows],
+                embeddings[rows],
+                [partitions[i] for i in rows],
+            )
+            if rows and self.db.buffer is not None:
+                flushed = await self.db.buffer.submit(*columns)
+                settle = asyncio.create_task(
+                    self._settle(
+                        batch,
+                        heartbeat,
+                        flushed,
+                        documents,
+                        texts,
+                        embeddings,
+                        rows,
+                        field,
+                        v,
+                        scopes,
+                    )
+                )
+                self._settling.add(settle)
+                settle.add_done_callback(self._settling.discard)
+                return
+            written = self._run(self._io, self.db.insert, *columns) if rows else None
+        except Exception as e:
+            heartbeat.cancel()
+            await self._nak(batch)
+            return _f("fatal", e)
+        await self._settle(
+            batch,
+            heartbeat,
+            written,
+            documents,
+            texts,
+            embeddings,
+            rows,
+            field,
+            v,
+            scopes,
+        )
+
+    async def _settle(
+        self,
+        batch,
+        heartbeat,
+        written,
+        documents,
+        texts,
+        embeddings,
+        rows,
+        field=None,
+        v=False,
+        scopes=None,
+    ):
+        """
+        Waits for a batch's rows to be written, whether inserted directly or flushed by the insert buffer, then acks its messages and pulses its embeddings.
+        Messages of a batch that fails before it is acked are nak'd.
+        """
+        acked = False
+        try:
+            if rows:
+                keys = await written
+                if self.lexical is not None:
+                    await self._run(
+                        self._io, self.lexical.add, keys, [texts[i] for i in rows]
+                    )
+                self.dedupe.remember(
+                    [texts[i] for i in rows],
+                    embeddings[rows],
+                    [scopes[i] for i in rows] if scopes else None,
+                )
+                _f("success", f"{len(rows)} embeddings indexed") if v else None
+            if len(rows) < len(texts):
+                _f("warn", f"{len(texts) - len(rows)} embeddings exist") if v else None
+            heartbeat.cancel()
+            acked = True
+            await asyncio.gather(*[msg.ack_sync() for _, msg in batch])
+            if field:
+                for i in rows:
+                    await self.field.pulse(
+                        EmbeddingPayload(
                             model=self.config.index.model,
-                            embedding=embedding.tolist(),
-                            text=_text,
-                            document=payload.document
+                            embedding=embeddings[i],
+                            content=texts[i],
+                            document=documents[i],
                         )
-                        _f('info', f'sending payload\n{payload}') if v else None
-                        await self.field.pulse(payload)
-                else:
-                    _f('warn', f'embedding exists') if v else None
-                    await msg.ack_sync()
+                    )
         except Exception as e:
-            _f('fatal', e)
-
-    def search(self, payload, limit: int = 100, cb: Optional[callable] = None, instruction: str = "Represent this information for searching relevant passages: "):
-        payload = EmbeddingPayload(
-            text=payload,
-            embedding=self._model.encode(
-                f"{instruction} {payload}", normalize_embeddings=True),
-            model=self.config.index.model,
-            document="none"
-        )
+            _f("fatal", e)
+            if not acked:
+                heartbeat.cancel()
+                await self._nak(batch)
+        finally:
+            heartbeat.cancel()
 
-        _results = self.db.collection.search(
-            data=[payload.embedding],
-            anns_field="embedding",
-            param=self.config.index.options,
-            limit=limit,
-            output_fields=['text', 'document', 'embedding']
+    def search(
+        self,
+        payload,
+        limit: int = 100,
+        cb: Optional[callable] = None,
+        instruction: str = "Represent this information for searching relevant passages: ",
+        partition: str = None,
+        expr: str = None,
+        hybrid: bool = None,
+        mmr_k: int = None,
+        rerank_k: int = None,
+    ):
+        """
+        Searches the index for one query.
+
+        A hybrid search also runs the query against the BM25 index of `text`. The vector and lexical rankings, each
+        `2 * limit` deep, are fused with reciprocal rank fusion into the `limit` best passages, so exact identifiers
+        such as tickers or part numbers surface even when their embeddings do not. The lexical ranking is restricted
+        to the same `partition` and `expr`, and passages only found lexically carry their vector distance to the query.
+        The BM25 index is read from `IndexConfig.bm25_path`, so processes that search without indexing only see the
+        passages indexed elsewhere when that directory is shared with the indexing processes.
+
+        The retrieved passages can then be narrowed before they reach a prompt: `mmr_k` keeps that many by maximal
+        marginal relevance over their embeddings, dropping near-duplicate chunks, and `rerank_k` keeps that many of
+        what remains as scored by the `IndexConfig.reranker` cross-encoder.
+
+        Args:
+            payload (str): The query.
+            limit (int, optional): The number of passages returned. Defaults to 100.
+            cb (callable, optional): Called with the query and the results, whose return value is returned instead.
+            instruction (str, optional): The instruction prefixed to the query before encoding.
+            partition (str, optional): Only search the rows whose `IndexConfig.partition_key` equals this value.
+            expr (str, optional): A filter expression pushed down to the index.
+            hybrid (bool, optional): Fuse lexical and vector hits. Defaults to `IndexConfig.hybrid`.
+            mmr_k (int, optional): Keep this many passages, selected by maximal marginal relevance.
+            rerank_k (int, optional): Keep this many passages, the best scored by the cross-encoder.
+
+        Returns:
+            list: A dict of `text`, `document`, `embedding` and `distance` per passage, plus the fused `score` for hybrid searches and the `rerank_score` when reranked.
+        """
+        hybrid = self.config.index.hybrid if hybrid is None else hybrid
+        if hybrid and self.lexical is None:
+            raise ValueError(
+                "hybrid search needs `IndexConfig.hybrid` to maintain the BM25 index"
+            )
+        scope = self._scope(partition, expr)
+        q = self._encode([payload], instruction)
+        depth = 2 * limit if hybrid else limit
+        found = self.db.search(
+            q, limit=depth, output_fields=("text", "document", "embedding"), expr=scope
+        )
+        hits = {
+            int(found.ids[0][i]): {
+                "text": found.fields["text"][0][i],
+                "document": found.fields["document"][0][i],
+                "embedding": found.fields["embedding"][0][i].tolist(),
+                "distance": float(found.distances[0][i]),
+            }
+            for i in range(int((found.ids[0] >= 0).sum()))
+        }
+        results = (
+            self._fuse(
+                payload, np.asarray(q, dtype=np.float32)[0], hits, depth, limit, scope
+            )
+            if hybrid
+            else list(hits.values())
         )
-        results = []
-        for hits_i, hits in enumerate(_results):
-            for hit in hits:
-                results.append({
-                    'text': hit.entity.get('text'),
-                    'document': hit.entity.get('document'),
-                    'embedding': hit.entity.get('embedding'),
-                    'distance': hit.distance
-                })
+        if mmr_k and results:
+            picked = mmr(
+                np.asarray(q, dtype=np.float32)[0],
+                [r["embedding"] for r in results],
+                mmr_k,
+                diversity=self.config.index.mmr_diversity,
+            )
+            results = [results[i] for i in picked]
+        if rerank_k and results:
+            if not self._reranker:
+                raise ValueError(
+                    "reranking needs a cross-encoder in `IndexConfig.reranker`"
+                )
+            order, scores = self._reranker.rerank(
+                payload, [r["text"] for r in results], rerank_k
+            )
+            results = [
+                {**results[i], "rerank_score": score} for i, score in zip(order, scores)
+            ]
         if cb:
-            return cb(payload.text, results)
+            return cb(payload, results)
         else:
             return results
 
+    def _lexical(self, query: str, depth: int, scope: str = None):
+        """
+        Returns the primary keys of the `depth` best BM25 passages of the query within `scope`. The BM25 index knows
+        nothing of partitions or filters, so its ranking is fetched `OVERFETCH` times deeper each round, and filtered
+        through the index, until `depth` of its passages are in scope or it runs out.
+        """
+        fetch = depth
+        while True:
+            keys = self.lexical.search(query, fetch)[0].tolist()
+            if scope is None or not keys:
+                return keys[:depth]
+            scoped = {
+                int(row["id"])
+                for row in self.db.query(
+                    f"(id in {keys}) and ({scope})", output_fields=[]
+                )
+            }
+            ranked = [key for key in keys if key in scoped]
+            if len(ranked) >= depth or len(keys) < fetch:
+                return ranked[:depth]
+            fetch *= OVERFETCH
+
+    def _fuse(
+        self, query: str, q, hits: dict, depth: int, limit: int, scope: str = None
+    ):
+        """
+        Fuses vector hits, keyed by primary key in rank order, with the BM25 ranking of the query by reciprocal rank fusion.
+        """
+        keys = self._lexical(query, depth, scope)
+        fused = {}
+        for ranking in (list(hits), keys):
+            for rank, key in enumerate(ranking):
+                fused[key] = fused.get(key, 0.0) + 1 / (RRF_K + rank + 1)
+        missing = [key for key in keys if key not in hits]
+        if missing:
+            for row in self.db.query(
+                f"id in {missing}", output_fields=["text", "document", "embedding"]
+            ):
+                embedding = np.asarray(row["embedding"], dtype=np.float32)
+                if self.config.index.options.get("metric_type") == "L2":
+                    distance = float(((embedding - q) ** 2).sum())
+                else:
+                    distance = float(embedding @ q)
+                hits[int(row["id"])] = {
+                    "text": row["text"],
+                    "document": row["document"],
+                    "embedding": embedding.tolist(),
+                    "distance": distance,
+                }
+        ranked = sorted(
+            (key for key in fused if key in hits), key=fused.get, reverse=True
+        )[:limit]
+        return [{**hits[key], "score": fused[key]} for key in ranked]
+
+    def _scope(self, partition: str = None, expr: str = None):
+        """
+        Combines a partition of the partition key and a filter expression into the expression pushed down to the index.
+        """
+        clauses = (
+            [self.db.partition_expr(partition)] if partition is not None else []
+        ) + ([expr] if expr else [])
+        return (
+            " and ".join(
+                f"({clause})" if len(clauses) > 1 else clause for clause in clauses
+            )
+            or None
+        )
+
+    def search_many(
+        self,
+        queries: list,
+        limit: int = 100,
+        fields: tuple = ("text", "document"),
+        instruction: str = "Represent this information for searching relevant passages: ",
+        partition: str = None,
+        expr: str = None,
+    ):
+        """
+        Searches the index for many queries at once: all queries are encoded in one batch and sent as one multi-vector search.
+
+        Args:
+            queries (list): The query strings.
+            limit (int, optional): The number of hits per query. Defaults to 100.
+            fields (tuple, optional): The output fields to fetch. `embedding` is only fetched when listed. Defaults to ('text', 'document').
+            instruction (str, optional): The instruction prefixed to every query before encoding.
+            partition (str, optional): Only search the rows whose `IndexConfig.partition_key` equals this value.
+            expr (str, optional): A filter expression pushed down to the index, e.g. `document in ["a", "b"]`.
+
+        Returns:
+            SearchResults: Columnar ids, distances and requested fields, one row per query.
+        """
+        embeddings = self._encode(list(queries), instruction)
+        return self.db.search(
+            embeddings,
+            limit=limit,
+            output_fields=fields,
+            expr=self._scope(partition, expr),
+        )
+
+    async def asearch_many(
+        self,
+        queries: list,
+        limit: int = 100,
+        fields: tuple = ("text", "document"),
+        instruction: str = "Represent this information for searching relevant passages: ",
+        partition: str = None,
+        expr: str = None,
+    ):
+        """
+        The non-blocking form of `search_many`, encoding on the encoder thread and searching through the backend's async client, which spreads concurrent searches over the Milvus connection pool.
+        """
+        embeddings = await self._run(
+            self._encoder, self._encode, list(queries), instruction
+        )
+        return await self.db.asearch(
+            embeddings, limit, fields, self._scope(partition, expr)
+        )
+
     async def info(self):
-        return self.db.collection
+        return self.db.info()
 
     async def disconnect(self):
+        await self.stop()
         await self.db.off()
+        for executor in (self._encoder, self._io):
+            if executor:
+                executor.shutdown(wait=True)
+        if hasattr(self._model, "close"):
+            self._model.close()
 
     async def delete(self, name: str = None):
         if name and name == self.config.index.name:
             try:
+                self.dedupe.clear()
+                if self.lexical is not None:
+                    self.lexical.clear()
                 return await self.db.delete_index()
             except Exception as e:
-                _f('fatal', e)
+                _f("fatal", e)
         else:
-            _f('fatal', "name doesn't match the connection or the connection doesn't exist")
-    
+            _f(
+                "fatal",
+                "name doesn't match the connection or the connection doesn't exist",
+            )
+
     def is_dupe(self, q: str = None):
-        match = self.db.collection.search(
-            data=[q],
-            anns_field="embedding",
-            param=self.config.index.options,
-            output_fields=['text', 'document'],
-            limit=1
-        )
-        return True if match and match[0] and match[0][0].distance >= 0.98 else False
\ No newline at end of file
+        return self.is_dupe_many([q])[0]
+
+    def _scopes(self, documents: list, partitions: list):
+        """
+        Returns the value of the partition key for every row, the partition duplicates are looked for in, or None when the index is not partitioned.
+        """
+        if not self.config.index.partition_key:
+            return None
+        if self.config.index.partition_key == "document":
+            return list(documents)
+        return list(partitions)
+
+    def is_dupe_many(self, q: list = None, texts: list = None, partitions: list = None):
+        """
+        Checks a batch of embeddings for duplicates, resolving what it can with the in-process `DedupeFilter` and sending only the ambiguous remainder to the index in one multi-vector search per partition.
+
+        Args:
+            q (list): The normalized embeddings to check.
+            texts (list, optional): The passages behind `q`, enabling the exact content hash stage.
+            partitions (list, optional): The value of the partition key for every embedding, so a passage is only a duplicate of one indexed in the same partition.
+
+        Returns:
+            list: One boolean per embedding, True when it duplicates an indexed passage.
+        """
+        q = np.asarray(q, dtype=np.float32)
+        verdicts = self.dedupe.check(texts, q, partitions)
+        groups = {}
+        for i, verdict in enumerate(verdicts):
+            if verdict is None:
+                groups.setdefault(partitions[i] if partitions else None, []).append(i)
+        for partition, ambiguous in groups.items():
+            matches = self.db.search(q[ambiguous], limit=1, expr=self._scope(partition))
+            for i, distance in zip(ambiguous, matches.distances[:, 0]):
+                verdicts[i] = bool(distance >= self.dedupe.threshold)
+            remote = [i for i in ambiguous if verdicts[i]]
+            if remote:
+                self.dedupe.remember(
+                    [texts[i] for i in remote] if texts else None,
+                    q[remote],
+                    [partition] * len(remote) if partitions else None,
+                )
+        return verdicts
@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import time
+import asyncio
+from copy import deepcopy
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from magnet.utils.globals import _f, Utils
+from magnet.utils.data_classes import MigrateParams, Run
+from magnet.utils.index.base import load_index
+from magnet.utils.index.bm25 import BM25Index, bm25_path
+from magnet.ize.encoders import load_encoder, BucketedEncoder
+
+
+class Migration:
+    """
+    Re-embeds an existing collection with another model without re-ingesting it from NATS.
+
+    Rows are paged out of the configured collection in primary key order, their `text` re-encoded in large batches
+    with the new model and written, with their `document` and partition, into a shadow collection built in deferred
+    index mode. After every batch the last primary key copied, and the last primary key written to the shadow, are
+    checkpointed in the runs KV under `<run id>.checkpoint` and the run's metrics are updated. A restarted run first
+    truncates the shadow back to the checkpoint, dropping a batch written after it by a run that crashed before it
+    could checkpoint, and resumes after the last batch checkpointed.
+    Once every row is copied the shadow's index is built, the rows written to the collection meanwhile are copied
+    in a last pass, and the shadow is switched in under the configured name.
+
+    Passages keep their text but get new primary keys. With `IndexConfig.hybrid`, a shadow BM25 index is written
+    next to the live one from the same batches, under the shadow's keys, and moved in place of it right after the
+    switch. Rows inserted into, or deleted from, the collection after the last pass read past them are not carried
+    over, so stop its indexers before the migration finishes.
+
+    Args:
+        magnet (Magnet): A connected Magnet whose `config.index` describes the collection to migrate.
+        params (MigrateParams): The new model, its dimension and the batch size.
+    """
+
+    def __init__(self, magnet, params: MigrateParams):
+        self.magnet = magnet
+        self.params = params
+        self.source = load_index(magnet.config)
+        self.config = deepcopy(magnet.config)
+        self.config.session = f"{magnet.config.session}-migrate"
+        self.config.index.model = params.model
+        self.config.index.dimension = params.dimension
+        self.config.index.name = (
+            params.shadow
+            or f"{magnet.config.index.name}_{re.sub(r'[^A-Za-z0-9_]', '_', params.model)}"
+        )
+        self.config.index.index_mode = "deferred"
+        self.config.index.index_rows = 0
+        self.config.index.index_interval = 0.0
+        self.config.index.buffer_rows = 0
+        self.shadow = load_index(self.config)
+        self.lexical = (
+            BM25Index(os.path.join(bm25_path(magnet.config.index), "migrate"))
+            if magnet.config.index.hybrid
+            else None
+        )
+
+    async def _checkpoint(self, run: Run, state: dict = None):
+        key = f"{run._id}.checkpoint"
+        if state is None:
+            try:
+                return json.loads((await self.magnet.runs_kv.get(key)).value)
+            except Exception:
+                return None
+        await self.magnet.runs_kv.put(key=key, value=json.dumps(state).encode("utf-8"))
+        run.metrics = {k: v for k, v in state.items() if k not in ("cursor", "shadow")}
+        await self.magnet.runs_kv.put(
+            key=run._id, value=json.dumps(asdict(run)).encode("utf-8")
+        )
+
+    async def _copy(self, run: Run, state: dict, encoder, fields: list, executor):
+        """
+        Copies the rows after the checkpointed cursor into the shadow, re-encoded, checkpointing after every batch.
+        """
+        loop = asyncio.get_running_loop()
+        pages = self.source.scan(
+            after=state["cursor"],
+            batch_size=self.params.batch_size,
+            output_fields=fields,
+        )
+        while True:
+            rows = await loop.run_in_executor(executor, next, pages, None)
+            if rows is None:
+                break
+            start = time.perf_counter()
+            texts = [row["text"] for row in rows]
+            embeddings = await loop.run_in_executor(
+                executor,
+                lambda: np.asarray(
+                    encoder.encode(
+                        [f"{self.params.instruction} {text}" for text in texts],
+                        normalize_embeddings=True,
+                    ),
+                    dtype=np.float32,
+                ),
+            )
+            keys = await self.shadow.ainsert(
+                [row["document"] for row in rows],
+                texts,
+                embeddings,
+                [row[self.source.partition_field] for row in rows]
+                if self.source.partition_field
+                else None,
+            )
+            if self.lexical is not None:
+                await loop.run_in_executor(executor, self.lexical.add, keys, texts)
+            state["cursor"] = max(int(row["id"]) for row in rows)
+            state["shadow"] = max(int(key) for key in keys)
+            state["rows"] += len(rows)
+            state["seconds"] += time.perf_counter() - start
+            state["rows_per_second"] = state["rows"] / state["seconds"]
+            await self._checkpoint(run, state)
+            _f(
+                "info",
+                f"migrated {state['rows']} rows to {self.config.index.name} ({state['rows_per_second']:.0f} rows/s)",
+            )
+
+    async def run(self, run: Run) -> dict:
+        """
+        Runs or resumes the migration.
+
+        Returns:
+            dict: The collection name, the name the old collection was retired under, the new model and the rows migrated.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="magnet-migrate"
+        )
+        state = await self._checkpoint(run)
+        await self.source.on()
+        await self.source.load()
+        await self.shadow.on()
+        if state:
+            _f(
+                "info",
+                f"resuming migration of {self.magnet.config.index.name} after id {state['cursor']} ({state['rows']} rows copied)",
+            )
+            await self.shadow.load()
+            if "shadow" in state:
+                await loop.run_in_executor(
+                    executor, self.shadow.truncate, state["shadow"]
+                )
+                if self.lexical is not None:
+                    await loop.run_in_executor(
+                        executor, self.lexical.truncate, state["shadow"]
+                    )
+        else:
+            if (
+                await loop.run_in_executor(executor, self.source.target)
+                == self.config.index.name
+            ):
+                raise ValueError(
+                    f"{self.config.index.name} is the collection being migrated, pick another shadow name"
+                )
+            state = {"cursor": -1, "shadow": -1, "rows": 0, "seconds": 0.0}
+            await self.shadow.create(overwrite=True)
+            await self.shadow.load()
+            if self.lexical is not None:
+                self.lexical.clear()
+        encoder = load_encoder(
+            self.params.model,
+            backend=self.config.index.encoder,
+            device=Utils().check_cuda(),
+            path=self.config.index.onnx_path,
+        )
+        if self.config.index.buckets:
+            encoder = BucketedEncoder(encoder, boundaries=self.config.index.buckets)
+        fields = ["document", "text"] + (
+            [self.source.partition_field] if self.source.partition_field else []
+        )
+        closed = False
+        try:
+            await self._copy(run, state, encoder, fields, executor)
+            await loop.run_in_executor(executor, self.shadow.build_index)
+            await self._copy(run, state, encoder, fields, executor)
+            await self.shadow.off()
+            closed = True
+            retired = await loop.run_in_executor(
+                executor, self.source.switch, self.config.index.name, self.params.keep
+            )
+            if self.lexical is not None:
+                await loop.run_in_executor(
+                    executor, self.lexical.move, bm25_path(self.magnet.config.index)
+                )
+            _f(
+                "success",
+                f"{self.magnet.config.index.name} now holds {state['rows']} rows embedded with {self.params.model}; restart its readers with the new model and dimension",
+            )
+            return {
+                "collection": self.magnet.config.index.name,
+                "retired": retired,
+                "model": self.params.model,
+                "rows": state["rows"],
+            }
+        finally:
+            if not closed:
+                await self.shadow.off()
+            await self.source.off()
+            executor.shutdown(wait=False)
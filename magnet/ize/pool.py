@@ -0,0 +1,234 @@
+import os
+import mmap
+import queue
+import tempfile
+import threading
+import multiprocessing as mp
+import numpy as np
+from magnet.utils.globals import _f
+
+POLL_SECONDS = 1.0
+
+
+def _shm_dir():
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _map(path: str, size: int):
+    """
+    Maps a shared file read-write and unlinks it, so the mapping lives exactly as long as the arrays viewing it.
+    """
+    fd = os.open(path, os.O_RDWR)
+    try:
+        return mmap.mmap(fd, size)
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+
+def _worker(
+    model: str, backend: str, path: str, threads: int, cores: list, tasks, done
+):
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    import torch
+    from magnet.ize.encoders import load_encoder
+
+    torch.set_num_threads(threads)
+    encoder = load_encoder(
+        model, backend=backend, device="cpu", path=path, threads=threads
+    )
+    done.put(
+        ("ready", encoder.get_sentence_embedding_dimension(), encoder.max_seq_length)
+    )
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        job, texts_path, bounds, out_path, row, batch_size, normalize = task
+        try:
+            raw = np.memmap(texts_path, dtype=np.uint8, mode="r")
+            texts = [
+                raw[start:end].tobytes().decode("utf-8")
+                for start, end in zip(bounds[:-1], bounds[1:])
+            ]
+            out = np.memmap(out_path, dtype=np.float32, mode="r+")
+            out = out.reshape(-1, encoder.get_sentence_embedding_dimension())
+            out[row : row + len(texts)] = encoder.encode(
+                texts,
+                batch_size=batch_size,
+                normalize_embeddings=normalize,
+                convert_to_numpy=True,
+            )
+            out.flush()
+            del raw, out
+            done.put((job, None))
+        except Exception as e:
+            done.put((job, str(e)))
+
+
+class EncoderPool:
+    """
+    A pool of encoder processes for CPU-only index nodes, each holding its own copy of the model with a pinned thread count.
+
+    Batches are handed to the workers over shared memory: the passages are written once as UTF-8 into a shared file
+    that every worker maps, and each worker writes its slice of the embeddings straight into a shared output file.
+    `encode` returns a NumPy view onto that output mapping, so results come back without pickling or copying.
+    The pool mirrors the parts of `SentenceTransformer` that `Memory` uses (`encode`, `tokenizer`, `max_seq_length`, `device`).
+
+    Args:
+        model (str): The sentence-transformers model to load in every worker.
+        processes (int, optional): The number of encoder processes. Defaults to the number of cores divided by `threads`.
+        threads (int, optional): The torch threads, and pinned cores where supported, per process. Defaults to 1.
+        batch_size (int, optional): The batch size each worker encodes with. Defaults to 32.
+        backend (str, optional): The encoder backend each worker loads, see `load_encoder`. Defaults to 'torch'.
+        path (str, optional): The export directory of the `onnx` backend. The model is exported once, before the workers start.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        processes: int = None,
+        threads: int = 1,
+        batch_size: int = 32,
+        backend: str = "torch",
+        path: str = None,
+    ):
+        from transformers import AutoTokenizer
+
+        if backend == "onnx":
+            from magnet.ize.encoders import export_onnx
+
+            path = os.path.dirname(export_onnx(model, path))
+        cores = (
+            sorted(os.sched_getaffinity(0))
+            if hasattr(os, "sched_getaffinity")
+            else list(range(os.cpu_count()))
+        )
+        self.processes = processes if processes else max(1, len(cores) // threads)
+        self.batch_size = batch_size
+        self.device = "cpu"
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        self._lock = threading.Lock()
+        self._job = 0
+        ctx = mp.get_context("spawn")
+        self._done = ctx.Queue()
+        self._tasks = [ctx.Queue() for _ in range(self.processes)]
+        self._workers = []
+        for i, tasks in enumerate(self._tasks):
+            pinned = (
+                cores[i * threads : (i + 1) * threads]
+                if len(cores) >= self.processes * threads
+                else []
+            )
+            worker = ctx.Process(
+                target=_worker,
+                args=(model, backend, path, threads, pinned, tasks, self._done),
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+        try:
+            for _ in self._workers:
+                _, self.dimension, self.max_seq_length = self._wait("ready")
+        except RuntimeError:
+            for worker in self._workers:
+                worker.terminate()
+            raise
+        _f(
+            "success",
+            f"{self.processes} encoder processes ready with {threads} threads each",
+        )
+
+    def _wait(self, job):
+        """
+        Returns the next message the workers sent about `job`, dropping leftovers of earlier jobs. Raises instead of
+        waiting forever once a worker has died, as a dead worker never answers.
+        """
+        while True:
+            try:
+                message = self._done.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                dead = [worker for worker in self._workers if not worker.is_alive()]
+                if dead:
+                    raise RuntimeError(
+                        f"encoder pool worker {dead[0].pid} exited with code {dead[0].exitcode}"
+                    )
+                continue
+            if message[0] == job:
+                return message
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = None,
+        normalize_embeddings: bool = True,
+        **kwargs,
+    ):
+        """
+        Encodes passages across the worker processes.
+
+        Returns:
+            ndarray: A (len(sentences), dimension) float32 view onto shared memory, or a single vector for a single string.
+        """
+        if isinstance(sentences, str):
+            return self.encode(
+                [sentences],
+                batch_size=batch_size,
+                normalize_embeddings=normalize_embeddings,
+            )[0]
+        if not sentences:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        data = [sentence.encode("utf-8") for sentence in sentences]
+        bounds = np.concatenate([[0], np.cumsum([len(d) for d in data])]).tolist()
+        size = len(data) * self.dimension * 4
+        with self._lock:
+            self._job += 1
+            fd, texts_path = tempfile.mkstemp(prefix="magnet-in-", dir=_shm_dir())
+            with os.fdopen(fd, "wb") as texts:
+                texts.write(b"".join(data))
+            fd, out_path = tempfile.mkstemp(prefix="magnet-out-", dir=_shm_dir())
+            os.ftruncate(fd, size)
+            os.close(fd)
+            try:
+                slices = np.array_split(
+                    np.arange(len(data)), min(self.processes, len(data))
+                )
+                for tasks, rows in zip(self._tasks, slices):
+                    lo, hi = int(rows[0]), int(rows[-1]) + 1
+                    tasks.put(
+                        (
+                            self._job,
+                            texts_path,
+                            bounds[lo : hi + 1],
+                            out_path,
+                            lo,
+                            batch_size or self.batch_size,
+                            normalize_embeddings,
+                        )
+                    )
+                errors = []
+                for _ in slices:
+                    _, error = self._wait(self._job)
+                    if error:
+                        errors.append(error)
+                buffer = _map(out_path, size)
+            finally:
+                for path in (texts_path, out_path):
+                    if os.path.exists(path):
+                        os.unlink(path)
+        if errors:
+            raise RuntimeError(f"encoder pool failed: {errors[0]}")
+        return np.frombuffer(buffer, dtype=np.float32).reshape(
+            len(data), self.dimension
+        )
+
+    def close(self):
+        for tasks in self._tasks:
+            tasks.put(None)
+        for worker in self._workers:
+            worker.join()
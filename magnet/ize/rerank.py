@@ -0,0 +1,70 @@
+import numpy as np
+
+
+def mmr(query, embeddings, k: int, diversity: float = 0.5) -> list:
+    """
+    Selects `k` rows by maximal marginal relevance: each pick maximizes its similarity to the query minus
+    `diversity` times its largest similarity to the rows already picked, so near-duplicate chunks of the same
+    passage do not crowd out other evidence.
+
+    Args:
+        query (np.ndarray): The normalized query embedding.
+        embeddings (np.ndarray): The (n, dimension) normalized embeddings of the candidates.
+        k (int): The number of rows to select.
+        diversity (float, optional): Between 0 (pure relevance) and 1 (pure novelty). Defaults to 0.5.
+
+    Returns:
+        list: The indices of the selected rows, in selection order.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if not len(embeddings):
+        return []
+    relevance = embeddings @ np.asarray(query, dtype=np.float32)
+    similarity = embeddings @ embeddings.T
+    redundancy = np.full(len(embeddings), -np.inf, dtype=np.float32)
+    available = np.ones(len(embeddings), dtype=bool)
+    picked = []
+    for _ in range(min(k, len(embeddings))):
+        scores = (
+            (1 - diversity) * relevance - diversity * redundancy
+            if picked
+            else relevance.copy()
+        )
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[:, best])
+    return picked
+
+
+class Reranker:
+    """
+    Rescores query-passage pairs with a sentence-transformers cross-encoder, in batches.
+
+    Args:
+        model (str): The cross-encoder model name, e.g. `cross-encoder/ms-marco-MiniLM-L-6-v2`.
+        device (str, optional): The device to run on. Defaults to 'cpu'.
+        batch_size (int, optional): The pairs scored per forward pass. Defaults to 32.
+    """
+
+    def __init__(self, model: str, device: str = "cpu", batch_size: int = 32):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model, device=device)
+        self.batch_size = batch_size
+
+    def rerank(self, query: str, texts: list, k: int) -> tuple:
+        """
+        Returns the indices of the `k` passages the cross-encoder scores highest for the query, best first, and their scores.
+        """
+        if not texts:
+            return [], []
+        scores = np.asarray(
+            self.model.predict(
+                [(query, text) for text in texts], batch_size=self.batch_size
+            ),
+            dtype=np.float32,
+        )
+        order = np.argsort(-scores, kind="stable")[:k]
+        return order.tolist(), scores[order].tolist()
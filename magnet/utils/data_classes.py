@@ -6,12 +6,14 @@ from typing import List, Optional, Callable
 from datetime import datetime
 from numpy import ndarray
 
+
 @dataclass
 class Status:
     timestamp: datetime
     type: str  # e.g., 'success', 'warn', 'fatal', 'info', etc.
     content: str
 
+
 @dataclass
 class ProcessParams:
     resource_id: str
@@ -20,36 +22,61 @@ class ProcessParams:
     data_source: str
     processing_options: Dict[str, Any]  # E.g., {'filter': True, 'normalize': False}
 
+
 @dataclass
 class InferenceParams:
     resource_id: str
     location: str
     data_source: str
     model_id: str
-    inference_options: Dict[str, Any]  # E.g., {'batch_size': 32, 'confidence_threshold': 0.5}
+    inference_options: Dict[
+        str, Any
+    ]  # E.g., {'batch_size': 32, 'confidence_threshold': 0.5}
+
 
 @dataclass
 class TrainParams:
     resource_id: str
     data_source: str
     model: str
-    training_options: Dict[str, Any]  # E.g., {'early_stopping': True, 'augmentation': True}
+    training_options: Dict[
+        str, Any
+    ]  # E.g., {'early_stopping': True, 'augmentation': True}
+
 
 @dataclass
 class AcquireParams:
     resource_id: str
     data_source: str
     location: str
-    acquisition_options: Dict[str, Any]  # E.g., {'timeout': 120, 'retry_on_failure': True}
+    acquisition_options: Dict[
+        str, Any
+    ]  # E.g., {'timeout': 120, 'retry_on_failure': True}
+
+
+@dataclass
+class MigrateParams:
+    model: str  # the sentence-transformers model the collection is re-embedded with
+    dimension: int
+    shadow: Optional[
+        str
+    ] = None  # the collection written to, defaults to `<name>_<model>`
+    batch_size: int = 1024
+    keep: bool = (
+        True  # keep the replaced collection under a retired name instead of dropping it
+    )
+    instruction: str = "Represent this information for searching relevant passages: "
+
 
 # The main Job class remains as you defined it:
 @dataclass
 class Job:
-    params: AcquireParams | TrainParams | InferenceParams | ProcessParams  # This will be one of the above parameter classes
+    params: AcquireParams | TrainParams | InferenceParams | ProcessParams | MigrateParams  # This will be one of the above parameter classes
     _type: str
     _id: str
     _isClaimed: bool = False
 
+
 @dataclass
 class Run:
     _id: str
@@ -61,6 +88,7 @@ class Run:
     results: Optional[Dict[str, Any]] = None
     metrics: Optional[Dict[str, Any]] = None
 
+
 @dataclass
 class AskParameters:
     m: str = "mistralai/Mistral-7B-Instruct-v0.1"
@@ -73,6 +101,7 @@ class AskParameters:
     context: str = ""
     vllm: bool = False
 
+
 @dataclass
 class IndexConfig:
     milvus_uri: Optional[str] = None
@@ -83,6 +112,57 @@ class IndexConfig:
     model: Optional[str] = None
     name: Optional[str] = None
     options: Dict[Optional[dict], Any] = field(default_factory=dict)
+    chunk_overlap: int = 0  # tokens shared by consecutive chunks of a long passage
+    dedupe_capacity: int = 10000  # recent passages kept by the in-process dupe filter
+    dedupe_threshold: float = 0.98
+    cache_capacity: int = 1024  # in-memory embedding cache entries, 0 disables the tier
+    cache_path: Optional[str] = None  # on-disk cache tier, kept per model and encoder
+    io_workers: int = 4  # threads serving index calls off the event loop
+    heartbeat: float = (
+        30.0  # seconds between `in_progress` acks while a batch is indexed
+    )
+    pool_processes: int = 0  # encoder processes on CPU-only nodes, 0 encodes in-process
+    pool_threads: int = 1  # torch threads pinned per encoder process
+    encoder: str = "torch"  # 'torch' (fp32), 'int8' (dynamically quantized torch) or 'onnx' (ONNX Runtime CPU)
+    onnx_path: Optional[str] = None  # export directory of the onnx encoder
+    buckets: List[int] = field(
+        default_factory=lambda: [64, 128, 256]
+    )  # upper token lengths of the encoder's length buckets, empty disables bucketing
+    backend: str = "milvus"  # 'milvus' or 'embedded'
+    path: Optional[str] = None  # root directory of embedded collections
+    exact_limit: int = 50000  # rows below which the embedded backend searches exactly instead of through HNSW
+    index_mode: str = "eager"  # 'eager' builds `options` at create, 'deferred' serves a FLAT index until a build trigger fires
+    index_rows: int = 100000  # unindexed rows that trigger a deferred build, 0 disables the size trigger
+    index_interval: float = 0.0  # seconds after the first pending row when the deferred build fires, 0 disables the time trigger
+    partition_key: Optional[
+        str
+    ] = None  # 'document', 'session' or the name of a tenant field rows are partitioned by
+    buffer_rows: int = (
+        0  # rows buffered before a bulk insert, 0 inserts every batch directly
+    )
+    buffer_age: float = 2.0  # seconds a buffered row may wait before a flush
+    buffer_path: Optional[
+        str
+    ] = None  # directory of the insert buffers' write-ahead logs, one locked subdirectory per process
+    milvus_connections: int = 1  # gRPC connections calls are spread over
+    milvus_dispatch: str = "round_robin"  # 'round_robin' or 'least_busy'
+    milvus_health: float = (
+        30.0  # seconds between connection health checks, 0 disables them
+    )
+    vector_storage: str = "float32"  # 'float32', 'float16', 'int8' (scalar quantized) or 'pq' (product quantized)
+    pq_m: int = 64  # bytes per vector of 'pq' storage, a divisor of the dimension
+    hybrid: bool = False  # keep a BM25 index of `text` and fuse it with vector hits in `Memory.search`
+    bm25_path: Optional[
+        str
+    ] = None  # directory of the BM25 index, defaults to ~/.cache/magnet/bm25/<name>; must be shared storage when indexing and searching processes run on different hosts
+    mmr_diversity: float = (
+        0.5  # weight of novelty against relevance when `Memory.search` applies MMR
+    )
+    reranker: Optional[
+        str
+    ] = None  # cross-encoder model `Memory.search` can rerank with
+    rerank_batch_size: int = 32
+
 
 @dataclass
 class MagnetConfig:
@@ -95,6 +175,19 @@ class MagnetConfig:
     kv_name: str = None
     os_name: str = None
     index: Optional[IndexConfig] = None
+    codec: str = "json"  # wire codec of pulsed payloads: json, msgpack or ndarray
+    dedupe: Optional[
+        str
+    ] = "content"  # Nats-Msg-Id of pulsed payloads: 'content' (hash of the encoded bytes), 'id' (subject and `_id`), 'key' (hash of the subject and the scalar fields) or None
+    compression: Optional[str] = None  # 'zstd' or 'lz4' to compress pulsed payloads
+    compression_threshold: int = (
+        1024  # encoded bytes below which payloads are sent uncompressed
+    )
+    compression_level: int = 3  # zstd compression level
+    compression_dictionary: Optional[
+        str
+    ] = None  # name of a zstd dictionary trained with `Charge.train_dictionary`
+
 
 @dataclass
 class Payload:
@@ -104,9 +197,13 @@ class Payload:
     Args:
         content (object | list | str | dict): The information associated with the payload.
         _id (str): The id associated with the payload.
+        tenant (str, optional): The partition the payload is indexed into when `IndexConfig.partition_key` names a tenant field.
     """
+
     content: object | list | str | dict | ndarray
     _id: str
+    tenant: Optional[str] = None
+
 
 @dataclass
 class FilePayload:
@@ -114,12 +211,17 @@ class FilePayload:
     Represents a payload with two main fields: data and _id.
 
     Args:
-        data (list): The bytearray associated with the payload.
+        original_filename (str): The name of the file, whose extension is stored with the object.
         _id (str): The document associated with the payload.
+        data (bytes, optional): The bytearray associated with the payload.
+        path (str, optional): A local file streamed to the object store in chunks instead of `data`.
     """
-    data: bytes
+
     original_filename: str
     _id: str
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
 
 @dataclass
 class GeneratedPayload:
@@ -133,12 +235,14 @@ class GeneratedPayload:
         result (str): The result generated by the system.
         model (str): The model used to generate the payload.
     """
+
     query: str
     prompt: str
     context: list
     result: str
     model: str
 
+
 @dataclass
 class EmbeddingPayload:
     """
@@ -146,15 +250,51 @@ class EmbeddingPayload:
 
     Attributes:
         document (str): The document associated with the text data.
-        embedding (list): The embedding of the text data.
+        embedding (list | ndarray): The embedding of the text data.
         text (list): The text of the data.
         model (str): The model used for embedding the text data.
     """
+
     document: str
-    embedding: list
+    embedding: list | ndarray
     content: list
     model: str
 
+
+@dataclass
+class SearchResults:
+    """
+    Represents the columnar results of a batch search, one row per query.
+
+    Attributes:
+        ids (ndarray): The (queries, limit) int64 primary keys of the hits, -1 where a query returned fewer than `limit` hits.
+        distances (ndarray): The (queries, limit) float32 scores of the hits, NaN where padded.
+        fields (dict): The requested output fields. `embedding` is a (queries, limit, dimension) float32 array, every other field is a list of per-query lists.
+    """
+
+    ids: ndarray
+    distances: ndarray
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class PulseResult:
+    """
+    Represents the outcome of publishing one payload with `Charge.pulse_many`.
+
+    Attributes:
+        _id (str): The id of the payload, or its position in the batch for payloads without one.
+        ack (object): The JetStream publish ack, None if the payload could not be published.
+        error (str): The last error raised while publishing, None on success.
+        attempts (int): The publishes attempted, retries included.
+    """
+
+    _id: str
+    ack: Optional[object] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
 @dataclass
 class MistralArgs:
     """
@@ -180,6 +320,7 @@ class MistralArgs:
     norm_eps: float
     vocab_size: int
 
+
 @dataclass
 class JobParams:
     milvus_host: str
@@ -195,4 +336,4 @@ class JobParams:
     job_type: str
     job_n: int
     embedding_model: str
-    generation_model: str
\ No newline at end of file
+    generation_model: str
@@ -6,43 +6,128 @@ import boto3
 import inspect
 from transformers import AutoTokenizer
 
+_WHITESPACE = re.compile(r"\s")
+
+
 def break_into_chunks(text, max_words):
     """
     Break a text into chunks of a specified maximum number of words.
-    
+
+    Superseded by `sliding_window_chunks` for embedding, which respects the model's token budget.
+
     Parameters:
     - text (str): The text to break into chunks.
     - max_words (int): The maximum number of words per chunk.
-    
+
     Returns:
     - List[str]: A list of text chunks, each with up to max_words words.
     """
     words = text.split()  # Split the text into individual words
-    
+
     chunks = []  # Initialize an empty list to hold the chunks of text
     current_chunk = []  # Initialize an empty list to build up the current chunk
-    
+
     for word in words:
         current_chunk.append(word)  # Add the current word to the chunk
-        if len(current_chunk) == max_words:  # If the chunk reaches the max size, add it to the chunks list
-            chunks.append(" ".join(current_chunk))  # Join the words in the chunk into a string
+        if (
+            len(current_chunk) == max_words
+        ):  # If the chunk reaches the max size, add it to the chunks list
+            chunks.append(
+                " ".join(current_chunk)
+            )  # Join the words in the chunk into a string
             current_chunk = []  # Reset the current chunk to empty
-    
-    if current_chunk:  # If there are any remaining words in the current chunk, add them as a final chunk
+
+    if (
+        current_chunk
+    ):  # If there are any remaining words in the current chunk, add them as a final chunk
         chunks.append(" ".join(current_chunk))
-    
+
     return chunks
 
+
+def sliding_window_chunks(
+    text, tokenizer, max_tokens, overlap=0, block_chars=65536, batch_blocks=8
+):
+    """
+    Stream overlapping token windows over a text, without materialising it as a word list.
+
+    The text is cut into blocks of roughly `block_chars` characters at whitespace boundaries, and the blocks are
+    tokenized in batches of `batch_blocks` with a fast tokenizer's offset mapping. Windows of up to `max_tokens`
+    tokens are emitted as character offsets into `text`, each starting `max_tokens - overlap` tokens after the last.
+
+    Parameters:
+    - text (str): The text to chunk.
+    - tokenizer (PreTrainedTokenizerFast): The embedding model's tokenizer, e.g. `SentenceTransformer.tokenizer`.
+    - max_tokens (int): The token budget of a single window, excluding special tokens.
+    - overlap (int): The number of tokens shared by consecutive windows.
+    - block_chars (int): The approximate size of the blocks handed to the tokenizer.
+    - batch_blocks (int): The number of blocks tokenized per tokenizer call.
+
+    Yields:
+    - Tuple[int, int]: The `(start, end)` character offsets of each window, so `text[start:end]` is the chunk.
+    """
+    if not getattr(tokenizer, "is_fast", False):
+        raise ValueError(
+            "sliding_window_chunks requires a fast tokenizer for offset mappings"
+        )
+    if max_tokens < 1 or not 0 <= overlap < max_tokens:
+        raise ValueError(
+            f"invalid window of {max_tokens} tokens with {overlap} overlap"
+        )
+    stride = max_tokens - overlap
+
+    def _blocks():
+        start = 0
+        while start < len(text):
+            match = _WHITESPACE.search(text, start + block_chars)
+            end = match.start() if match else len(text)
+            yield start, end
+            start = end
+
+    def _spans():
+        batch = []
+        for block in _blocks():
+            batch.append(block)
+            if len(batch) == batch_blocks:
+                yield from _tokenize(batch)
+                batch = []
+        if batch:
+            yield from _tokenize(batch)
+
+    def _tokenize(batch):
+        encoded = tokenizer(
+            [text[start:end] for start, end in batch],
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        for (start, _), offsets in zip(batch, encoded["offset_mapping"]):
+            for s, e in offsets:
+                if e > s:
+                    yield start + s, start + e
+
+    spans = []  # token character spans not yet consumed by a window
+    head = 0  # index of the first span of the next window
+    covered = 0  # spans from `head` that the previous window already emitted
+    for span in _spans():
+        spans.append(span)
+        if len(spans) - head == max_tokens:
+            yield spans[head][0], spans[-1][1]
+            head += stride
+            covered = overlap
+            if head > 4 * max_tokens:
+                spans = spans[head:]
+                head = 0
+    if len(spans) - head > covered:
+        yield spans[head][0], spans[-1][1]
+
+
 def reversal():
     return inspect.getsource(inspect.currentframe().f_back)
 
 
-def _f(
-    tag: str = None,
-    body: any = None,
-    no_print: bool = False,
-    luxe: bool = False
-):
+def _f(tag: str = None, body: any = None, no_print: bool = False, luxe: bool = False):
     """
     The `_f` function is a logging utility that prints messages with different tags and colors based on
     the provided parameters.
@@ -129,6 +214,7 @@ def _f(
     else:
         print(f"😭 UNKNOWN TAG - `{tag}`")
 
+
 class Utils:
     """
     The `Utils` class provides various utility functions for tasks such as checking CUDA availability, normalizing text, and uploading files to Amazon S3.
@@ -172,16 +258,15 @@ class Utils:
         if torch.cuda.is_available():
             _f("success", "CUDA is available on this machine.")
             # You can also print additional information like the number of available GPUs:
-            _f("info",
-               f"Number of available GPUs - {torch.cuda.device_count()}")
+            _f("info", f"Number of available GPUs - {torch.cuda.device_count()}")
             # To get the name of the GPU:
             _f(
                 "info", f"GPU Name - {torch.cuda.get_device_name(0)}"
             )  # 0 is the GPU index
-            return 'cuda'
+            return "cuda"
         else:
             _f("warn", "CUDA is not available on this machine.")
-            return 'cpu'
+            return "cpu"
 
     def normalize_text(self, _):
         """
@@ -198,10 +283,9 @@ class Utils:
             )
         try:
             if not isinstance(_, str):
-                _f('warn', f'non-string found {type(_)}')
+                _f("warn", f"non-string found {type(_)}")
             _ = _.strip()
-            _ = _.replace('.', '') if (
-                _.count('.') / len(_)) * 100 > 0.3 else _
+            _ = _.replace(".", "") if (_.count(".") / len(_)) * 100 > 0.3 else _
 
             # Check if more than 20% of the string is integers
             num_digits = sum(1 for char in _ if char.isdigit())
@@ -263,17 +347,18 @@ class Utils:
         _f("warn", f"uploading to S3 - {file_or_dir}")
         if os.path.isfile(os.path.abspath(file_or_dir)):
             s3.upload_file(
-                os.path.abspath(
-                    file_or_dir), bucket, f'{bucket_path}/{file_or_dir.split("/")[-1]}'
+                os.path.abspath(file_or_dir),
+                bucket,
+                f'{bucket_path}/{file_or_dir.split("/")[-1]}',
+            )
+            _f(
+                "success",
+                f'uploaded - {bucket}/{bucket_path}/{file_or_dir.split("/")[-1]}',
             )
-            _f("success",
-               f'uploaded - {bucket}/{bucket_path}/{file_or_dir.split("/")[-1]}')
         elif os.path.isdir(os.path.abspath(file_or_dir)):
             for filename in os.listdir(file_or_dir):
                 f = os.path.join(file_or_dir, filename)
                 s3.upload_file(
-                    os.path.abspath(
-                        f), bucket, f'{bucket_path}/{f.split("/")[-1]}'
+                    os.path.abspath(f), bucket, f'{bucket_path}/{f.split("/")[-1]}'
                 )
-                _f("success",
-                   f'uploaded - {bucket}/{bucket_path}/{f.split("/")[-1]}')
\ No newline at end of file
+                _f("success", f'uploaded - {bucket}/{bucket_path}/{f.split("/")[-1]}')
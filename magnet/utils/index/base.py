@@ -0,0 +1,163 @@
+import os
+import json
+import asyncio
+from magnet.utils.data_classes import MagnetConfig, SearchResults
+from magnet.utils.index.buffer import InsertBuffer
+
+BACKENDS = ("milvus", "embedded")
+
+
+class IndexBackend:
+    """
+    The interface `Memory` stores and searches passages through. Every backend keeps rows of `document`, `text`
+    and a normalized `embedding`, identified by an int64 primary key.
+
+    Args:
+        config (MagnetConfig): The configuration whose `index` section describes the collection.
+    """
+
+    def __init__(self, config: MagnetConfig):
+        self.config = config
+        self.partition_key = config.index.partition_key
+        self.partition_field = (
+            self.partition_key if self.partition_key not in (None, "document") else None
+        )
+        self.buffer = (
+            InsertBuffer(
+                self.insert,
+                config.index.dimension,
+                config.index.buffer_path
+                or os.path.join("~/.cache/magnet/wal", config.index.name),
+                max_rows=config.index.buffer_rows,
+                max_age=config.index.buffer_age,
+            )
+            if config.index.buffer_rows
+            else None
+        )
+        self.executor = None
+
+    async def _arun(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, fn, *args
+        )
+
+    def partition_expr(self, value) -> str:
+        """
+        Returns the filter expression selecting the partition `value` of the partition key.
+        """
+        if not self.partition_key:
+            raise ValueError("searching a partition needs `IndexConfig.partition_key`")
+        return f"{self.partition_key} == {json.dumps(str(value))}"
+
+    async def on(self):
+        raise NotImplementedError
+
+    async def off(self):
+        raise NotImplementedError
+
+    async def create(self, overwrite=False):
+        raise NotImplementedError
+
+    async def load(self):
+        raise NotImplementedError
+
+    def insert(
+        self, documents: list, texts: list, embeddings, partitions: list = None
+    ) -> list:
+        """
+        Writes rows in one column-oriented batch and returns their primary keys. `partitions` fills the `session` or
+        tenant partition field, one value per row, and defaults to the session.
+        """
+        raise NotImplementedError
+
+    def search(
+        self, embeddings, limit: int = 1, output_fields: list = None, expr: str = None
+    ) -> SearchResults:
+        """
+        Runs one multi-vector search, restricted to the rows matching the filter `expr` when given, and returns the hits as columnar `SearchResults`.
+        """
+        raise NotImplementedError
+
+    def query(self, expr: str, output_fields: list = None) -> list:
+        """
+        Returns the rows matching the filter `expr`, e.g. `id in [1, 2]`, as dicts of their `id` and `output_fields`.
+        """
+        raise NotImplementedError
+
+    async def ainsert(
+        self, documents: list, texts: list, embeddings, partitions: list = None
+    ) -> list:
+        return await self._arun(self.insert, documents, texts, embeddings, partitions)
+
+    async def asearch(
+        self, embeddings, limit: int = 1, output_fields: list = None, expr: str = None
+    ) -> SearchResults:
+        return await self._arun(self.search, embeddings, limit, output_fields, expr)
+
+    async def aquery(self, expr: str, output_fields: list = None) -> list:
+        return await self._arun(self.query, expr, output_fields)
+
+    def scan(self, after: int = -1, batch_size: int = 1000, output_fields: list = None):
+        """
+        Yields the rows with a primary key above `after` in ascending key order, `batch_size` at a time, as lists of dicts of their `id` and `output_fields`.
+        """
+        raise NotImplementedError
+
+    def truncate(self, after: int):
+        """
+        Deletes every row with a primary key above `after`, i.e. every row inserted after the row `after`.
+        """
+        raise NotImplementedError
+
+    def target(self) -> str:
+        """
+        Returns the name of the collection the configured name currently resolves to.
+        """
+        return self.config.index.name
+
+    def switch(self, shadow: str, keep: bool = True):
+        """
+        Puts the collection `shadow` in place of the configured one, which is kept aside or, without `keep`, dropped.
+        How atomic the switch is depends on the backend, see its implementation.
+
+        Returns:
+            str: The name the replaced collection was retired under, or None when it was dropped.
+        """
+        raise NotImplementedError
+
+    def build_index(self, options: dict = None, timeout: float = None):
+        """
+        Builds the index over every row. Backends that keep their index current on every insert do nothing.
+        """
+        return None
+
+    def maybe_build_index(self):
+        """
+        Builds the index when a deferred build is due. Backends that keep their index current on every insert do nothing.
+        """
+        return None
+
+    def info(self):
+        raise NotImplementedError
+
+    async def delete_index(self):
+        raise NotImplementedError
+
+    def list_indices(self):
+        raise NotImplementedError
+
+
+def load_index(config: MagnetConfig) -> IndexBackend:
+    """
+    Returns the index backend selected by `config.index.backend`, either `milvus` (a Milvus server) or `embedded` (local memory-mapped files).
+    """
+    backend = config.index.backend
+    if backend == "milvus":
+        from magnet.utils.index.milvus import MilvusDB
+
+        return MilvusDB(config)
+    if backend == "embedded":
+        from magnet.utils.index.embedded import EmbeddedDB
+
+        return EmbeddedDB(config)
+    raise ValueError(f"unknown index backend `{backend}`, expected one of {BACKENDS}")
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import math
+import array
+import threading
+from collections import Counter
+import numpy as np
+
+_TOKEN = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercases a passage and splits it into terms, keeping identifiers such as `BRK.B`, `X-1024` or `10/32` whole.
+    """
+    return _TOKEN.findall(text.lower())
+
+
+def bm25_path(index) -> str:
+    """
+    Returns the directory of the BM25 index kept for `IndexConfig` `index`.
+    """
+    return index.bm25_path or os.path.join("~/.cache/magnet/bm25", index.name)
+
+
+class BM25Index:
+    """
+    An incrementally maintained BM25 inverted index over passages, keyed by the primary keys of the vector index.
+
+    Postings are compact arrays of internal row numbers and term frequencies, scored with NumPy per query term.
+    Every `add` is appended to `bm25.jsonl` under `path` and the file is replayed by `load`, so the index survives
+    restarts without a rebuild. The file is the source of truth: `search` first tails the lines other processes
+    appended since the last read, and reloads it whole when it was removed or replaced, e.g. by a `clear` or a
+    migration elsewhere. A process that only searches therefore sees what the writers index, as long as they
+    share the file; on several hosts `path` has to be on shared storage.
+
+    Args:
+        path (str, optional): The directory holding `bm25.jsonl`. Defaults to keeping the index in memory only.
+        k1 (float, optional): The term frequency saturation. Defaults to 1.2.
+        b (float, optional): The document length normalization. Defaults to 0.75.
+    """
+
+    def __init__(self, path: str = None, k1: float = 1.2, b: float = 0.75):
+        self.path = os.path.expanduser(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.clear(remove=False)
+
+    def clear(self, remove: bool = True):
+        """
+        Empties the index, deleting its file unless `remove` is False.
+        """
+        self.keys = array.array("q")
+        self.lengths = array.array("I")
+        self.postings = {}
+        self._total = 0
+        self._offset = 0
+        self._inode = None
+        self._head = b""
+        if remove and self.path and os.path.exists(self._file()):
+            os.remove(self._file())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _file(self):
+        return os.path.join(self.path, "bm25.jsonl")
+
+    def _index(self, key: int, terms: dict):
+        row = len(self.keys)
+        self.keys.append(int(key))
+        self.lengths.append(sum(terms.values()))
+        self._total += self.lengths[-1]
+        for term, tf in terms.items():
+            rows, tfs = self.postings.setdefault(
+                term, (array.array("I"), array.array("I"))
+            )
+            rows.append(row)
+            tfs.append(tf)
+
+    def load(self):
+        """
+        Rebuilds the index from its file.
+        """
+        with self._lock:
+            self.clear(remove=False)
+            self._refresh()
+        return self
+
+    def refresh(self):
+        """
+        Indexes the lines appended to the index file since it was last read, rebuilding the index when the file was
+        removed or replaced.
+        """
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self._file())
+        except FileNotFoundError:
+            if self._inode is not None:
+                self.clear(remove=False)
+            return
+        if self._inode not in (None, stat.st_ino) or stat.st_size < self._offset:
+            self.clear(remove=False)
+        self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self._file(), "rb") as log:
+            # a file removed and written again can get the old inode back, its first line tells them apart
+            if self._head and log.read(len(self._head)) != self._head:
+                self.clear(remove=False)
+                self._inode = stat.st_ino
+            log.seek(self._offset)
+            data = log.read(stat.st_size - self._offset)
+        # a writer may be midway through a line, which is read on the next refresh
+        data = data[: data.rfind(b"\n") + 1]
+        if not self._offset:
+            self._head = data[: data.find(b"\n") + 1]
+        for line in data.splitlines():
+            key, terms = json.loads(line)
+            self._index(key, terms)
+        self._offset += len(data)
+
+    def add(self, keys: list, texts: list):
+        """
+        Indexes passages under their primary keys. With a `path`, they are appended to the index file in one write
+        and indexed from it along with any lines other processes appended before them.
+        """
+        entries = [
+            (int(key), dict(Counter(tokenize(text)))) for key, text in zip(keys, texts)
+        ]
+        with self._lock:
+            if not self.path:
+                for key, terms in entries:
+                    self._index(key, terms)
+                return
+            os.makedirs(self.path, exist_ok=True)
+            fd = os.open(self._file(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(
+                    fd,
+                    "".join(
+                        json.dumps([key, terms]) + "\n" for key, terms in entries
+                    ).encode("utf-8"),
+                )
+            finally:
+                os.close(fd)
+            self._refresh()
+
+    def truncate(self, after: int):
+        """
+        Drops every passage whose primary key is above `after` from the index and its file.
+        """
+        with self._lock:
+            self._refresh()
+            if not self.path or not os.path.exists(self._file()):
+                return
+            with open(self._file(), "rb") as log:
+                lines = [line for line in log if json.loads(line)[0] <= after]
+            with open(f"{self._file()}.tmp", "wb") as log:
+                log.writelines(lines)
+            os.replace(f"{self._file()}.tmp", self._file())
+            self.clear(remove=False)
+            self._refresh()
+
+    def move(self, path: str):
+        """
+        Moves the index file into `path` in a single rename, replacing the index kept there, and follows it. Processes
+        searching the index at `path` rebuild from the new file on their next search.
+        """
+        with self._lock:
+            source, self.path = self._file(), os.path.expanduser(path)
+            os.makedirs(self.path, exist_ok=True)
+            if os.path.exists(source):
+                os.replace(source, self._file())
+                self._inode = os.stat(self._file()).st_ino
+            elif os.path.exists(self._file()):
+                os.remove(self._file())
+
+    def search(self, query: str, limit: int = 10):
+        """
+        Returns the primary keys and BM25 scores of the `limit` best passages for a query, best first, after picking
+        up what other processes wrote to the index file.
+        """
+        with self._lock:
+            self._refresh()
+            n = len(self.keys)
+            if not n:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            lengths = np.frombuffer(self.lengths, dtype=np.uint32)
+            norm = self.k1 * (1 - self.b + self.b * lengths / (self._total / n))
+            scores = np.zeros(n, dtype=np.float32)
+            for term, qtf in Counter(tokenize(query)).items():
+                if term not in self.postings:
+                    continue
+                rows, tfs = self.postings[term]
+                rows, tfs = np.frombuffer(rows, dtype=np.uint32), np.frombuffer(
+                    tfs, dtype=np.uint32
+                ).astype(np.float32)
+                idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+                scores[rows] += qtf * idf * tfs * (self.k1 + 1) / (tfs + norm[rows])
+            hits = np.flatnonzero(scores)
+            top = hits[np.argsort(-scores[hits], kind="stable")[:limit]]
+            return np.frombuffer(self.keys, dtype=np.int64)[top].copy(), scores[top]
@@ -0,0 +1,308 @@
+import os
+import json
+import time
+import glob
+import uuid
+import fcntl
+import socket
+import struct
+import asyncio
+import threading
+import numpy as np
+from magnet.utils.globals import _f
+
+_HEADER = struct.Struct("<II")
+
+
+def _partitions(partitions: list):
+    return partitions if any(p is not None for p in partitions) else None
+
+
+class InsertBuffer:
+    """
+    Collects rows bound for an index backend in columnar form and writes them with one bulk insert per flush, so the
+    index sees a few large segments instead of one tiny segment per message.
+
+    A flush happens when `max_rows` rows are pending, when the oldest pending row is `max_age` seconds old, or on
+    `flush`/`close`. Every submitted batch is first appended to a write-ahead log and fsynced; the log segment is
+    deleted once the flush holding its rows is done. Each buffer logs to its own `<host>-<pid>-<id>` directory under
+    `path` and holds an exclusive lock on it while it lives, so processes sharing `path` never touch each other's
+    segments, and `replay` only inserts the logs of directories whose owner has died. `submit` returns a future that resolves to the rows' primary keys after their flush, which is when the
+    messages behind them may be acked. Rows of a failed flush are dropped with their futures failed, and `Memory` naks
+    their messages for redelivery.
+
+    Args:
+        insert (callable): The blocking `insert(documents, texts, embeddings, partitions)` of the backend, returning primary keys.
+        dimension (int): The embedding dimension.
+        path (str): The directory the write-ahead logs of every buffer of the index live under.
+        max_rows (int, optional): The pending rows that trigger a flush. Defaults to 10000.
+        max_age (float, optional): The seconds a row may wait before a flush. Defaults to 2.0.
+    """
+
+    def __init__(
+        self,
+        insert,
+        dimension: int,
+        path: str,
+        max_rows: int = 10000,
+        max_age: float = 2.0,
+    ):
+        self.insert = insert
+        self.dimension = dimension
+        self.root = os.path.expanduser(path)
+        self.path = os.path.join(
+            self.root, f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._mutex = threading.Lock()
+        self._flushing = None
+        self._timer = None
+        self._tasks = set()
+        self._wal = None
+        self._lock = None
+        self._segment = 0
+        self._reset()
+
+    def _reset(self):
+        (
+            self._documents,
+            self._texts,
+            self._partitions,
+            self._embeddings,
+            self._waiters,
+        ) = ([], [], [], [], [])
+        self._rows = 0
+        self._oldest = None
+
+    def __len__(self):
+        return self._rows
+
+    @staticmethod
+    def _segments(path: str):
+        return sorted(
+            glob.glob(os.path.join(path, "wal.*")),
+            key=lambda p: int(p.rsplit(".", 1)[1]),
+        )
+
+    def _open(self):
+        if self._lock is None:
+            staging = os.path.join(self.root, "." + os.path.basename(self.path))
+            os.makedirs(staging)
+            self._lock = open(os.path.join(staging, "lock"), "a")
+            fcntl.flock(self._lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.rename(staging, self.path)
+        segments = self._segments(self.path)
+        self._segment = int(segments[-1].rsplit(".", 1)[1]) + 1 if segments else 0
+        self._wal = open(os.path.join(self.path, f"wal.{self._segment}"), "ab")
+
+    def replay(self, inserted=None) -> int:
+        """
+        Inserts the rows of every log segment left by a process that stopped before flushing them, then deletes the
+        segments. Logs whose directory is still locked belong to a live buffer and are skipped.
+
+        Args:
+            inserted (callable, optional): Called with the primary keys, documents, passages, embeddings and partitions
+                of every replayed segment.
+
+        Returns:
+            int: The rows replayed.
+        """
+        total = 0
+        for directory in sorted(glob.glob(os.path.join(self.root, "*", ""))):
+            directory = directory.rstrip(os.sep)
+            if directory == self.path:
+                continue
+            try:
+                lock = open(os.path.join(directory, "lock"), "r")
+            except OSError:
+                continue
+            with lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                total += self._replay(directory, inserted)
+                try:
+                    os.remove(lock.name)
+                    os.rmdir(directory)
+                except FileNotFoundError:
+                    pass
+        if total:
+            _f("warn", f"replayed {total} unflushed rows from {self.root}")
+        return total
+
+    def _replay(self, directory: str, inserted=None) -> int:
+        total = 0
+        for segment in self._segments(directory):
+            documents, texts, partitions, embeddings = [], [], [], []
+            with open(segment, "rb") as log:
+                data = log.read()
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                meta, size = _HEADER.unpack_from(data, offset)
+                end = offset + _HEADER.size + meta + size
+                if end > len(data):
+                    break
+                record = json.loads(
+                    data[offset + _HEADER.size : offset + _HEADER.size + meta]
+                )
+                documents.extend(record["documents"])
+                texts.extend(record["texts"])
+                partitions.extend(record["partitions"])
+                embeddings.append(
+                    np.frombuffer(
+                        data, dtype=np.float32, count=size // 4, offset=end - size
+                    ).reshape(-1, self.dimension)
+                )
+                offset = end
+            if documents:
+                embeddings = np.concatenate(embeddings)
+                keys = self.insert(
+                    documents, texts, embeddings, _partitions(partitions)
+                )
+                if inserted:
+                    inserted(list(keys), documents, texts, embeddings, partitions)
+                total += len(documents)
+            os.remove(segment)
+        return total
+
+    def _append(self, future, documents, texts, embeddings, partitions):
+        with self._mutex:
+            if self._wal is None:
+                self._open()
+            meta = json.dumps(
+                {"documents": documents, "texts": texts, "partitions": partitions}
+            ).encode("utf-8")
+            data = embeddings.tobytes()
+            self._wal.write(_HEADER.pack(len(meta), len(data)) + meta + data)
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._waiters.append((future, self._rows, len(documents)))
+            self._documents.extend(documents)
+            self._texts.extend(texts)
+            self._partitions.extend(partitions)
+            self._embeddings.append(embeddings)
+            self._rows += len(documents)
+            self._oldest = self._oldest or time.monotonic()
+            return self._rows
+
+    def _take(self):
+        with self._mutex:
+            taken = (
+                self._documents,
+                self._texts,
+                self._partitions,
+                self._embeddings,
+                self._waiters,
+                self._wal,
+            )
+            self._reset()
+            self._wal.close()
+            self._wal = open(os.path.join(self.path, f"wal.{self._segment + 1}"), "ab")
+            self._segment += 1
+            return taken
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def submit(
+        self, documents: list, texts: list, embeddings, partitions: list = None
+    ) -> asyncio.Future:
+        """
+        Logs and buffers rows.
+
+        Returns:
+            asyncio.Future: Resolves to the rows' primary keys once the flush containing them succeeded, or raises its error.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(
+            -1, self.dimension
+        )
+        partitions = list(partitions) if partitions else [None] * len(documents)
+        rows = await loop.run_in_executor(
+            None,
+            self._append,
+            future,
+            list(documents),
+            list(texts),
+            embeddings,
+            partitions,
+        )
+        if rows >= self.max_rows:
+            self._spawn(self.flush())
+        elif self._timer is None:
+            self._timer = self._spawn(self._age())
+        return future
+
+    async def _age(self):
+        try:
+            while self._rows:
+                wait = self.max_age - (
+                    time.monotonic() - (self._oldest or time.monotonic())
+                )
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                else:
+                    await self.flush()
+        finally:
+            self._timer = None
+
+    async def flush(self) -> int:
+        """
+        Writes every pending row in one insert and resolves the futures of the batches it held.
+
+        Returns:
+            int: The rows flushed.
+        """
+        if self._flushing is None:
+            self._flushing = asyncio.Lock()
+        async with self._flushing:
+            if not self._rows:
+                return 0
+            loop = asyncio.get_running_loop()
+            documents, texts, partitions, embeddings, waiters, wal = self._take()
+            try:
+                keys = await loop.run_in_executor(
+                    None,
+                    self.insert,
+                    documents,
+                    texts,
+                    np.concatenate(embeddings),
+                    _partitions(partitions),
+                )
+            except Exception as e:
+                for future, _, _ in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                return 0
+            finally:
+                os.remove(wal.name)
+            keys = list(keys)
+            for future, start, n in waiters:
+                if not future.done():
+                    future.set_result(keys[start : start + n])
+            return len(documents)
+
+    async def close(self):
+        """
+        Flushes the pending rows and closes the log.
+        """
+        await self.flush()
+        if self._timer:
+            self._timer.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        with self._mutex:
+            if self._wal is not None:
+                self._wal.close()
+                os.remove(self._wal.name)
+                self._wal = None
+            if self._lock is not None:
+                os.remove(os.path.join(self.path, "lock"))
+                os.rmdir(self.path)
+                self._lock.close()
+                self._lock = None
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from pymilvus import connections, utility, Collection
+from magnet.utils.globals import _f
+
+STRATEGIES = ("round_robin", "least_busy")
+
+
+class ConnectionPool:
+    """
+    Spreads Milvus calls over several gRPC connections so that concurrent searches and inserts run in parallel
+    instead of queueing on one channel.
+
+    The first connection uses `config.session` as its alias, so code holding that alias keeps working; the others
+    are named `<session>-<n>`. Each call leases a connection, chosen round robin or as the one with the fewest calls
+    in flight, and runs against that connection's handle of the collection. A failed call reconnects its connection
+    and, unless it wrote data, is retried once; `watch` pings every connection periodically so that dead ones are
+    reconnected before they are leased. Connections with calls in flight are left to those calls, and an alias being
+    reconnected by the check is not leased until it is back.
+
+    Args:
+        config (MagnetConfig): The configuration whose `index` section holds the Milvus address and credentials.
+        size (int, optional): The number of connections. Defaults to 1.
+        strategy (str, optional): `round_robin` or `least_busy`. Defaults to 'round_robin'.
+    """
+
+    def __init__(self, config, size: int = 1, strategy: str = "round_robin"):
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                f"unknown dispatch strategy `{strategy}`, expected one of {STRATEGIES}"
+            )
+        self.config = config
+        self.strategy = strategy
+        self.aliases = [config.session] + [
+            f"{config.session}-{n}" for n in range(1, max(1, size))
+        ]
+        self.busy = {alias: 0 for alias in self.aliases}
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(self.aliases), thread_name_prefix="magnet-milvus"
+        )
+        self._collections = {}
+        self._generations = {alias: 0 for alias in self.aliases}
+        self._reconnecting = {alias: threading.Lock() for alias in self.aliases}
+        self._down = set()
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    def connect(self, alias: str):
+        connections.connect(
+            host=self.config.index.milvus_uri,
+            port=self.config.index.milvus_port,
+            user=self.config.index.milvus_user,
+            password=self.config.index.milvus_password,
+            alias=alias,
+        )
+        self._collections.pop(alias, None)
+
+    def reconnect(self, alias: str, generation: int = None):
+        """
+        Drops and reopens a connection. Given the `generation` a failed call ran on, a connection another caller has
+        already reopened since is left alone, so concurrent failures on one alias reconnect it once.
+        """
+        with self._reconnecting[alias]:
+            if generation is not None and generation != self._generations[alias]:
+                return
+            try:
+                connections.disconnect(alias=alias)
+            except Exception as e:
+                _f("warn", f"{alias} did not disconnect cleanly (`{e}`)")
+            self.connect(alias)
+            self._generations[alias] += 1
+
+    def open(self):
+        for alias in self.aliases:
+            self.connect(alias)
+
+    def close(self):
+        for alias in self.aliases:
+            connections.disconnect(alias=alias)
+        self._collections.clear()
+        self.executor.shutdown(wait=False)
+
+    def collection(self, alias: str) -> Collection:
+        """
+        Returns the handle of the configured collection bound to a connection.
+        """
+        if alias not in self._collections:
+            self._collections[alias] = Collection(
+                name=self.config.index.name, using=alias
+            )
+        return self._collections[alias]
+
+    @contextmanager
+    def lease(self):
+        with self._lock:
+            aliases = [
+                alias for alias in self.aliases if alias not in self._down
+            ] or self.aliases
+            if self.strategy == "least_busy":
+                alias = min(aliases, key=self.busy.get)
+            else:
+                alias = aliases[self._turn % len(aliases)]
+                self._turn += 1
+            self.busy[alias] += 1
+        try:
+            yield alias
+        finally:
+            with self._lock:
+                self.busy[alias] -= 1
+
+    def run(self, call, retry: bool = True):
+        """
+        Runs `call(collection)` on a leased connection. A failure reconnects the connection and, with `retry`, runs the call once more.
+        """
+        with self.lease() as alias:
+            generation = self._generations[alias]
+            try:
+                return call(self.collection(alias))
+            except Exception as e:
+                _f("warn", f"{alias} failed with `{e}`, reconnecting")
+                self.reconnect(alias, generation)
+                if not retry:
+                    raise
+                return call(self.collection(alias))
+
+    async def arun(self, call, retry: bool = True):
+        """
+        The non-blocking form of `run`, executed on the pool's own threads, one per connection.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.run, call, retry)
+
+    def check(self) -> dict:
+        """
+        Pings every connection, reconnecting those that do not answer. A connection with calls in flight is not
+        reconnected under them; the next of those calls to fail reconnects it instead.
+
+        Returns:
+            dict: Whether each alias was healthy before the check.
+        """
+        healthy = {}
+        for alias in self.aliases:
+            try:
+                utility.get_server_version(using=alias)
+                healthy[alias] = True
+                continue
+            except Exception as e:
+                healthy[alias] = False
+                error = e
+            with self._lock:
+                if self.busy[alias]:
+                    _f(
+                        "warn",
+                        f"{alias} is unhealthy (`{error}`) but has calls in flight, leaving it to them",
+                    )
+                    continue
+                self._down.add(alias)
+            _f("warn", f"{alias} is unhealthy (`{error}`), reconnecting")
+            try:
+                self.reconnect(alias)
+            except Exception as e:
+                _f("fatal", e)
+            finally:
+                with self._lock:
+                    self._down.discard(alias)
+        return healthy
+
+    async def watch(self, interval: float = 30.0):
+        """
+        Runs `check` every `interval` seconds until cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            await loop.run_in_executor(None, self.check)
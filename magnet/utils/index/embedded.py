@@ -0,0 +1,559 @@
+import os
+import re
+import ast
+import json
+import time
+import shutil
+import threading
+import numpy as np
+from magnet.utils.globals import _f
+from magnet.utils.data_classes import MagnetConfig, SearchResults
+from magnet.utils.index.base import IndexBackend
+from magnet.utils.index.hnsw import HNSW
+from magnet.utils.index.quantize import (
+    STORAGES,
+    QuantizedMatrix,
+    ProductQuantizer,
+    int8_dtype,
+    encode_int8,
+)
+
+_TOKENS = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|[()\[\]]|\s+and\s+', re.IGNORECASE
+)
+
+
+def _clauses(expr: str) -> list:
+    """
+    Splits a filter expression into its `and`-joined clauses, flattening parenthesized groups, e.g.
+    `(id in [1, 2]) and ((a == "x") and (b == "y"))` into `id in [1, 2]`, `a == "x"` and `b == "y"`.
+    """
+    expr = expr.strip()
+    depth, splits, closes = 0, [], []
+    for match in _TOKENS.finditer(expr):
+        token = match.group()
+        if token in ("(", "["):
+            depth += 1
+        elif token in (")", "]"):
+            depth -= 1
+            if not depth:
+                closes.append(match.end())
+        elif token[0] not in "\"'" and not depth:
+            splits.append(match.span())
+    if splits:
+        bounds = [0] + [bound for span in splits for bound in span] + [len(expr)]
+        return [
+            clause
+            for start, end in zip(bounds[::2], bounds[1::2])
+            for clause in _clauses(expr[start:end])
+        ]
+    if expr.startswith("(") and closes and closes[0] == len(expr):
+        return _clauses(expr[1:-1])
+    return [expr]
+
+
+class EmbeddedDB(IndexBackend):
+    """
+    An in-process index backend for dev boxes, CI runners and small deployments that have no Milvus server.
+
+    A collection is a directory under `config.index.path` named after `config.index.name`, holding an append-only
+    float32 matrix (`vectors.f32`) read through a memory map and a JSON lines sidecar (`rows.jsonl`) with each row's
+    `document` and `text`. Primary keys are row numbers. Search is exact top-k with vectorized NumPy until the
+    collection reaches `config.index.exact_limit` rows; past that, when `options.index_type` is `HNSW`, an HNSW graph
+    built with `options.params` (`M`, `efConstruction`) serves the search and is persisted to `hnsw.npz`.
+
+    With `config.index.partition_key` set, the row ids of every partition are kept in memory and a search filtered
+    on the partition key (`key == "value"` or `key in ["a", "b"]`, joined with `and` and optionally parenthesized)
+    runs exactly over only those rows. `query` accepts the same filters, and `id == n` or `id in [...]`.
+
+    `config.index.vector_storage` selects how vectors are stored: `float32`, `float16` (`vectors.f16`) or scalar
+    quantized `int8` with a per-row scale (`vectors.i8`), decoded to float32 block by block as they are searched. With
+    `pq`, vectors stay in `vectors.f32` on disk and, past `exact_limit` rows, a product quantizer is trained
+    (`pq.npz`) and only its `m`-byte codes (`codes.pq`) are scanned, the best `refine` times `limit` candidates of every
+    query being rescored exactly.
+
+    Inserts may come from several threads at once (`Memory`'s I/O pool, the insert buffer's flushes); they are
+    serialized by a lock that readers of the row offsets, partitions and vector map also take.
+
+    Args:
+        config (MagnetConfig): The configuration whose `index` section describes the collection.
+    """
+
+    def __init__(self, config: MagnetConfig):
+        super().__init__(config)
+        self._lock = threading.RLock()
+        self.root = os.path.expanduser(
+            self.config.index.path or "~/.cache/magnet/index"
+        )
+        self.dimension = self.config.index.dimension
+        self.metric = self.config.index.options.get("metric_type", "COSINE")
+        self.storage = self.config.index.vector_storage
+        if self.storage not in STORAGES:
+            raise ValueError(
+                f"unknown vector storage `{self.storage}`, expected one of {STORAGES}"
+            )
+        self._dtype = {
+            "float16": np.dtype(np.float16),
+            "int8": int8_dtype(self.dimension),
+        }.get(self.storage, np.dtype(np.float32))
+        self._reset()
+
+    def _reset(self):
+        self.directory = os.path.join(self.root, self.config.index.name)
+        self._vectors_path = os.path.join(
+            self.directory,
+            {"float16": "vectors.f16", "int8": "vectors.i8"}.get(
+                self.storage, "vectors.f32"
+            ),
+        )
+        self._codes_path = os.path.join(self.directory, "codes.pq")
+        self._quantizer_path = os.path.join(self.directory, "pq.npz")
+        self._rows_path = os.path.join(self.directory, "rows.jsonl")
+        self._graph_path = os.path.join(self.directory, "hnsw.npz")
+        self._matrix = None
+        self._codes = None
+        self._offsets = []
+        self._partitions = {}
+        self.graph = None
+        self.quantizer = None
+
+    async def on(self):
+        os.makedirs(self.root, exist_ok=True)
+        _f("success", f"embedded index ready at {self.root}")
+
+    async def off(self):
+        if self.buffer is not None:
+            await self.buffer.close()
+        self.flush()
+        return _f("warn", f"closed embedded index {self.config.index.name}")
+
+    async def create(self, overwrite=False):
+        if overwrite and os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+        for path in (self._vectors_path, self._rows_path):
+            open(path, "ab").close()
+        self._reset()
+        _f("success", f"{self.config.index.name} created")
+
+    async def load(self):
+        _f("wait", f"loading {self.config.index.name} into memory, may take time")
+        if not os.path.exists(self.directory):
+            await self.create()
+        with self._lock:
+            self._offsets = []
+            self._partitions = {}
+            with open(self._rows_path, "rb") as rows:
+                offset = 0
+                for line in rows:
+                    if self.partition_key:
+                        self._partitions.setdefault(
+                            json.loads(line)[self.partition_key], []
+                        ).append(len(self._offsets))
+                    self._offsets.append(offset)
+                    offset += len(line)
+            self._matrix = None
+            if self._use_graph():
+                self._build_graph()
+            if self._use_quantizer():
+                self._build_codes()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def vectors(self):
+        """
+        Returns the collection's (rows, dimension) float32 matrix, remapping it when rows were appended since the last
+        call. float16 and int8 storage is returned as a `QuantizedMatrix` that decodes the rows it is indexed with.
+        """
+        with self._lock:
+            if self._matrix is None or len(self._matrix) < len(self):
+                if not len(self):
+                    return np.zeros((0, self.dimension), dtype=np.float32)
+                stored = np.memmap(
+                    self._vectors_path,
+                    dtype=self._dtype,
+                    mode="r",
+                    shape=(len(self),)
+                    + ((self.dimension,) if self.storage != "int8" else ()),
+                )
+                self._matrix = (
+                    QuantizedMatrix(stored, self.storage)
+                    if self.storage in ("int8", "float16")
+                    else stored
+                )
+            return self._matrix
+
+    def _use_quantizer(self):
+        return self.storage == "pq" and len(self) >= max(
+            self.config.index.exact_limit, 256
+        )
+
+    def codes(self):
+        """
+        Returns the (rows, m) product quantization codes, remapping them when rows were coded since the last call.
+        """
+        with self._lock:
+            if self._codes is None or len(self._codes) < len(self):
+                self._codes = np.memmap(
+                    self._codes_path,
+                    dtype=np.uint8,
+                    mode="r",
+                    shape=(len(self), self.quantizer.m),
+                )
+            return self._codes
+
+    def _build_codes(self):
+        if self.quantizer is None:
+            self.quantizer = ProductQuantizer(
+                self.dimension, m=self.config.index.pq_m, metric=self.metric
+            )
+            if os.path.exists(self._quantizer_path):
+                self.quantizer.load(self._quantizer_path)
+            else:
+                _f(
+                    "wait",
+                    f"training a {self.quantizer.m}-byte product quantizer on {len(self)} rows",
+                )
+                self.quantizer.train(self.vectors())
+                self.quantizer.save(self._quantizer_path)
+                open(self._codes_path, "wb").close()
+        coded = os.path.getsize(self._codes_path) // self.quantizer.m
+        if coded < len(self):
+            with open(self._codes_path, "ab") as codes:
+                for start in range(coded, len(self), 65536):
+                    codes.write(
+                        self.quantizer.encode(
+                            self.vectors()[start : min(start + 65536, len(self))]
+                        ).tobytes()
+                    )
+
+    def _use_graph(self):
+        return (
+            self.config.index.options.get("index_type") == "HNSW"
+            and len(self) >= self.config.index.exact_limit
+        )
+
+    def _build_graph(self):
+        params = self.config.index.options.get("params", {})
+        if self.graph is None:
+            self.graph = HNSW(
+                self.vectors,
+                M=params.get("M", 16),
+                ef_construction=params.get("efConstruction", 200),
+                metric=self.metric,
+            )
+            if os.path.exists(self._graph_path):
+                self.graph.load(self._graph_path)
+        if len(self.graph) < len(self):
+            _f(
+                "wait",
+                f"linking {len(self) - len(self.graph)} rows into the HNSW graph",
+            )
+            for node in range(len(self.graph), len(self)):
+                self.graph.add(node)
+
+    def flush(self):
+        """
+        Persists the HNSW graph, when one is in use.
+        """
+        if self.graph is not None:
+            self.graph.save(self._graph_path)
+
+    def insert(
+        self, documents: list, texts: list, embeddings, partitions: list = None
+    ) -> list:
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(
+            -1, self.dimension
+        )
+        with self._lock:
+            start = len(self)
+            offset = os.path.getsize(self._rows_path)
+            rows = [{"document": d, "text": t} for d, t in zip(documents, texts)]
+            if self.partition_field:
+                for row, p in zip(
+                    rows, partitions or [self.config.session] * len(rows)
+                ):
+                    row[self.partition_field] = str(p)
+            if self.partition_key:
+                for i, row in enumerate(rows):
+                    self._partitions.setdefault(row[self.partition_key], []).append(
+                        start + i
+                    )
+            lines = [(json.dumps(row) + "\n").encode("utf-8") for row in rows]
+            if self.storage == "int8":
+                stored = encode_int8(embeddings)
+            else:
+                stored = embeddings.astype(self._dtype, copy=False)
+            with open(self._vectors_path, "ab") as vectors:
+                vectors.write(stored.tobytes())
+            with open(self._rows_path, "ab") as rows:
+                rows.write(b"".join(lines))
+            for line in lines:
+                self._offsets.append(offset)
+                offset += len(line)
+            if self._use_graph():
+                self._build_graph()
+            if self._use_quantizer():
+                self._build_codes()
+            return list(range(start, len(self)))
+
+    def _rows(self, ids):
+        with self._lock:
+            offsets = [(i, self._offsets[i]) for i in sorted(set(ids))]
+        rows = {}
+        with open(self._rows_path, "rb") as sidecar:
+            for i, offset in offsets:
+                sidecar.seek(offset)
+                rows[i] = json.loads(sidecar.readline())
+        return rows
+
+    def _select(self, expr: str):
+        """
+        Returns the sorted row ids matching a filter on `id` or the partition key.
+        """
+        selected = None
+        for clause in _clauses(expr):
+            match = re.fullmatch(r"(\w+)\s*(==|in)\s*(.+)", clause)
+            if not match or match.group(1) not in ("id", self.partition_key):
+                raise ValueError(
+                    f"the embedded backend only filters on `id` and the partition key, got `{clause}`"
+                )
+            value = ast.literal_eval(match.group(3))
+            values = [value] if match.group(2) == "==" else value
+            with self._lock:
+                if match.group(1) == "id":
+                    rows = set(int(v) for v in values if 0 <= int(v) < len(self))
+                else:
+                    rows = set(
+                        i for v in values for i in self._partitions.get(str(v), ())
+                    )
+            selected = rows if selected is None else selected & rows
+        return np.array(sorted(selected), dtype=np.int64)
+
+    @staticmethod
+    def _scan(n, k, total, scores):
+        """
+        Returns the ids and scores of the `k` highest scoring of `total` rows for `n` queries, best first, scoring 65536 rows at a time with `scores(start, end)`.
+        """
+        best = np.zeros((n, 0), dtype=np.float32), np.zeros((n, 0), dtype=np.int64)
+        for start in range(0, total, 65536):
+            end = min(start + 65536, total)
+            block = np.concatenate([best[0], scores(start, end)], axis=1)
+            rows = np.concatenate(
+                [best[1], np.broadcast_to(np.arange(start, end), (n, end - start))],
+                axis=1,
+            )
+            top = (
+                np.argpartition(-block, k - 1, axis=1)[:, :k]
+                if block.shape[1] > k
+                else np.argsort(-block, axis=1)
+            )
+            best = np.take_along_axis(block, top, axis=1), np.take_along_axis(
+                rows, top, axis=1
+            )
+        order = np.argsort(-best[0], axis=1)
+        return np.take_along_axis(best[1], order, axis=1), np.take_along_axis(
+            best[0], order, axis=1
+        )
+
+    def _exact(self, q, limit, subset=None):
+        matrix = self.vectors() if subset is None else self.vectors()[subset]
+
+        def scores(start, end):
+            block = np.asarray(matrix[start:end], dtype=np.float32)
+            if self.metric == "L2":
+                return -(
+                    (q**2).sum(axis=1)[:, None]
+                    + (block**2).sum(axis=1)[None, :]
+                    - 2 * q @ block.T
+                )
+            return q @ block.T
+
+        ids, distances = self._scan(
+            len(q), min(limit, len(matrix)), len(matrix), scores
+        )
+        if subset is not None:
+            ids = subset[ids]
+        return ids, (-distances if self.metric == "L2" else distances)
+
+    def _quantized(self, q, limit):
+        codes = self.codes()
+        tables = self.quantizer.tables(q)
+        refine = self.config.index.options.get("params", {}).get("refine", 4)
+        candidates, _ = self._scan(
+            len(q),
+            min(limit * refine, len(codes)),
+            len(codes),
+            lambda start, end: self.quantizer.scores(tables, codes[start:end]),
+        )
+        ids = np.full((len(q), limit), -1, dtype=np.int64)
+        distances = np.full((len(q), limit), np.nan, dtype=np.float32)
+        for i, row in enumerate(candidates):
+            found, scores = self._exact(q[i : i + 1], limit, np.sort(row))
+            ids[i, : found.shape[1]] = found[0]
+            distances[i, : scores.shape[1]] = scores[0]
+        return ids, distances
+
+    def _approximate(self, q, limit):
+        ef = self.config.index.options.get("params", {}).get("ef", 64)
+        ids = np.full((len(q), limit), -1, dtype=np.int64)
+        distances = np.full((len(q), limit), np.nan, dtype=np.float32)
+        for i, vector in enumerate(q):
+            d, n = self.graph.search(vector, limit, ef=ef)
+            ids[i, : len(n)] = n
+            distances[i, : len(d)] = d if self.metric == "L2" else 1 - d
+        return ids, distances
+
+    def search(
+        self, embeddings, limit: int = 1, output_fields: list = None, expr: str = None
+    ) -> SearchResults:
+        q = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        output_fields = list(output_fields) if output_fields else []
+        ids = np.full((len(q), limit), -1, dtype=np.int64)
+        distances = np.full((len(q), limit), np.nan, dtype=np.float32)
+        rows = self._select(expr) if expr else None
+        if len(self) and (rows is None or len(rows)):
+            if rows is not None:
+                found, scores = self._exact(q, limit, rows)
+            elif self.graph is not None:
+                found, scores = self._approximate(q, limit)
+            elif self.quantizer is not None:
+                found, scores = self._quantized(q, limit)
+            else:
+                found, scores = self._exact(q, limit)
+            ids[:, : found.shape[1]] = found
+            distances[:, : scores.shape[1]] = scores
+        fields = {name: [] for name in output_fields if name != "embedding"}
+        if "embedding" in output_fields:
+            fields["embedding"] = np.zeros(
+                (len(q), limit, self.dimension), dtype=np.float32
+            )
+            hits = ids >= 0
+            fields["embedding"][hits] = self.vectors()[ids[hits]]
+        if fields.keys() - {"embedding"}:
+            rows = self._rows(ids[ids >= 0].tolist())
+            for name in fields.keys() - {"embedding"}:
+                fields[name] = [
+                    [rows[i][name] for i in row if i >= 0] for row in ids.tolist()
+                ]
+        return SearchResults(ids=ids, distances=distances, fields=fields)
+
+    def query(self, expr: str, output_fields: list = None) -> list:
+        ids = self._select(expr).tolist()
+        output_fields = list(output_fields or [])
+        rows = self._rows(ids) if set(output_fields) - {"id", "embedding"} else {}
+        results = []
+        for i in ids:
+            result = {
+                "id": i,
+                **{
+                    name: rows[i][name]
+                    for name in output_fields
+                    if name not in ("id", "embedding")
+                },
+            }
+            if "embedding" in output_fields:
+                result["embedding"] = self.vectors()[i].tolist()
+            results.append(result)
+        return results
+
+    def scan(self, after: int = -1, batch_size: int = 1000, output_fields: list = None):
+        output_fields = list(output_fields or ["document", "text"])
+        for start in range(after + 1, len(self), batch_size):
+            ids = list(range(start, min(start + batch_size, len(self))))
+            rows = self._rows(ids) if set(output_fields) - {"id", "embedding"} else {}
+            yield [
+                {
+                    "id": i,
+                    **{
+                        name: rows[i][name]
+                        for name in output_fields
+                        if name not in ("id", "embedding")
+                    },
+                }
+                for i in ids
+            ]
+
+    def truncate(self, after: int):
+        """
+        Cuts the collection back to its first `after + 1` rows. A graph that linked any of the removed rows is rebuilt.
+        """
+        with self._lock:
+            rows = max(after + 1, 0)
+            if rows >= len(self):
+                return
+            with open(self._rows_path, "r+b") as sidecar:
+                sidecar.truncate(self._offsets[rows])
+            with open(self._vectors_path, "r+b") as vectors:
+                vectors.truncate(
+                    rows
+                    * self._dtype.itemsize
+                    * (1 if self.storage == "int8" else self.dimension)
+                )
+            if os.path.exists(self._codes_path):
+                with open(self._codes_path, "r+b") as codes:
+                    codes.truncate(
+                        min(
+                            os.path.getsize(self._codes_path),
+                            rows * self.config.index.pq_m,
+                        )
+                    )
+            if os.path.exists(self._graph_path):
+                os.remove(self._graph_path)
+            del self._offsets[rows:]
+            self._partitions = {
+                key: [i for i in ids if i < rows]
+                for key, ids in self._partitions.items()
+            }
+            self._partitions = {
+                key: ids for key, ids in self._partitions.items() if ids
+            }
+            self._matrix = None
+            self._codes = None
+            self.graph = None
+            if self._use_graph():
+                self._build_graph()
+            _f("warn", f"truncated {self.config.index.name} to {rows} rows")
+
+    def switch(self, shadow: str, keep: bool = True):
+        """
+        Renames the collection's directory aside and the directory of `shadow` into its place. The two renames are
+        not atomic: a process opening the collection between them finds it missing, so restart readers after the
+        switch. Processes that already have it open keep reading the retired files until they reload.
+        """
+        name = self.config.index.name
+        retired = f"{name}_retired_{int(time.time())}"
+        os.rename(self.directory, os.path.join(self.root, retired))
+        os.rename(os.path.join(self.root, shadow), self.directory)
+        if not keep:
+            shutil.rmtree(os.path.join(self.root, retired))
+        self._reset()
+        _f(
+            "success",
+            f"{shadow} switched in as {name}"
+            + (f", {name} retired as {retired}" if keep else ""),
+        )
+        return retired if keep else None
+
+    def info(self):
+        return {
+            "name": self.config.index.name,
+            "path": self.directory,
+            "rows": len(self),
+            "storage": self.storage,
+            "bytes_per_vector": self.quantizer.m
+            if self.quantizer is not None
+            else self._dtype.itemsize
+            * (1 if self.storage == "int8" else self.dimension),
+            "graph": len(self.graph) if self.graph is not None else None,
+        }
+
+    async def delete_index(self):
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+            self._reset()
+            _f("warn", f"Index for {self.config.index.name} deleted")
+
+    def list_indices(self):
+        return sorted(os.listdir(self.root)) if os.path.exists(self.root) else []
@@ -0,0 +1,171 @@
+import math
+import heapq
+import random
+import numpy as np
+
+
+class HNSW:
+    """
+    A hierarchical navigable small world graph over the rows of an external vector matrix.
+
+    The graph stores only links; vectors are read through `vectors`, a callable returning the current matrix
+    (typically a memory map), so the graph grows incrementally as rows are appended. Distances are `1 - dot`
+    for the `COSINE` and `IP` metrics and squared euclidean for `L2`.
+
+    Args:
+        vectors (callable): Returns the (rows, dimension) float32 matrix the graph indexes.
+        M (int, optional): The number of links per node above layer 0, which keeps twice as many. Defaults to 16.
+        ef_construction (int, optional): The candidate list size used while inserting. Defaults to 200.
+        metric (str, optional): `COSINE`, `IP` or `L2`. Defaults to 'COSINE'.
+        seed (int, optional): Seeds the level assignment. Defaults to 2077.
+    """
+
+    def __init__(
+        self,
+        vectors,
+        M: int = 16,
+        ef_construction: int = 200,
+        metric: str = "COSINE",
+        seed: int = 2077,
+    ):
+        self.vectors = vectors
+        self.M = M
+        self.ef_construction = ef_construction
+        self.metric = metric
+        self._ml = 1 / math.log(max(M, 2))
+        self._rng = random.Random(seed)
+        self.levels = []
+        self.links = []
+        self.entry = None
+
+    def __len__(self):
+        return len(self.levels)
+
+    def _distances(self, q, nodes):
+        rows = self.vectors()[nodes]
+        if self.metric == "L2":
+            return ((rows - q) ** 2).sum(axis=1)
+        return 1 - rows @ q
+
+    def _search_layer(self, q, entries, ef, layer):
+        visited = set(entries)
+        distances = self._distances(q, entries)
+        candidates = list(zip(distances.tolist(), entries))
+        heapq.heapify(candidates)
+        results = [(-d, n) for d, n in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+        links = self.links[layer]
+        while candidates:
+            d, node = heapq.heappop(candidates)
+            if d > -results[0][0]:
+                break
+            neighbours = [n for n in links.get(node, ()) if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            for d, n in zip(self._distances(q, neighbours).tolist(), neighbours):
+                if len(results) < ef or d < -results[0][0]:
+                    heapq.heappush(candidates, (d, n))
+                    heapq.heappush(results, (-d, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted((-d, n) for d, n in results)
+
+    def _prune(self, node, layer, limit):
+        neighbours = self.links[layer][node]
+        if len(neighbours) > limit:
+            distances = self._distances(self.vectors()[node], neighbours)
+            self.links[layer][node] = [
+                neighbours[i] for i in np.argsort(distances)[:limit]
+            ]
+
+    def add(self, node: int):
+        """
+        Links row `node` of the matrix into the graph. Rows must be added in order.
+        """
+        q = self.vectors()[node]
+        level = int(-math.log(1 - self._rng.random()) * self._ml)
+        self.levels.append(level)
+        while len(self.links) <= level:
+            self.links.append({})
+        if self.entry is None:
+            for layer in range(level + 1):
+                self.links[layer][node] = []
+            self.entry = node
+            return
+        top = self.levels[self.entry]
+        entry = self.entry
+        for layer in range(top, level, -1):
+            entry = self._search_layer(q, [entry], 1, layer)[0][1]
+        entries = [entry]
+        for layer in range(min(level, top), -1, -1):
+            found = self._search_layer(q, entries, self.ef_construction, layer)
+            limit = 2 * self.M if layer == 0 else self.M
+            self.links[layer][node] = [n for _, n in found[: self.M]]
+            for _, n in found[: self.M]:
+                self.links[layer][n].append(node)
+                self._prune(n, layer, limit)
+            entries = [n for _, n in found]
+        for layer in range(top + 1, level + 1):
+            self.links[layer][node] = []
+        if level > top:
+            self.entry = node
+
+    def search(self, q, limit: int, ef: int = 64):
+        """
+        Returns the approximate `limit` nearest rows to `q` as (distances, nodes) arrays, nearest first.
+        """
+        if self.entry is None:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        entry = self.entry
+        for layer in range(self.levels[self.entry], 0, -1):
+            entry = self._search_layer(q, [entry], 1, layer)[0][1]
+        found = self._search_layer(q, [entry], max(ef, limit), 0)[:limit]
+        return np.array([d for d, _ in found], dtype=np.float32), np.array(
+            [n for _, n in found], dtype=np.int64
+        )
+
+    def save(self, path: str):
+        """
+        Persists the graph's levels and links, without vectors, to a `.npz` file.
+        """
+        arrays = {
+            "levels": np.array(self.levels, dtype=np.int32),
+            "entry": np.array([-1 if self.entry is None else self.entry]),
+        }
+        for layer, links in enumerate(self.links):
+            nodes = np.array(sorted(links), dtype=np.int64)
+            arrays[f"nodes_{layer}"] = nodes
+            arrays[f"offsets_{layer}"] = np.cumsum(
+                [0] + [len(links[n]) for n in nodes]
+            ).astype(np.int64)
+            arrays[f"neighbours_{layer}"] = np.array(
+                [m for n in nodes for m in links[n]], dtype=np.int64
+            )
+        np.savez(path, **arrays)
+
+    def load(self, path: str):
+        """
+        Restores a graph written by `save`; rows appended since can then be linked with `add`.
+        """
+        with np.load(path) as arrays:
+            self.levels = arrays["levels"].tolist()
+            entry = int(arrays["entry"][0])
+            self.entry = None if entry < 0 else entry
+            self.links = []
+            layer = 0
+            while f"nodes_{layer}" in arrays:
+                nodes, offsets, neighbours = (
+                    arrays[f"nodes_{layer}"],
+                    arrays[f"offsets_{layer}"],
+                    arrays[f"neighbours_{layer}"],
+                )
+                self.links.append(
+                    {
+                        int(n): neighbours[offsets[i] : offsets[i + 1]].tolist()
+                        for i, n in enumerate(nodes)
+                    }
+                )
+                layer += 1
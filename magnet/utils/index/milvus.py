@@ -1,96 +1,664 @@
-from pymilvus import connections, utility, FieldSchema, CollectionSchema, DataType, Collection
+from pymilvus import (
+    connections,
+    utility,
+    FieldSchema,
+    CollectionSchema,
+    DataType,
+    Collection,
+)
 from magnet.utils.globals import _f
-from magnet.utils.data_classes import MagnetConfig
-import random, array
+from magnet.utils.data_classes import MagnetConfig, SearchResults
+from magnet.utils.index.base import IndexBackend
+from magnet.utils.index.connections import ConnectionPool
+import random, array, asyncio, time, threading
+import numpy as np
 
-class MilvusDB:
+FLAT = {"index_type": "FLAT", "params": {}}
+DEFERRED_POLL = 5.0
+
+
+def _vector(value):
+    """
+    Decodes an `embedding` output field to float32, whether Milvus returned floats or the raw bytes of a float16 vector.
+    """
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], bytes):
+        value = value[0]
+    if isinstance(value, bytes):
+        return np.frombuffer(value, dtype=np.float16).astype(np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+class MilvusDB(IndexBackend):
     def __init__(self, config: MagnetConfig):
-        self.config = config
+        super().__init__(config)
         self.fields = [
-            FieldSchema(name='id', dtype=DataType.INT64, is_primary=True, auto_id=True),
-            FieldSchema(name='document', dtype=DataType.VARCHAR, max_length=4096),
-            FieldSchema(name='text', dtype=DataType.VARCHAR, max_length=65535),
-            FieldSchema(name='embedding', dtype=DataType.FLOAT_VECTOR, dim=self.config.index.dimension)
+            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+            FieldSchema(
+                name="document",
+                dtype=DataType.VARCHAR,
+                max_length=4096,
+                is_partition_key=self.partition_key == "document",
+            ),
+            FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535),
+            FieldSchema(
+                name="embedding",
+                dtype=DataType.FLOAT16_VECTOR
+                if self.config.index.vector_storage == "float16"
+                else DataType.FLOAT_VECTOR,
+                dim=self.config.index.dimension,
+            ),
         ]
+        if self.partition_field:
+            self.fields.insert(
+                3,
+                FieldSchema(
+                    name=self.partition_field,
+                    dtype=DataType.VARCHAR,
+                    max_length=512,
+                    is_partition_key=True,
+                ),
+            )
+        self.index_options = self._index_params()
+        self._pending = 0
+        self._pending_since = None
+        self._counting = threading.Lock()
+        self._building = threading.Lock()
+        self._loaded = threading.Event()
+        self._loaded.set()
+        self.pool = None
+        self._watch = None
+        self._deferred = None
+
     async def on(self):
         try:
-            _f('wait', f'connecting to {self.config.index.milvus_uri}')
-            self.connection = connections.connect(
-                host=self.config.index.milvus_uri,
-                port=self.config.index.milvus_port,
-                user=self.config.index.milvus_user,
-                password=self.config.index.milvus_password,
-                alias=self.config.session
+            _f("wait", f"connecting to {self.config.index.milvus_uri}")
+            self.pool = ConnectionPool(
+                self.config,
+                size=self.config.index.milvus_connections,
+                strategy=self.config.index.milvus_dispatch,
             )
+            self.pool.open()
+            self.executor = self.pool.executor
+            if self.config.index.milvus_health:
+                self._watch = asyncio.create_task(
+                    self.pool.watch(self.config.index.milvus_health)
+                )
+            index = self.config.index
+            if index.index_mode == "deferred" and (
+                index.index_rows or index.index_interval
+            ):
+                self._deferred = asyncio.create_task(self._build_when_due())
             self.schema = CollectionSchema(fields=self.fields)
-            _f('success', f"connected successfully to {self.config.index.milvus_uri}")
+            _f(
+                "success",
+                f"connected successfully to {self.config.index.milvus_uri} over {len(self.pool.aliases)} connections",
+            )
         except Exception as e:
-            _f('fatal', e)
+            _f("fatal", e)
 
     async def off(self):
         try:
-            connections.disconnect(alias=self.config.session)
-            return _f('warn', f'disconnected from {self.config.index.milvus_uri}')
+            if self.buffer is not None:
+                await self.buffer.close()
+            for task in (self._watch, self._deferred):
+                if task:
+                    task.cancel()
+            self.pool.close()
+            return _f("warn", f"disconnected from {self.config.index.milvus_uri}")
         except Exception as e:
-            return _f('fatal', e)
+            return _f("fatal", e)
 
     async def create(self, overwrite=False):
         try:
-            if utility.has_collection(self.config.index.name, using=self.config.session) and overwrite:
-                utility.drop_collection(self.config.index.name, using=self.config.session)
-            self.collection = Collection(name=self.config.index.name, schema=self.schema, using=self.config.session)
-            self.collection.create_index(field_name="embedding", index_params=self.config.index.options)
-            _f('success', f"{self.config.index.name} created")
+            if (
+                utility.has_collection(
+                    self.config.index.name, using=self.config.session
+                )
+                and overwrite
+            ):
+                self._drop()
+            self.collection = Collection(
+                name=self.config.index.name,
+                schema=self.schema,
+                using=self.config.session,
+            )
+            if not self.collection.has_index():
+                self.index_options = (
+                    self._flat()
+                    if self.config.index.index_mode == "deferred"
+                    else self._index_params()
+                )
+                self.collection.create_index(
+                    field_name="embedding", index_params=self.index_options
+                )
+            _f("success", f"{self.config.index.name} created")
         except Exception as e:
-            _f('fatal', e)
+            _f("fatal", e)
 
     async def load(self):
-        _f('wait', f'loading {self.config.index.name} into memory, may take time')
-        self.collection = Collection(name=self.config.index.name, schema=self.schema, using=self.config.session)
+        _f("wait", f"loading {self.config.index.name} into memory, may take time")
+        self.collection = Collection(
+            name=self.config.index.name, schema=self.schema, using=self.config.session
+        )
+        if self.collection.has_index():
+            self.index_options = self.collection.index().params
         self.collection.load()
-    
-    def initialize(self, user: str = 'magnet', password: str = '33011033'):
+
+    def _flat(self):
+        return {
+            **FLAT,
+            "metric_type": self.config.index.options.get("metric_type", "COSINE"),
+        }
+
+    def _index_params(self):
+        """
+        Returns the index parameters of `IndexConfig.vector_storage`: `IndexConfig.options` for float32 and float16
+        vectors, `IVF_SQ8` for int8 and `IVF_PQ` with `pq_m` 8-bit codes for pq, keeping the options' metric and `nlist`.
+        """
+        options = dict(self.config.index.options)
+        storage = self.config.index.vector_storage
+        if storage in ("int8", "pq"):
+            params = {"nlist": options.get("params", {}).get("nlist", 1024)}
+            if storage == "pq":
+                params.update(m=self.config.index.pq_m, nbits=8)
+            options = {
+                "index_type": "IVF_SQ8" if storage == "int8" else "IVF_PQ",
+                "metric_type": options.get("metric_type", "COSINE"),
+                "params": params,
+            }
+        return options
+
+    def _search_params(self):
+        if self.index_options.get("index_type", "").startswith("IVF"):
+            return {
+                "metric_type": self.index_options.get("metric_type", "COSINE"),
+                "params": {
+                    "nprobe": self.config.index.options.get("params", {}).get(
+                        "nprobe", 16
+                    )
+                },
+            }
+        return self.index_options
+
+    def _vectors(self, embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.config.index.vector_storage == "float16":
+            return list(embeddings.astype(np.float16))
+        return embeddings.tolist()
+
+    def build_index(self, options: dict = None, timeout: float = None) -> dict:
+        """
+        Builds, or rebuilds, the index over every row in the collection and reloads it.
+
+        The collection is released while the old index is dropped and the new one is built. Searches and queries
+        of this backend wait for the build to return, while those of other processes fail until it does. Progress
+        can be followed from another thread with `index_progress`.
+
+        Args:
+            options (dict, optional): The index parameters to build. Defaults to those of `IndexConfig.options` and `vector_storage`.
+            timeout (float, optional): Seconds to wait for the build before raising. Defaults to waiting indefinitely.
+
+        Returns:
+            dict: The index parameters built, the rows indexed and the seconds spent building and loading.
+        """
+        options = dict(options or self._index_params())
+        with self._building:
+            pending, start = self._pending, time.perf_counter()
+            _f(
+                "wait",
+                f"building {options.get('index_type')} index on {self.config.index.name}",
+            )
+            self._loaded.clear()
+            try:
+                self.collection.flush()
+                self.collection.release()
+                if self.collection.has_index():
+                    self.collection.drop_index()
+                self.collection.create_index(
+                    field_name="embedding", index_params=options
+                )
+                utility.wait_for_index_building_complete(
+                    self.target(), using=self.config.session, timeout=timeout
+                )
+                built = time.perf_counter() - start
+                self.collection.load()
+            finally:
+                self._loaded.set()
+            self.index_options = options
+            self._count(-pending)
+            progress = self.index_progress()
+            elapsed = time.perf_counter() - start
+            _f(
+                "success",
+                f"indexed {progress.get('indexed_rows')} rows of {self.config.index.name} in {built:.1f}s, loaded in {elapsed - built:.1f}s",
+            )
+            return {
+                "options": options,
+                "rows": progress.get("indexed_rows"),
+                "build_seconds": built,
+                "seconds": elapsed,
+            }
+
+    def index_progress(self) -> dict:
+        """
+        Returns Milvus' `total_rows` and `indexed_rows` for the collection's index, plus the rows inserted since the last deferred build.
+        """
+        progress = dict(
+            utility.index_building_progress(self.target(), using=self.config.session)
+        )
+        progress["pending_rows"] = self._pending
+        return progress
+
+    def maybe_build_index(self):
+        """
+        In `deferred` index mode, builds the configured index in place of the FLAT placeholder once
+        `IndexConfig.index_rows` rows are pending or `IndexConfig.index_interval` seconds have passed since the first
+        of the pending rows was inserted. `on` checks the triggers every `DEFERRED_POLL` seconds in the background,
+        so the build never holds up an insert or an ack, and fires even once ingestion stopped.
+
+        The trigger only fires once: every build releases the collection and fails searches until it returns, so
+        rebuilding an index that is already built is left to explicit `build_index` calls.
+        """
+        index = self.config.index
+        if (
+            index.index_mode != "deferred"
+            or self.index_options.get("index_type") != "FLAT"
+        ):
+            return None
+        if not self._pending or self._building.locked():
+            return None
+        due = (index.index_rows and self._pending >= index.index_rows) or (
+            index.index_interval
+            and time.monotonic() - self._pending_since >= index.index_interval
+        )
+        return self.build_index() if due else None
+
+    async def _build_when_due(self):
+        loop = asyncio.get_running_loop()
+        poll = min(DEFERRED_POLL, self.config.index.index_interval or DEFERRED_POLL)
+        while True:
+            await asyncio.sleep(poll)
+            try:
+                await loop.run_in_executor(self.executor, self.maybe_build_index)
+            except Exception as e:
+                _f("fatal", f"deferred index build failed: {e}")
+
+    def insert(self, documents: list, texts: list, embeddings, partitions: list = None):
+        """
+        Writes rows to the collection in a single column-oriented insert and returns their primary keys.
+        """
+        columns = [documents, texts, self._vectors(embeddings)]
+        if self.partition_field:
+            columns.insert(
+                2,
+                [str(p) for p in partitions]
+                if partitions
+                else [self.config.session] * len(documents),
+            )
+        keys = self.pool.run(
+            lambda collection: collection.insert(columns), retry=False
+        ).primary_keys
+        self._count(len(keys))
+        return keys
+
+    def _count(self, rows: int):
+        """
+        Adds to the rows pending a deferred build; inserts run on several of the pool's threads at once.
+        """
+        with self._counting:
+            self._pending += rows
+            if self._pending <= 0:
+                self._pending_since = None
+            elif self._pending_since is None or rows < 0:
+                self._pending_since = time.monotonic()
+
+    def search(
+        self, embeddings, limit: int = 1, output_fields: list = None, expr: str = None
+    ):
+        """
+        Runs one multi-vector ANN search over the `embedding` field and returns the hits as columnar `SearchResults`.
+        Only the fields named in `output_fields` are fetched, so vectors are only returned when `embedding` is asked for.
+        A filter `expr` is pushed down to Milvus, which prunes to the matching partitions when it tests the partition key.
+        """
+        output_fields = list(output_fields) if output_fields else []
+        data = self._vectors(embeddings)
+        self._loaded.wait()
+        _results = self.pool.run(
+            lambda collection: collection.search(
+                data=data,
+                anns_field="embedding",
+                param=self._search_params(),
+                limit=limit,
+                expr=expr,
+                output_fields=output_fields,
+            )
+        )
+        n = len(_results)
+        ids = np.full((n, limit), -1, dtype=np.int64)
+        distances = np.full((n, limit), np.nan, dtype=np.float32)
+        fields = {name: [] for name in output_fields if name != "embedding"}
+        if "embedding" in output_fields:
+            fields["embedding"] = np.zeros(
+                (n, limit, self.config.index.dimension), dtype=np.float32
+            )
+        for i, hits in enumerate(_results):
+            k = len(hits)
+            ids[i, :k] = hits.ids
+            distances[i, :k] = hits.distances
+            for name in output_fields:
+                if name == "embedding":
+                    if k:
+                        fields[name][i, :k] = [
+                            _vector(hit.entity.get(name)) for hit in hits
+                        ]
+                else:
+                    fields[name].append([hit.entity.get(name) for hit in hits])
+        return SearchResults(ids=ids, distances=distances, fields=fields)
+
+    def query(self, expr: str, output_fields: list = None):
+        """
+        Returns the rows matching the filter `expr` as dicts of their `id` and `output_fields`.
+        """
+        self._loaded.wait()
+        rows = self.pool.run(
+            lambda collection: collection.query(
+                expr=expr, output_fields=list(output_fields or [])
+            )
+        )
+        for row in rows:
+            if "embedding" in row:
+                row["embedding"] = _vector(row["embedding"]).tolist()
+        return rows
+
+    def scan(self, after: int = -1, batch_size: int = 1000, output_fields: list = None):
+        iterator = self.pool.run(
+            lambda collection: collection.query_iterator(
+                batch_size=batch_size,
+                expr=f"id > {after}",
+                output_fields=list(output_fields or ["document", "text"]),
+            )
+        )
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                yield rows
+        finally:
+            iterator.close()
+
+    def truncate(self, after: int):
+        """
+        Deletes every row with a primary key above `after`. Milvus allocates auto ids in increasing order, so these
+        are the rows inserted after the row `after`.
+        """
+        self.pool.run(lambda collection: collection.delete(expr=f"id > {after}"))
+        self.collection.flush()
+
+    def target(self) -> str:
+        """
+        Returns the collection behind the configured name, which is an alias once a migration was switched in.
+        """
+        return Collection(
+            name=self.config.index.name, using=self.config.session
+        ).describe()["collection_name"]
+
+    def _drop(self):
+        name, target = self.config.index.name, self.target()
+        if target != name:
+            utility.drop_alias(name, using=self.config.session)
+        utility.drop_collection(target, using=self.config.session)
+
+    def switch(self, shadow: str, keep: bool = True):
+        """
+        Points the configured name at the collection `shadow` through a Milvus alias, so searches and inserts move
+        to it in a single step. The first switch of a collection still has to rename it aside before its name can
+        become an alias, leaving the name unresolved for the moment between the rename and the alias; every later
+        switch only repoints the alias. The replaced collection keeps its name when `keep` is set.
+        """
+        name, session = self.config.index.name, self.config.session
+        retired = self.target()
+        if retired == name:
+            retired = f"{name}_retired_{int(time.time())}"
+            utility.rename_collection(name, retired, using=session)
+            utility.create_alias(shadow, name, using=session)
+        else:
+            utility.alter_alias(shadow, name, using=session)
+        if not keep:
+            utility.drop_collection(retired, using=session)
+        self.pool._collections.clear()
+        self.collection = Collection(name=name, using=self.config.session)
+        _f(
+            "success",
+            f"{shadow} switched in as {name}"
+            + (f", {name} retired as {retired}" if keep else ""),
+        )
+        return retired if keep else None
+
+    def info(self):
+        return self.collection
+
+    def _batches(
+        self,
+        source: str,
+        texts: list = None,
+        documents: list = None,
+        batch_size: int = 10000,
+    ):
+        """
+        Yields (documents, texts, embeddings) column batches from a Parquet, `.npz` or `.npy` source. Archives are
+        loaded without pickle support, so their `document` and `text` columns must be string, not object, arrays.
+        """
+        if source.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(source).iter_batches(
+                batch_size=batch_size, columns=["document", "text", "embedding"]
+            ):
+                yield (
+                    batch.column("document").to_pylist(),
+                    batch.column("text").to_pylist(),
+                    batch.column("embedding")
+                    .flatten()
+                    .to_numpy()
+                    .reshape(-1, self.config.index.dimension),
+                )
+            return
+        if source.endswith(".npz"):
+            arrays = np.load(source, allow_pickle=False)
+            documents, texts, embeddings = (
+                arrays["document"],
+                arrays["text"],
+                arrays["embedding"],
+            )
+        else:
+            embeddings = np.load(source, mmap_mode="r")
+            if (
+                texts is None
+                or documents is None
+                or len(texts) != len(embeddings)
+                or len(documents) != len(embeddings)
+            ):
+                raise ValueError(
+                    "a .npy source needs `texts` and `documents` with one entry per embedding"
+                )
+        for start in range(0, len(embeddings), batch_size):
+            yield (
+                [str(d) for d in documents[start : start + batch_size]],
+                [str(t) for t in texts[start : start + batch_size]],
+                np.asarray(embeddings[start : start + batch_size], dtype=np.float32),
+            )
+
+    async def bulk_load(
+        self,
+        source: str,
+        texts: list = None,
+        documents: list = None,
+        batch_size: int = 10000,
+        concurrency: int = 4,
+    ):
+        """
+        Backfills the collection from precomputed embeddings in large column-oriented batches.
+
+        The collection is released and its index dropped for the duration of the load, inserts run on the connection
+        pool's threads with at most `concurrency` in flight at once, and the index is built and the collection
+        reloaded once every row is in. A load that fails rebuilds the previous index and reloads the collection,
+        keeping the rows already inserted, before the error is raised.
+
+        Args:
+            source (str): A `.parquet` file or `.npz` archive with `document`, `text` and `embedding` columns, or a `.npy` embedding matrix.
+            texts (list, optional): The passages behind a `.npy` matrix, one per row.
+            documents (list, optional): The documents behind a `.npy` matrix, one per row.
+            batch_size (int, optional): Rows per insert. Defaults to 10000.
+            concurrency (int, optional): The most inserts in flight at once. Defaults to 4.
+
+        Returns:
+            dict: The rows loaded, seconds spent loading and building the index, and rows per second.
+        """
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(concurrency)
+        previous = self.index_options
+        self.collection.release()
+        if self.collection.has_index():
+            self.collection.drop_index()
+        _f("wait", f"bulk loading {source} into {self.config.index.name}")
+        start, rows, pending, loaded = time.perf_counter(), 0, [], None
+
+        async def _insert(batch):
+            try:
+                await loop.run_in_executor(self.executor, self.insert, *batch)
+            finally:
+                slots.release()
+
         try:
-            _f('warn', f"initializing {self.config.index.milvus_uri} using `root` to create '{user}'")
-            utility.reset_password('root', 'Milvus', self._pw(), using='magnet')
-            _f('warn', f'Your Milvus `root` user password is now {password}')
-            _f('success', f"secured root user successfully on {self.config.index.milvus_uri}")
-            utility.create_user(user, password, using='magnet')
-            _f('success', f"created requested {user} on {self.config.index.milvus_uri}")
+            for batch in self._batches(
+                source, texts=texts, documents=documents, batch_size=batch_size
+            ):
+                await slots.acquire()
+                pending.append(asyncio.create_task(_insert(batch)))
+                rows += len(batch[0])
+            await asyncio.gather(*pending)
+            await loop.run_in_executor(self.executor, self.collection.flush)
+            loaded = time.perf_counter() - start
+        finally:
+            if loaded is None:
+                await asyncio.gather(*pending, return_exceptions=True)
+                _f(
+                    "warn",
+                    f"bulk load of {source} failed, restoring the index of {self.config.index.name}",
+                )
+                await loop.run_in_executor(self.executor, self.build_index, previous)
+        _f(
+            "info",
+            f"{rows} rows loaded in {loaded:.1f}s ({rows / loaded:.0f} rows/s), building index",
+        )
+        await loop.run_in_executor(self.executor, self.build_index)
+        elapsed = time.perf_counter() - start
+        _f(
+            "success",
+            f"{rows} rows bulk loaded and indexed in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)",
+        )
+        return {
+            "rows": rows,
+            "load_seconds": loaded,
+            "seconds": elapsed,
+            "rows_per_second": rows / elapsed,
+        }
+
+    def initialize(self, user: str = "magnet", password: str = "33011033"):
+        try:
+            _f(
+                "warn",
+                f"initializing {self.config.index.milvus_uri} using `root` to create '{user}'",
+            )
+            utility.reset_password("root", "Milvus", self._pw(), using="magnet")
+            _f("warn", f"Your Milvus `root` user password is now {password}")
+            _f(
+                "success",
+                f"secured root user successfully on {self.config.index.milvus_uri}",
+            )
+            utility.create_user(user, password, using="magnet")
+            _f("success", f"created requested {user} on {self.config.index.milvus_uri}")
             try:
                 self.off()  # Disconnect first before re-connecting with new credentials
                 self.connection = connections.connect(
                     host=self.config.index.milvus_uri,
                     port=self.config.index.milvus_port,
                     user=user,
-                    password=password
+                    password=password,
                 )
-                _f('success', 'Milvus has been initialized with your new credentials')
+                _f("success", "Milvus has been initialized with your new credentials")
             except Exception as e:
-                _f('fatal', e)
+                _f("fatal", e)
         except Exception as e:
-            _f('fatal', e)
+            _f("fatal", e)
 
     async def delete_index(self):
         if utility.has_collection(self.config.index.name, using=self.config.session):
-            utility.drop_collection(self.config.index.name, using=self.config.session)
-            _f('warn', f"Index for {self.config.index.name} deleted")
-    
+            self._drop()
+            _f("warn", f"Index for {self.config.index.name} deleted")
+
     def list_indices(self):
         return utility.list_collections(using=self.config.session)
 
     def _pw(self):
         MAX_LEN = 24
-        DIGITS = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
-        LOCASE_CHARACTERS = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h',
-                             'i', 'j', 'k', 'm', 'n', 'o', 'p', 'q',
-                             'r', 's', 't', 'u', 'v', 'w', 'x', 'y',
-                             'z']
-        UPCASE_CHARACTERS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H',
-                             'I', 'J', 'K', 'M', 'N', 'O', 'P', 'Q',
-                             'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y',
-                             'Z']
-        SYMBOLS = ['@', '#', '$', '(', ')']
+        DIGITS = ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"]
+        LOCASE_CHARACTERS = [
+            "a",
+            "b",
+            "c",
+            "d",
+            "e",
+            "f",
+            "g",
+            "h",
+            "i",
+            "j",
+            "k",
+            "m",
+            "n",
+            "o",
+            "p",
+            "q",
+            "r",
+            "s",
+            "t",
+            "u",
+            "v",
+            "w",
+            "x",
+            "y",
+            "z",
+        ]
+        UPCASE_CHARACTERS = [
+            "A",
+            "B",
+            "C",
+            "D",
+            "E",
+            "F",
+            "G",
+            "H",
+            "I",
+            "J",
+            "K",
+            "M",
+            "N",
+            "O",
+            "P",
+            "Q",
+            "R",
+            "S",
+            "T",
+            "U",
+            "V",
+            "W",
+            "X",
+            "Y",
+            "Z",
+        ]
+        SYMBOLS = ["@", "#", "$", "(", ")"]
         COMBINED_LIST = DIGITS + UPCASE_CHARACTERS + LOCASE_CHARACTERS + SYMBOLS
         rand_digit = random.choice(DIGITS)
         rand_upper = random.choice(UPCASE_CHARACTERS)
@@ -99,7 +667,7 @@ class MilvusDB:
         temp_pass = rand_digit + rand_upper + rand_lower + rand_symbol
         for x in range(MAX_LEN - 4):
             temp_pass = temp_pass + random.choice(COMBINED_LIST)
-            temp_pass_list = array.array('u', temp_pass)
+            temp_pass_list = array.array("u", temp_pass)
             random.shuffle(temp_pass_list)
         password = ""
         for x in temp_pass_list:
@@ -0,0 +1,178 @@
+import numpy as np
+
+STORAGES = ("float32", "float16", "int8", "pq")
+
+
+def int8_dtype(dimension: int) -> np.dtype:
+    """
+    Returns the record of a scalar quantized vector: `dimension` int8 codes followed by the row's float32 scale.
+    """
+    return np.dtype([("codes", np.int8, (dimension,)), ("scale", "<f4")])
+
+
+def encode_int8(x: np.ndarray) -> np.ndarray:
+    """
+    Scalar quantizes float32 rows to int8, scaling every row by its own largest magnitude.
+    """
+    x = np.asarray(x, dtype=np.float32)
+    rows = np.zeros(len(x), dtype=int8_dtype(x.shape[1]))
+    scale = np.clip(np.abs(x).max(axis=1), 1e-12, None) / 127
+    rows["codes"] = np.round(x / scale[:, None]).astype(np.int8)
+    rows["scale"] = scale
+    return rows
+
+
+def decode_int8(rows: np.ndarray) -> np.ndarray:
+    return rows["codes"].astype(np.float32) * rows["scale"][..., None]
+
+
+class QuantizedMatrix:
+    """
+    A read-only view over stored vectors that decodes them to float32 on indexing, so code written against a
+    (rows, dimension) float32 matrix works unchanged on float16 or int8 storage.
+
+    Args:
+        stored (np.ndarray): The stored rows, typically a memory map.
+        storage (str): `float16` or `int8`.
+    """
+
+    def __init__(self, stored: np.ndarray, storage: str):
+        self.stored = stored
+        self.storage = storage
+
+    def __len__(self):
+        return len(self.stored)
+
+    @property
+    def shape(self):
+        return (
+            len(self.stored),
+            self.stored["codes"].shape[1]
+            if self.storage == "int8"
+            else self.stored.shape[1],
+        )
+
+    def __getitem__(self, index):
+        rows = self.stored[index]
+        if self.storage == "int8":
+            return decode_int8(rows)
+        return np.asarray(rows, dtype=np.float32)
+
+
+class ProductQuantizer:
+    """
+    Splits vectors into `m` sub-vectors and codes each as the nearest of `2 ** bits` centroids learned with k-means,
+    so a vector costs `m` bytes. Queries are scored against codes with per-query lookup tables (asymmetric distance
+    computation) without decoding them.
+
+    Args:
+        dimension (int): The vector dimension, divisible by `m`.
+        m (int, optional): The number of sub-vectors. Defaults to 64.
+        bits (int, optional): The bits per code, at most 8. Defaults to 8.
+        metric (str, optional): `COSINE`, `IP` or `L2`. Defaults to 'COSINE'.
+    """
+
+    def __init__(
+        self, dimension: int, m: int = 64, bits: int = 8, metric: str = "COSINE"
+    ):
+        if dimension % m:
+            raise ValueError(
+                f"dimension {dimension} is not divisible by {m} sub-vectors"
+            )
+        self.dimension = dimension
+        self.m = m
+        self.bits = bits
+        self.metric = metric
+        self.codebooks = None
+
+    def _split(self, x):
+        return np.asarray(x, dtype=np.float32).reshape(
+            len(x), self.m, self.dimension // self.m
+        )
+
+    def train(
+        self, x: np.ndarray, iterations: int = 20, sample: int = 65536, seed: int = 2077
+    ):
+        """
+        Learns the codebooks from up to `sample` rows of `x`.
+        """
+        rng = np.random.default_rng(seed)
+        x = np.asarray(x, dtype=np.float32)
+        if len(x) > sample:
+            x = x[np.sort(rng.choice(len(x), size=sample, replace=False))]
+        parts = self._split(x)
+        k = min(2**self.bits, len(x))
+        self.codebooks = np.zeros(
+            (self.m, k, self.dimension // self.m), dtype=np.float32
+        )
+        for j in range(self.m):
+            data = parts[:, j]
+            centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+            for _ in range(iterations):
+                assigned = self._nearest(data, centroids)
+                counts = np.bincount(assigned, minlength=k)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assigned, data)
+                empty = counts == 0
+                centroids[~empty] = sums[~empty] / counts[~empty, None]
+                if empty.any():
+                    centroids[empty] = data[
+                        rng.choice(len(data), size=int(empty.sum()))
+                    ]
+            self.codebooks[j] = centroids
+        return self
+
+    @staticmethod
+    def _nearest(data, centroids):
+        distances = (
+            (data**2).sum(axis=1)[:, None]
+            + (centroids**2).sum(axis=1)[None, :]
+            - 2 * data @ centroids.T
+        )
+        return distances.argmin(axis=1)
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        parts = self._split(x)
+        codes = np.zeros((len(parts), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = self._nearest(parts[:, j], self.codebooks[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        codes = np.asarray(codes)
+        return np.concatenate(
+            [self.codebooks[j][codes[:, j]] for j in range(self.m)], axis=1
+        )
+
+    def tables(self, q: np.ndarray) -> np.ndarray:
+        """
+        Returns the (queries, m, 2 ** bits) lookup tables of the similarity between each query sub-vector and each
+        centroid; negative squared distances for `L2`, so that higher is nearer for every metric.
+        """
+        parts = self._split(q)
+        if self.metric == "L2":
+            return -(((parts[:, :, None, :] - self.codebooks[None]) ** 2).sum(axis=-1))
+        return np.einsum("qjd,jkd->qjk", parts, self.codebooks)
+
+    def scores(self, tables: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        Scores coded rows against queries through their lookup tables, returning a (queries, rows) matrix.
+        """
+        codes = np.asarray(codes)
+        scores = np.zeros((len(tables), len(codes)), dtype=np.float32)
+        for j in range(self.m):
+            scores += tables[:, j, codes[:, j]]
+        return scores
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            codebooks=self.codebooks,
+            shape=np.array([self.dimension, self.m, self.bits]),
+        )
+
+    def load(self, path: str):
+        with np.load(path) as arrays:
+            self.codebooks = arrays["codebooks"]
+            self.dimension, self.m, self.bits = arrays["shape"].tolist()
+        return self
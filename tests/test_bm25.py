@@ -0,0 +1,64 @@
+from magnet.utils.index.bm25 import BM25Index, tokenize
+
+
+def test_tokenize_keeps_identifiers_whole():
+    assert tokenize("Bought BRK.B and X-1024 at 10/32") == [
+        "bought",
+        "brk.b",
+        "and",
+        "x-1024",
+        "at",
+        "10/32",
+    ]
+
+
+def test_bm25_ranking_and_persistence(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add(
+        [10, 11, 12], ["the ticker BRK.B rose", "the market rose", "the the the market"]
+    )
+
+    keys, scores = index.search("BRK.B", 5)
+    assert keys.tolist() == [10] and scores[0] > 0
+    assert index.search("market", 5)[0].tolist()[0] == 11
+    assert index.search("absent", 5)[0].tolist() == []
+
+    reloaded = BM25Index(str(tmp_path)).load()
+    assert len(reloaded) == 3
+    assert (
+        reloaded.search("market", 5)[0].tolist()
+        == index.search("market", 5)[0].tolist()
+    )
+    reloaded.clear()
+    assert len(BM25Index(str(tmp_path)).load()) == 0
+
+
+def test_a_reader_follows_the_writer_through_the_file(tmp_path):
+    writer, reader = BM25Index(str(tmp_path)), BM25Index(str(tmp_path)).load()
+    writer.add([1], ["the ticker BRK.B rose"])
+    assert reader.search("BRK.B", 5)[0].tolist() == [1]
+
+    with open(tmp_path / "bm25.jsonl", "a") as log:
+        log.write('[2, {"brk.b": 1')
+        log.flush()
+        assert reader.search("BRK.B", 5)[0].tolist() == [1]
+        log.write("}]\n")
+    assert sorted(reader.search("BRK.B", 5)[0].tolist()) == [1, 2]
+
+    writer.clear()
+    assert len(reader.search("BRK.B", 5)[0]) == 0 and len(reader) == 0
+    writer.add([4], ["the market rose again and again"])
+    assert reader.search("market", 5)[0].tolist() == [4] and len(reader) == 1
+
+
+def test_truncate_and_move(tmp_path):
+    shadow = BM25Index(str(tmp_path / "shadow"))
+    shadow.add([0, 1, 2], ["alpha", "beta", "gamma"])
+    shadow.truncate(1)
+    assert len(shadow) == 2 and len(BM25Index(shadow.path).load()) == 2
+
+    live = BM25Index(str(tmp_path / "live"))
+    live.add([7], ["alpha"])
+    shadow.move(live.path)
+    assert live.search("alpha", 5)[0].tolist() == [0]
+    assert not (tmp_path / "shadow" / "bm25.jsonl").exists()
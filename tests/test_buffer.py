@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+from magnet.utils.index.buffer import InsertBuffer
+
+
+class Sink:
+    def __init__(self):
+        self.texts = []
+
+    def insert(self, documents, texts, embeddings, partitions):
+        start = len(self.texts)
+        self.texts.extend(texts)
+        return list(range(start, len(self.texts)))
+
+
+@pytest.mark.asyncio
+async def test_flush_resolves_futures_and_clears_the_log(tmp_path):
+    sink = Sink()
+    buffer = InsertBuffer(sink.insert, 4, str(tmp_path), max_rows=100, max_age=100)
+    first = await buffer.submit(["doc"], ["a"], np.ones((1, 4)))
+    second = await buffer.submit(["doc", "doc"], ["b", "c"], np.ones((2, 4)))
+
+    assert await buffer.flush() == 3
+    assert await first == [0]
+    assert await second == [1, 2]
+    await buffer.close()
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_replay_only_takes_logs_of_dead_buffers(tmp_path):
+    sink = Sink()
+    live = InsertBuffer(sink.insert, 4, str(tmp_path), max_rows=100, max_age=100)
+    dead = InsertBuffer(sink.insert, 4, str(tmp_path), max_rows=100, max_age=100)
+    await live.submit(["doc"], ["live"], np.ones((1, 4)))
+    await dead.submit(["doc", "doc"], ["dead", "rows"], np.ones((2, 4)))
+    dead._lock.close()
+
+    replayed = []
+    fresh = InsertBuffer(sink.insert, 4, str(tmp_path))
+    assert fresh.replay(lambda keys, *rows: replayed.append((keys, *rows))) == 2
+    [(keys, documents, texts, embeddings, partitions)] = replayed
+    assert (keys, documents, texts) == ([0, 1], ["doc", "doc"], ["dead", "rows"])
+    assert embeddings.shape == (2, 4) and partitions == [None, None]
+    assert os.listdir(tmp_path) == [os.path.basename(live.path)]
+
+    assert fresh.replay() == 0
+    assert await live.flush() == 1
+    assert sink.texts == ["dead", "rows", "live"]
+    await live.close()
+
+
+@pytest.mark.asyncio
+async def test_replay_skips_a_torn_record(tmp_path):
+    sink = Sink()
+    dead = InsertBuffer(sink.insert, 4, str(tmp_path), max_rows=100, max_age=100)
+    await dead.submit(["doc"], ["kept"], np.ones((1, 4)))
+    await dead.submit(["doc"], ["torn"], np.ones((1, 4)))
+    dead._wal.truncate(os.path.getsize(dead._wal.name) - 3)
+    dead._lock.close()
+
+    assert InsertBuffer(sink.insert, 4, str(tmp_path)).replay() == 1
+    assert sink.texts == ["kept"]
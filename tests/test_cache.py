@@ -0,0 +1,56 @@
+import numpy as np
+
+from magnet.ize.cache import EmbeddingCache
+
+INSTRUCTION = "Represent this information for searching relevant passages: "
+
+
+class Encoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text), 1, 0, 0] for text in texts], dtype=np.float32)
+
+
+def test_only_misses_are_encoded():
+    cache, encoder = EmbeddingCache("model", 4, capacity=8), Encoder()
+    cache.encode(encoder, INSTRUCTION, ["a", "bb"])
+    embeddings = cache.encode(encoder, INSTRUCTION, ["a  ", "ccc", "bb"])
+
+    assert encoder.calls == [["a", "bb"], ["ccc"]]
+    assert embeddings[:, 0].tolist() == [1, 3, 2]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_instructions_are_separate_entries():
+    cache, encoder = EmbeddingCache("model", 4), Encoder()
+    cache.encode(encoder, INSTRUCTION, ["a"])
+    cache.encode(encoder, "query: ", ["a"])
+    assert len(encoder.calls) == 2
+
+
+def test_disk_tier_survives_restarts(tmp_path):
+    encoder = Encoder()
+    EmbeddingCache("org/model", 4, capacity=1, path=str(tmp_path)).encode(
+        encoder, INSTRUCTION, ["a", "bb"]
+    )
+
+    cache = EmbeddingCache("org/model", 4, capacity=1, path=str(tmp_path))
+    assert cache.encode(encoder, INSTRUCTION, ["bb", "a"])[:, 0].tolist() == [2, 1]
+    assert len(encoder.calls) == 1
+    assert cache.get_many("query: ", ["a"]) == [None]
+
+
+def test_disk_tier_is_kept_per_encoder_backend(tmp_path):
+    encoder = Encoder()
+    EmbeddingCache("model", 4, path=str(tmp_path), backend="torch").encode(
+        encoder, INSTRUCTION, ["a"]
+    )
+
+    onnx = EmbeddingCache("model", 4, capacity=0, path=str(tmp_path), backend="onnx")
+    onnx.encode(encoder, INSTRUCTION, ["a"])
+    onnx.encode(encoder, INSTRUCTION, ["a"])
+    assert encoder.calls == [["a"], ["a"]]
+    assert onnx.stats["memory"] == 0 and onnx.stats["disk"] == 1
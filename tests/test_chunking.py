@@ -0,0 +1,60 @@
+import re
+
+import pytest
+
+from magnet.utils.globals import sliding_window_chunks
+
+
+class WhitespaceTokenizer:
+    """
+    A fast-tokenizer stand-in with one token per word and character offset mappings.
+    """
+
+    is_fast = True
+
+    def __call__(self, texts, **kwargs):
+        return {
+            "offset_mapping": [
+                [m.span() for m in re.finditer(r"\S+", text)] for text in texts
+            ]
+        }
+
+
+def windows(text, max_tokens, overlap=0, **kwargs):
+    return [
+        text[s:e].split()
+        for s, e in sliding_window_chunks(
+            text, WhitespaceTokenizer(), max_tokens, overlap, **kwargs
+        )
+    ]
+
+
+def test_windows_cover_the_text_with_overlap():
+    text = " ".join(f"w{i}" for i in range(10))
+    assert windows(text, 4, 1) == [
+        ["w0", "w1", "w2", "w3"],
+        ["w3", "w4", "w5", "w6"],
+        ["w6", "w7", "w8", "w9"],
+    ]
+    assert windows(text, 4) == [
+        ["w0", "w1", "w2", "w3"],
+        ["w4", "w5", "w6", "w7"],
+        ["w8", "w9"],
+    ]
+
+
+def test_blocks_do_not_change_the_windows():
+    text = " ".join(f"w{i}" for i in range(1000))
+    assert windows(text, 16, 4, block_chars=50, batch_blocks=3) == windows(text, 16, 4)
+
+
+def test_short_and_empty_texts():
+    assert windows("one two", 8) == [["one", "two"]]
+    assert windows("", 8) == []
+
+
+def test_invalid_windows():
+    with pytest.raises(ValueError):
+        windows("text", 4, 4)
+    with pytest.raises(ValueError):
+        list(sliding_window_chunks("text", object(), 4))
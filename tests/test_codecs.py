@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import xxhash
+
+from magnet.utils.data_classes import Payload
+from magnet.ic.codecs import encode, decode, canonical_key, CODEC_HEADER
+
+ARRAYS = [
+    np.arange(12, dtype=np.float32).reshape(3, 4),
+    np.arange(6, dtype=">f8").reshape(2, 3)[:, ::2],
+    np.zeros((0, 3), dtype=np.float32),
+    np.zeros(0, dtype=np.int64),
+]
+
+
+def test_json_matches_the_baseline_wire_format():
+    data, headers = encode(Payload(content="text", _id="1"))
+    assert data == b'{"content":"text", "_id":"1"}'
+    assert headers == {}
+    assert decode(data) == {"content": "text", "_id": "1"}
+    assert decode(data, cls=Payload) == Payload(content="text", _id="1")
+
+    data, _ = encode(Payload(content="text", _id="1", tenant="t"))
+    assert data == b'{"content":"text", "_id":"1", "tenant":"t"}'
+
+
+@pytest.mark.parametrize(
+    "array", ARRAYS, ids=["float32", "big-endian", "empty-2d", "empty"]
+)
+@pytest.mark.parametrize("codec", ["msgpack", "ndarray"])
+def test_arrays_round_trip(codec, array):
+    if codec == "msgpack":
+        pytest.importorskip("msgpack")
+    hasher = xxhash.xxh64()
+    data, headers = encode(Payload(content=array, _id="1", tenant="t"), codec, hasher)
+
+    assert headers == {CODEC_HEADER: codec}
+    assert hasher.hexdigest() == xxhash.xxh64(data).hexdigest()
+    decoded = decode(data, headers, cls=Payload)
+    assert decoded._id == "1" and decoded.tenant == "t"
+    assert decoded.content.shape == array.shape
+    assert np.array_equal(decoded.content, array)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        encode(Payload(content="text", _id="1"), "pickle")
+
+
+def test_canonical_key_ignores_contents_and_includes_the_subject():
+    a = Payload(content=np.ones(4), _id="1")
+    b = Payload(content=np.zeros(4), _id="1")
+    assert canonical_key(a, "magnet.a") == canonical_key(b, "magnet.a")
+    assert canonical_key(a, "magnet.a") != canonical_key(a, "magnet.b")
+    assert canonical_key(a, "magnet.a") != canonical_key(
+        Payload(content=1, _id="2"), "magnet.a"
+    )
@@ -0,0 +1,99 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from magnet.utils.data_classes import MagnetConfig
+from magnet.ic.compression import (
+    Compression,
+    ENCODING_HEADER,
+    DICTIONARY_HEADER,
+    DICTIONARY_ID_HEADER,
+)
+
+
+class KV:
+    def __init__(self):
+        self.entries = {}
+
+    async def put(self, key, value):
+        self.entries[key] = value
+
+    async def get(self, key):
+        return SimpleNamespace(value=self.entries[key])
+
+
+def compression(kv=None, **config):
+    config = MagnetConfig(host="127.0.0.1", compression_threshold=64, **config)
+    return Compression(SimpleNamespace(config=config, kv=kv or KV()))
+
+
+def samples(tag, n=300, seed=2077):
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", tag]
+    return [
+        (
+            f'{{"_id":"{i}","content":"'
+            + " ".join(rng.choice(words) for _ in range(40))
+            + '"}'
+        ).encode()
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("algorithm", ["zstd", "lz4"])
+async def test_round_trip(algorithm):
+    pytest.importorskip("zstandard" if algorithm == "zstd" else "lz4")
+    codec = compression(compression=algorithm)
+    body = b"magnet " * 100
+    data, headers = await codec.compress(body)
+
+    assert headers == {ENCODING_HEADER: algorithm}
+    assert len(data) < len(body)
+    assert await codec.decompress(data, headers) == body
+
+
+@pytest.mark.asyncio
+async def test_small_bodies_are_sent_as_they_are():
+    codec = compression(compression="zstd")
+    assert await codec.compress(b"magnet") == (b"magnet", {})
+    assert await codec.decompress(b"magnet", {}) == b"magnet"
+
+
+@pytest.mark.asyncio
+async def test_retrained_dictionary_keeps_old_messages_readable():
+    pytest.importorskip("zstandard")
+    kv = KV()
+    producer = compression(kv, compression="zstd", compression_dictionary="payloads")
+    consumer = compression(kv, compression="zstd", compression_dictionary="payloads")
+    body = samples("first")[0]
+
+    first = await producer.train(samples("first"), "payloads", size=2048)
+    old, old_headers = await producer.compress(body)
+    second = await producer.train(samples("second", seed=7), "payloads", size=2048)
+    new, new_headers = await producer.compress(body)
+
+    assert first != second
+    assert (
+        old_headers[DICTIONARY_HEADER] == new_headers[DICTIONARY_HEADER] == "payloads"
+    )
+    assert (old_headers[DICTIONARY_ID_HEADER], new_headers[DICTIONARY_ID_HEADER]) == (
+        str(first),
+        str(second),
+    )
+    assert await consumer.decompress(new, new_headers) == body
+    assert await consumer.decompress(old, old_headers) == body
+
+
+@pytest.mark.asyncio
+async def test_inflate_drops_the_compression_headers():
+    pytest.importorskip("zstandard")
+    codec = compression(compression="zstd")
+    body = b"magnet " * 100
+    data, headers = await codec.compress(body)
+    msg = SimpleNamespace(data=data, headers={**headers, "Nats-Msg-Id": "1"})
+
+    await codec.inflate(msg)
+    assert msg.data == body
+    assert msg.headers == {"Nats-Msg-Id": "1"}
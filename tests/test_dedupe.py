@@ -0,0 +1,47 @@
+import numpy as np
+
+from magnet.ize.dedupe import DedupeFilter
+
+EYE = np.eye(4, dtype=np.float32)
+
+
+def test_exact_and_vector_stages():
+    dedupe = DedupeFilter(4, capacity=8, threshold=0.98)
+    dedupe.remember(["seen"], EYE[:1])
+
+    near = np.array([[0.999, 0.04, 0, 0]], dtype=np.float32)
+    near /= np.linalg.norm(near)
+    assert dedupe.check(
+        ["seen", "near", "new"], np.concatenate([EYE[1:2], near, EYE[2:3]])
+    ) == [True, True, None]
+    assert (dedupe.exact_hits, dedupe.vector_hits, dedupe.misses) == (1, 1, 1)
+
+
+def test_duplicates_within_a_batch():
+    dedupe = DedupeFilter(4)
+    assert dedupe.check(["a", "b", "c"], EYE[[0, 0, 1]]) == [None, True, None]
+
+
+def test_capacity_evicts_least_recently_used():
+    dedupe = DedupeFilter(4, capacity=2)
+    dedupe.remember(None, EYE[:2])
+    dedupe.check(None, EYE[:1])
+    dedupe.remember(None, EYE[2:3])
+    assert dedupe.check(None, EYE[:3]) == [True, None, True]
+
+
+def test_clear_forgets_everything():
+    dedupe = DedupeFilter(4)
+    dedupe.remember(["a"], EYE[:1])
+    dedupe.clear()
+    assert dedupe.check(["a"], EYE[:1]) == [None]
+
+
+def test_partitions_are_checked_apart():
+    dedupe = DedupeFilter(4)
+    dedupe.remember(["a"], EYE[:1], ["tenant-a"])
+    assert dedupe.check(["a", "a"], EYE[[0, 0]], ["tenant-a", "tenant-b"]) == [
+        True,
+        None,
+    ]
+    assert dedupe.check(None, EYE[[1, 1]], ["tenant-a", "tenant-b"]) == [None, None]
@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+import pytest
+
+from magnet.utils.data_classes import MagnetConfig, IndexConfig
+from magnet.utils.index.embedded import EmbeddedDB, _clauses
+
+
+def embedded(path, **index):
+    index = {
+        "dimension": 8,
+        "name": "test",
+        "backend": "embedded",
+        "path": str(path),
+        "partition_key": "session",
+        **index,
+    }
+    return EmbeddedDB(
+        MagnetConfig(host="127.0.0.1", session="s", index=IndexConfig(**index))
+    )
+
+
+def normalized(rows, dimension=8, seed=2077):
+    x = np.random.default_rng(seed).normal(size=(rows, dimension)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+async def test_insert_search_and_reload(tmp_path, storage):
+    db = embedded(tmp_path, vector_storage=storage)
+    await db.create(overwrite=True)
+    await db.load()
+    x = normalized(20)
+    keys = db.insert(["doc"] * 20, [f"passage {i}" for i in range(20)], x)
+    assert keys == list(range(20))
+
+    found = db.search(x[:3], limit=2, output_fields=["text"])
+    assert found.ids[:, 0].tolist() == [0, 1, 2]
+    assert found.fields["text"][1][0] == "passage 1"
+
+    reloaded = embedded(tmp_path, vector_storage=storage)
+    await reloaded.load()
+    assert len(reloaded) == 20
+    assert reloaded.vectors().shape == (20, 8)
+    assert (
+        reloaded.query("id in [4, 5]", output_fields=["text"])[1]["text"] == "passage 5"
+    )
+
+
+@pytest.mark.asyncio
+async def test_partition_filters(tmp_path):
+    db = embedded(tmp_path)
+    await db.create(overwrite=True)
+    await db.load()
+    db.insert(["doc"] * 4, list("abcd"), normalized(4), ["x", "y", "x", "y"])
+
+    assert db._select('session == "x"').tolist() == [0, 2]
+    assert db._select('(id in [0, 1, 2]) and (session in ["y"])').tolist() == [1]
+    assert db._select(
+        '(id in [0, 1, 2]) and ((session == "y") and (session in ["y"]))'
+    ).tolist() == [1]
+    found = db.search(normalized(4)[:1], limit=4, expr='session == "y"')
+    assert found.ids[0].tolist()[2:] == [-1, -1]
+    assert set(found.ids[0].tolist()[:2]) == {1, 3}
+    with pytest.raises(ValueError):
+        db._select("(id == 1) or (id == 2)")
+
+
+def test_clauses_strip_balanced_parentheses():
+    assert _clauses('(id in [1, 2]) and ((a == "x") and (b == "y"))') == [
+        "id in [1, 2]",
+        'a == "x"',
+        'b == "y"',
+    ]
+    assert _clauses('a == "x and y"') == ['a == "x and y"']
+    assert _clauses("((id == 3))") == ["id == 3"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_inserts_get_unique_keys(tmp_path):
+    db = embedded(tmp_path)
+    await db.create(overwrite=True)
+    await db.load()
+    keys = [[] for _ in range(4)]
+
+    def insert(worker):
+        for i in range(25):
+            texts = [f"{worker}-{i}-{j}" for j in range(4)]
+            keys[worker].extend(db.insert(["doc"] * 4, texts, normalized(4, seed=i)))
+
+    threads = [threading.Thread(target=insert, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    flat = [key for worker in keys for key in worker]
+    assert sorted(flat) == list(range(400))
+    rows = db._rows(flat)
+    assert all(
+        rows[key]["text"].startswith(f"{worker}-")
+        for worker in range(4)
+        for key in keys[worker]
+    )
+
+
+@pytest.mark.asyncio
+async def test_truncate(tmp_path):
+    db = embedded(tmp_path)
+    await db.create(overwrite=True)
+    await db.load()
+    db.insert(
+        ["doc"] * 6, list("abcdef"), normalized(6), ["x", "y", "x", "y", "x", "y"]
+    )
+    db.truncate(2)
+
+    assert len(db) == 3
+    assert db._select('session == "y"').tolist() == [1]
+    assert db.insert(["doc"], ["g"], normalized(1)) == [3]
+
+    reloaded = embedded(tmp_path)
+    await reloaded.load()
+    assert [
+        row["text"]
+        for row in reloaded.query("id in [0, 1, 2, 3]", output_fields=["text"])
+    ] == list("abcg")
@@ -0,0 +1,49 @@
+import numpy as np
+
+from magnet.ize.encoders import BucketedEncoder
+
+
+class Tokenizer:
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": [text.split() for text in texts]}
+
+
+class Encoder:
+    """
+    Embeds every input as its word count and records the batches it was called with.
+    """
+
+    max_seq_length = 512
+    tokenizer = Tokenizer()
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        self.batches.append(list(texts))
+        return np.array([[len(text.split()), 1] for text in texts], dtype=np.float32)
+
+
+def test_embeddings_come_back_in_input_order():
+    texts = [" ".join(["w"] * n) for n in (9, 1, 300, 5, 70, 2)]
+    encoder = BucketedEncoder(Encoder(), boundaries=[4, 64])
+
+    embeddings = encoder.encode(texts)
+    assert embeddings[:, 0].tolist() == [9, 1, 300, 5, 70, 2]
+    assert [[len(text.split()) for text in batch] for batch in encoder.batches] == [
+        [1, 2],
+        [5, 9],
+        [70, 300],
+    ]
+    assert {bucket: stats["passages"] for bucket, stats in encoder.stats.items()} == {
+        4: 2,
+        64: 2,
+        "max": 2,
+    }
+
+
+def test_single_sentences_and_empty_batches():
+    encoder = BucketedEncoder(Encoder(), boundaries=[4])
+    assert encoder.encode("one two").tolist() == [2, 1]
+    assert encoder.encode([]).shape == (0,)
+    assert encoder.max_seq_length == 512
@@ -0,0 +1,124 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import xxhash
+from nats.errors import TimeoutError
+
+from magnet.ic.field import Charge
+from magnet.utils.data_classes import MagnetConfig, Payload, EmbeddingPayload
+
+
+class JetStream:
+    """
+    Acks publishes after a random delay, timing out the first `flaky` attempts of each listed message.
+    """
+
+    def __init__(self, flaky=None):
+        self.flaky = dict(flaky or {})
+        self.published = []
+        self.in_flight = self.most_in_flight = 0
+
+    async def publish(self, subject, payload, stream=None, timeout=None, headers=None):
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(random.random() / 100)
+            self.published.append((payload, dict(headers or {})))
+            _id = payload.decode().partition('"_id":"')[2].split('"')[0]
+            if self.flaky.get(_id):
+                self.flaky[_id] -= 1
+                raise TimeoutError
+            return SimpleNamespace(seq=len(self.published), stream=stream)
+        finally:
+            self.in_flight -= 1
+
+
+def charge(js, **config):
+    statuses = []
+    magnet = SimpleNamespace(
+        config=MagnetConfig(
+            host="127.0.0.1", category="magnet.test", stream_name="s", **config
+        ),
+        js=js,
+        nc=SimpleNamespace(max_payload=1 << 20),
+        status_callback=statuses.append,
+    )
+    return Charge(magnet), statuses
+
+
+@pytest.mark.asyncio
+async def test_pulse_many_keeps_the_payload_order():
+    js = JetStream()
+    field, _ = charge(js)
+    payloads = (Payload(content=f"passage {i}", _id=str(i)) for i in range(50))
+
+    results = await field.pulse_many(payloads, window=8)
+    assert [result._id for result in results] == [str(i) for i in range(50)]
+    assert all(result.ack and result.attempts == 1 for result in results)
+    assert js.most_in_flight <= 8
+
+
+@pytest.mark.asyncio
+async def test_pulse_many_retries_with_the_same_message_id():
+    js = JetStream(flaky={"flaky": 2, "dead": 10})
+    field, statuses = charge(js)
+    payloads = [
+        Payload(content="a", _id="flaky"),
+        Payload(content="b", _id="dead"),
+        Payload(content="c", _id="fine"),
+    ]
+
+    flaky, dead, fine = await field.pulse_many(payloads, retries=2)
+    assert (flaky.attempts, flaky.error) == (3, None) and flaky.ack
+    assert (dead.ack, dead.attempts) == (None, 3) and dead.error
+    assert fine.ack and fine.attempts == 1
+
+    attempts = [
+        (data, h["Nats-Msg-Id"]) for data, h in js.published if b"flaky" in data
+    ]
+    assert len(attempts) == 3 and len(set(attempts)) == 1
+    assert [status.type for status in statuses] == ["fatal"]
+
+
+@pytest.mark.asyncio
+async def test_pulse_many_payloads_without_an_id():
+    field, _ = charge(JetStream())
+    payloads = [
+        EmbeddingPayload(document="d", embedding=[1.0], content="c", model="m"),
+        Payload(content="a", _id="a"),
+    ]
+    assert [r._id for r in await field.pulse_many(payloads)] == ["0", "a"]
+
+    failed = await field.pulse_many(payloads, dedupe="id")
+    assert failed[0]._id == "0" and failed[0].error and failed[1].ack
+
+
+@pytest.mark.asyncio
+async def test_frame_message_ids():
+    field, _ = charge(JetStream())
+    payload = Payload(content=np.arange(4.0), _id="1")
+    changed = Payload(content=np.zeros(4), _id="1")
+
+    data, headers = await field._frame(payload, "ndarray", "magnet.a", "content")
+    assert headers["Nats-Msg-Id"] == xxhash.xxh64(data).hexdigest()
+
+    _, headers = await field._frame(payload, "ndarray", "magnet.a", "id")
+    assert headers["Nats-Msg-Id"] == "magnet.a:1"
+
+    key = (await field._frame(payload, "ndarray", "magnet.a", "key"))[1]
+    assert key == (await field._frame(changed, "ndarray", "magnet.a", "key"))[1]
+    assert key != (await field._frame(payload, "ndarray", "magnet.b", "key"))[1]
+
+    assert "Nats-Msg-Id" not in (await field._frame(payload, "json", "a", None))[1]
+    with pytest.raises(ValueError):
+        await field._frame(payload, "json", "magnet.a", "hash")
+    with pytest.raises(ValueError):
+        await field._frame(
+            EmbeddingPayload(document="d", embedding=[1.0], content="c", model="m"),
+            "json",
+            "magnet.a",
+            "id",
+        )
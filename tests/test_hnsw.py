@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from magnet.utils.index.hnsw import HNSW
+
+
+def normalized(rows, dimension=16, seed=2077):
+    x = np.random.default_rng(seed).normal(size=(rows, dimension)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def recall(found, truth):
+    return np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+
+
+@pytest.mark.parametrize("metric", ["COSINE", "L2"])
+def test_hnsw_recall_and_persistence(tmp_path, metric):
+    x, q = normalized(1000), normalized(20, seed=7)
+    graph = HNSW(lambda: x, M=8, ef_construction=64, metric=metric)
+    for node in range(len(x)):
+        graph.add(node)
+    scores = -((q[:, None] - x[None]) ** 2).sum(axis=-1) if metric == "L2" else q @ x.T
+    truth = np.argsort(-scores, axis=1)[:, :10]
+    found = [graph.search(query, 10, ef=64)[1] for query in q]
+    assert recall(found, truth) >= 0.9
+
+    graph.save(str(tmp_path / "hnsw.npz"))
+    loaded = HNSW(lambda: x, M=8, ef_construction=64, metric=metric)
+    loaded.load(str(tmp_path / "hnsw.npz"))
+    assert [loaded.search(query, 10, ef=64)[1].tolist() for query in q] == [
+        f.tolist() for f in found
+    ]
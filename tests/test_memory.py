@@ -0,0 +1,201 @@
+import re
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import magnet.ize.memory as memory_module
+from magnet.utils.data_classes import MagnetConfig, IndexConfig, Payload
+
+
+class Tokenizer:
+    """
+    A fast-tokenizer stand-in with one token per word.
+    """
+
+    is_fast = True
+
+    def __call__(self, texts, **kwargs):
+        spans = [[m.span() for m in re.finditer(r"\S+", text)] for text in texts]
+        return {
+            "input_ids": [list(range(len(s))) for s in spans],
+            "offset_mapping": spans,
+        }
+
+    def tokenize(self, text):
+        return text.split()
+
+
+class Model:
+    """
+    An encoder embedding every input as a unit vector seeded by its checksum.
+    """
+
+    device = "cpu"
+    max_seq_length = 64
+    tokenizer = Tokenizer()
+
+    def __init__(self, dimension=8):
+        self.dimension = dimension
+        self.encoded = []
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        self.encoded.extend(texts)
+        x = np.array(
+            [
+                np.random.default_rng(zlib.crc32(text.encode())).normal(
+                    size=self.dimension
+                )
+                for text in texts
+            ],
+            dtype=np.float32,
+        ).reshape(-1, self.dimension)
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+class Msg:
+    def __init__(self):
+        self.acked = self.nakd = False
+
+    async def ack_sync(self):
+        self.acked = True
+
+    async def nak(self):
+        self.nakd = True
+
+    async def in_progress(self):
+        pass
+
+
+async def memory(tmp_path, monkeypatch, **index):
+    model = Model()
+    monkeypatch.setattr(memory_module, "load_encoder", lambda *args, **kwargs: model)
+    monkeypatch.setattr(
+        memory_module, "Utils", lambda: SimpleNamespace(check_cuda=lambda: "cpu")
+    )
+    index = {
+        "dimension": 8,
+        "model": "model",
+        "name": "test",
+        "backend": "embedded",
+        "path": str(tmp_path / "index"),
+        "cache_capacity": 0,
+        **index,
+    }
+    config = MagnetConfig(host="127.0.0.1", session="s", index=IndexConfig(**index))
+    memory = memory_module.Memory(SimpleNamespace(config=config))
+    await memory.on(create=True)
+    return memory
+
+
+def batch(*texts):
+    return [
+        (Payload(content=text, _id=f"doc-{i}"), Msg()) for i, text in enumerate(texts)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_index_many_writes_new_passages_and_acks(tmp_path, monkeypatch):
+    mem = await memory(tmp_path, monkeypatch)
+    first = batch("alpha beta", "gamma delta")
+    await mem.index_many(first)
+
+    assert len(mem.db) == 2
+    assert all(msg.acked and not msg.nakd for _, msg in first)
+    assert [row["document"] for row in mem.db.query("id in [0, 1]", ["document"])] == [
+        "doc-0",
+        "doc-1",
+    ]
+
+    again = batch("gamma delta", "epsilon", "epsilon")
+    await mem.index_many(again)
+    assert len(mem.db) == 3
+    assert all(msg.acked for _, msg in again)
+    await mem.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_index_many_naks_a_failed_batch(tmp_path, monkeypatch):
+    mem = await memory(tmp_path, monkeypatch)
+
+    def insert(*args):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(mem.db, "insert", insert)
+    failed = batch("alpha", "beta")
+    await mem.index_many(failed)
+
+    assert all(msg.nakd and not msg.acked for _, msg in failed)
+    assert len(mem.db) == 0
+    await mem.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_buffered_batches_are_acked_once_flushed(tmp_path, monkeypatch):
+    mem = await memory(
+        tmp_path,
+        monkeypatch,
+        buffer_rows=100,
+        buffer_age=100,
+        buffer_path=str(tmp_path / "wal"),
+    )
+    buffered = batch("alpha", "beta")
+    await mem.index_many(buffered)
+    assert not any(msg.acked for _, msg in buffered)
+    assert len(mem.db) == 0
+
+    await mem.stop()
+    assert all(msg.acked for _, msg in buffered)
+    assert len(mem.db) == 2
+    await mem.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_surfaces_exact_identifiers(tmp_path, monkeypatch):
+    mem = await memory(
+        tmp_path, monkeypatch, hybrid=True, bm25_path=str(tmp_path / "bm25")
+    )
+    texts = [f"quarterly filing number {i}" for i in range(8)]
+    await mem.index_many(batch(*texts[:4], "holdings include BRK.B", *texts[4:]))
+
+    results = mem.search("BRK.B", limit=2)
+    assert "holdings include BRK.B" in [result["text"] for result in results]
+    assert all("score" in result for result in results)
+    await mem.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_duplicates_are_only_skipped_within_a_partition(tmp_path, monkeypatch):
+    mem = await memory(tmp_path, monkeypatch, partition_key="tenant")
+    tenants = lambda *pairs: [
+        (Payload(content=text, _id=f"doc-{i}", tenant=tenant), Msg())
+        for i, (tenant, text) in enumerate(pairs)
+    ]
+    await mem.index_many(tenants(("a", "alpha"), ("b", "alpha")))
+    assert len(mem.db) == 2
+
+    mem.dedupe.clear()
+    await mem.index_many(tenants(("a", "alpha"), ("c", "alpha"), ("c", "alpha")))
+    assert len(mem.db) == 3
+    rows = mem.db.query("id in [0, 1, 2]", ["tenant"])
+    assert sorted(row["tenant"] for row in rows) == ["a", "b", "c"]
+    await mem.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_replayed_rows_are_remembered_as_indexed(tmp_path, monkeypatch):
+    buffered = dict(buffer_rows=100, buffer_age=100, buffer_path=str(tmp_path / "wal"))
+    dead = await memory(tmp_path, monkeypatch, **buffered)
+    await dead.index_many(batch("alpha", "beta"))
+    dead.db.buffer._lock.close()
+
+    mem = await memory(tmp_path, monkeypatch, **buffered)
+    assert len(mem.db) == 2
+    redelivered = batch("alpha", "beta")
+    await mem.index_many(redelivered)
+    await mem.stop()
+    assert len(mem.db) == 2
+    assert all(msg.acked for _, msg in redelivered)
+    assert mem.dedupe.exact_hits == 2
+    await mem.disconnect()
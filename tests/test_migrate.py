@@ -0,0 +1,88 @@
+import zlib
+from dataclasses import replace
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import magnet.ize.migrate as migrate_module
+from magnet.utils.data_classes import MagnetConfig, IndexConfig, MigrateParams, Run
+from magnet.utils.index.base import load_index
+from magnet.utils.index.bm25 import BM25Index
+
+
+class Model:
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        x = np.array(
+            [
+                np.random.default_rng(zlib.crc32(text.encode())).normal(size=4)
+                for text in texts
+            ],
+            dtype=np.float32,
+        )
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+class KV:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return SimpleNamespace(value=self.values[key])
+
+    async def put(self, key, value):
+        self.values[key] = value
+
+
+@pytest.mark.asyncio
+async def test_migration_switches_the_collection_and_its_bm25_index(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(migrate_module, "load_encoder", lambda *a, **k: Model())
+    monkeypatch.setattr(
+        migrate_module, "Utils", lambda: SimpleNamespace(check_cuda=lambda: "cpu")
+    )
+    index = IndexConfig(
+        dimension=8,
+        model="old",
+        name="test",
+        backend="embedded",
+        path=str(tmp_path / "index"),
+        hybrid=True,
+        bm25_path=str(tmp_path / "bm25"),
+        buckets=[],
+    )
+    config = MagnetConfig(host="127.0.0.1", session="s", index=index)
+    source = load_index(config)
+    await source.create(overwrite=True)
+    await source.load()
+    texts = [f"filing number {i}" for i in range(5)]
+    source.insert(["doc"] * 5, texts, np.eye(8, dtype=np.float32)[:5])
+    live = BM25Index(index.bm25_path)
+    live.add([100], ["a stale filing"])
+
+    migration = migrate_module.Migration(
+        SimpleNamespace(config=config, runs_kv=KV()),
+        MigrateParams(model="new", dimension=4, batch_size=2),
+    )
+    build = migration.shadow.build_index
+
+    def build_index():
+        migration.source.insert(
+            ["doc"], ["filing written during the build"], np.ones((1, 8))
+        )
+        return build()
+
+    monkeypatch.setattr(migration.shadow, "build_index", build_index)
+    result = await migration.run(
+        Run(_id="run", _job=None, _type="migrate", start_time="now")
+    )
+
+    assert result["rows"] == 6 and result["retired"].startswith("test_retired_")
+    switched = load_index(
+        MagnetConfig(host="127.0.0.1", session="s", index=replace(index, dimension=4))
+    )
+    await switched.load()
+    assert len(switched) == 6
+    assert live.search("filing", 10)[0].tolist() == list(range(6))
+    assert live.search("stale", 10)[0].tolist() == []
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from magnet.utils.index.quantize import ProductQuantizer, QuantizedMatrix, encode_int8
+
+
+def normalized(rows, dimension=16, seed=2077):
+    x = np.random.default_rng(seed).normal(size=(rows, dimension)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def recall(found, truth):
+    return np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+
+
+def test_product_quantizer_ranks_close_to_exact(tmp_path):
+    x, q = normalized(2000), normalized(20, seed=7)
+    pq = ProductQuantizer(16, m=8)
+    pq.train(x, iterations=10)
+    codes = pq.encode(x)
+    assert codes.shape == (2000, 8) and codes.dtype == np.uint8
+
+    truth = np.argsort(-(q @ x.T), axis=1)[:, :10]
+    candidates = np.argsort(-pq.scores(pq.tables(q), codes), axis=1)[:, :100]
+    assert recall(candidates, truth) >= 0.9
+
+    pq.save(str(tmp_path / "pq.npz"))
+    loaded = ProductQuantizer(16, m=8)
+    loaded.load(str(tmp_path / "pq.npz"))
+    assert np.array_equal(loaded.encode(x[:10]), codes[:10])
+
+
+def test_int8_storage_decodes_close_to_float32():
+    x = normalized(100)
+    decoded = QuantizedMatrix(encode_int8(x), "int8")
+    assert decoded.shape == (100, 16)
+    assert np.abs(decoded[:] - x).max() < 0.02
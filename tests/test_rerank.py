@@ -0,0 +1,20 @@
+import numpy as np
+
+from magnet.ize.rerank import mmr
+
+
+def test_mmr_skips_near_duplicates():
+    query = np.array([1, 0, 0], dtype=np.float32)
+    embeddings = np.array(
+        [[1, 0, 0], [0.99, 0.14, 0], [0.7, 0, 0.71]], dtype=np.float32
+    )
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    assert mmr(query, embeddings, 2, diversity=0.0) == [0, 1]
+    assert mmr(query, embeddings, 2, diversity=0.7) == [0, 2]
+
+
+def test_mmr_bounds():
+    query = np.ones(3, dtype=np.float32)
+    assert mmr(query, np.zeros((0, 3)), 5) == []
+    assert sorted(mmr(query, np.eye(3), 5)) == [0, 1, 2]
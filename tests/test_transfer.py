@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from magnet.ic.transfer import put_file, get_file, _digest
+
+
+class Store:
+    """
+    An object store that moves objects in small chunks and records their SHA-256 digest, optionally corrupting them.
+    """
+
+    def __init__(self, chunk_size=1000, corrupt=False):
+        self.chunk_size = chunk_size
+        self.corrupt = corrupt
+        self.objects = {}
+
+    def _info(self, name):
+        data = self.objects[name]
+        return SimpleNamespace(
+            name=name, size=len(data), digest=_digest(hashlib.sha256(data))
+        )
+
+    async def put(self, name, reader, meta=None):
+        data, buffer = bytearray(), bytearray(self.chunk_size)
+        while n := reader.readinto(buffer):
+            data.extend(buffer[:n])
+        self.objects[name] = bytes(data)
+        info = self._info(name)
+        if self.corrupt:
+            self.objects[name] = self.objects[name][::-1]
+            info = self._info(name)
+        return info
+
+    async def get_info(self, name):
+        return self._info(name)
+
+    async def get(self, name, writeinto=None):
+        info = self._info(name)
+        data = self.objects[name]
+        if self.corrupt:
+            data = data[::-1]
+        for start in range(0, len(data), self.chunk_size):
+            writeinto.write(data[start : start + self.chunk_size])
+        return SimpleNamespace(info=info)
+
+
+@pytest.mark.asyncio
+async def test_round_trip_in_chunks(tmp_path):
+    source, target = tmp_path / "source.bin", tmp_path / "target.bin"
+    source.write_bytes(os.urandom(4500))
+    store, progress = Store(), []
+    report = lambda name, done, total: progress.append((name, done, total))
+
+    info = await put_file(store, "blob", str(source), progress=report)
+    assert info.size == 4500
+    await get_file(store, "blob", str(target), progress=report)
+    await asyncio.sleep(0)
+
+    assert target.read_bytes() == source.read_bytes()
+    assert progress[:5] == [
+        ("blob", done, 4500) for done in (1000, 2000, 3000, 4000, 4500)
+    ]
+    assert progress[-1] == ("blob", 4500, 4500)
+    assert set(os.listdir(tmp_path)) == {"source.bin", "target.bin"}
+
+
+@pytest.mark.asyncio
+async def test_digest_mismatches(tmp_path):
+    source, target = tmp_path / "source.bin", tmp_path / "target.bin"
+    source.write_bytes(b"magnet" * 500)
+
+    with pytest.raises(ValueError):
+        await put_file(Store(corrupt=True), "blob", str(source))
+
+    store = Store()
+    await put_file(store, "blob", str(source))
+    store.corrupt = True
+    with pytest.raises(ValueError):
+        await get_file(store, "blob", str(target))
+    assert set(os.listdir(tmp_path)) == {"source.bin"}